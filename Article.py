@@ -2,8 +2,8 @@
 This module handles text manipulation, file uploading, and breaking down words for article processing.
 It contains utility functions and the Article class for managing article content.
 """
-import re
 from text_loader import *
+from tokenizer import extract_words, tokenize_lines
 from typing import Dict, List, Tuple
 
 
@@ -55,6 +55,47 @@ def is_only_none_alnum(word):
     return True
 
 
+def parse_article_text(txt_file):
+    """
+    Split the raw text of an article file into its header fields and its content.
+
+    The first four lines of the file are the title, the author(s), the newspaper name and the date.
+    Everything after them is the content of the article.
+
+    Args:
+        txt_file (str): The content of the text file containing the article.
+
+    Returns:
+        Tuple[str, str, str, str, str]: The title, authors, newspaper, date and content of the article.
+    """
+    lines = txt_file.split('\n')
+    title = lines[0].strip()
+    authors = lines[1].strip()
+    newspaper = lines[2].strip()
+    date = lines[3].strip()
+    content = '\n'.join(lines[4:]).strip()
+    return title, authors, newspaper, date, content
+
+
+def stream_article(file):
+    """
+    Read the header of an article from a file object, and tokenize its content lazily.
+
+    Only the four header lines are read right away. The content is read and tokenized line by line
+    as the returned generator is consumed (see tokenizer.tokenize_lines), so the article is never
+    held in memory as a whole. The file must stay open until the generator is exhausted.
+
+    Args:
+        file (TextIO): The article file, opened in text mode with newline='\n'.
+
+    Returns:
+        Tuple[str, str, str, str, Iterator[Tuple[str, Tuple[int, int, int, str, str]]]]: The title, authors,
+        newspaper and date of the article, and a generator of its words and their positions.
+    """
+    title, authors, newspaper, date = (file.readline().strip() for _ in range(4))
+    return title, authors, newspaper, date, tokenize_lines(file)
+
+
 class Article:
     """
    Represents an article with its content and metadata.
@@ -79,12 +120,7 @@ class Article:
        Args:
            txt_file (str): The content of the text file containing the article.
         """
-        lines = txt_file.split('\n')
-        self.title = lines[0].strip()
-        self.authors = lines[1].strip()
-        self.newspaper = lines[2].strip()
-        self.date = lines[3].strip()
-        self.content = '\n'.join(lines[4:]).strip()
+        self.title, self.authors, self.newspaper, self.date, self.content = parse_article_text(txt_file)
         self.words: Dict[str, List[Tuple[int, int, int, str, str]]] = {}
         self.tl = TextLoader()
 
@@ -92,37 +128,12 @@ class Article:
         """
         Process the article content, breaking it down into words and their positions.
 
-        This method splits the content into paragraphs, lines, and words, recording the
-        position of each word along with its surrounding punctuation. It then loads this
-        information into the database using the TextLoader.
+        This method splits the content into paragraphs, lines, and words (see tokenizer.extract_words),
+        recording the position of each word along with its surrounding punctuation. It then
+        loads this information into the database using the TextLoader.
         """
-        paragraphs = [p.strip() for p in re.split(r'\n\s*\n', self.content) if p.strip()]
-        for p_index, paragraph in enumerate(paragraphs, start=1):
-            lines = paragraph.split('\n')
-            for l_index, line in enumerate(lines, start=1):
-                is_last_line_in_paragraph = (l_index == len(lines))
-                words_in_line = line.split()
-                word_position = 0
-                for w_index, word in enumerate(words_in_line, start=1):
-                    if not is_only_none_alnum(word):
-                        word_tuple = split_word(word)
-                    else:
-                        word_tuple = ('', word, '')
-                    is_last_word_in_line = (w_index == len(words_in_line))
-                    word_position += 1
-                    if is_last_line_in_paragraph and is_last_word_in_line:
-                        tup = (p_index, l_index, word_position, word_tuple[0], word_tuple[2] + '\n\n')
-                    elif is_last_word_in_line:
-                        tup = (p_index, l_index, word_position, word_tuple[0], word_tuple[2] + '\n')
-                    else:
-                        tup = (p_index, l_index, word_position, word_tuple[0], word_tuple[2])
-                    if word_tuple[1] not in self.words:
-                        self.words[word_tuple[1]] = []
-                    self.words[word_tuple[1]].append(tup)
-        reporter_id = self.tl.load_reporter(self.authors)
-        np_id = self.tl.load_newspaper(self.newspaper)
-        article_id = self.tl.load_article(np_id, self.title, self.date, reporter_id)
-        self.tl.load_text(article_id, self.words)
+        self.words = extract_words(self.content)
+        self.tl.ingest_article(self.title, self.authors, self.newspaper, self.date, self.words)
 
     def get_title(self):
         """
@@ -1,4 +1,5 @@
 from db_handler import *
+from schema_migrations import migrate_schema
 from streamlitUI import StreamlitUI
 
 
@@ -27,14 +28,11 @@ class Main:
         """
         Initialize the database.
 
-        This method sets up the database by creating necessary schemas,
-        custom types, tables, triggers, and views.
+        This method brings the schemas, custom types, tables, triggers, indexes and views up to date
+        (see schema_migrations). When the schema is already current, no DDL is run.
         """
-        self.database.create_schemas()
-        self.database.create_types()
-        self.database.create_tables()
-        self.database.create_triggers()
-        self.database.create_view()
+        for change in migrate_schema(self.database):
+            print(f"Schema migration: {change}")
 
     def run(self):
         """
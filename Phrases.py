@@ -51,7 +51,20 @@ class Phrases:
 
         Args:
            phrase (str): The phrase to be defined.
+
+        Raises:
+            ValueError: If the phrase is already defined, when duplicates are prevented by constraints.
+                With triggers, the trigger raises a database error.
         """
+        if self.db_handler.duplicate_checks == "constraints":
+            self.db_handler.cursor.execute(" INSERT INTO text_handle.phrases (phrase) VALUES (%s) "
+                                           " ON CONFLICT (phrase) DO NOTHING "
+                                           " RETURNING phrase_id ", (phrase,))
+            inserted = self.db_handler.cursor.fetchall()
+            self.db_handler.connection.commit()
+            if len(inserted) == 0:
+                raise ValueError(f'Phrase "{phrase}" already exists.')
+            return
         self.db_handler.cursor.execute(" INSERT INTO text_handle.phrases (phrase) VALUES (%s) ", (phrase,))
         self.db_handler.connection.commit()
 
@@ -63,7 +76,6 @@ class Phrases:
             list: A list of tuples containing all defined phrases.
         """
         self.db_handler.cursor.execute(" SELECT phrase FROM text_handle.phrases ")
-        self.db_handler.connection.commit()
         phrases = self.db_handler.cursor.fetchall()
         return phrases
 
@@ -141,12 +153,14 @@ class Phrases:
             )
             st.divider()
             article = self.tb.build_entire_text(article_title)
+            # The line breaks of the text, as Markdown line breaks.
+            content = article[3].replace('\n', '  \n')
             st.write(f"Title: {article[0]}")
             st.write(f"Date: {article[1]}")
             st.write(f"Reporter: {article[2]}")
             st.write("Content:")
             result = text_highlighter(
-                text=article[3].replace('\n', '  \n'),
+                text=content,
                 labels=[("define", "yellow"), ("search", "blue")],
                 annotations=[],
             )
@@ -160,7 +174,7 @@ class Phrases:
                 try:
                     for annotation in result:
                         res = [annotation]
-                        for appearance in search_phrase_in_text(annotation['text'], article[3].replace('\n', '  \n')):
+                        for appearance in search_phrase_in_text(annotation['text'], content):
                             start, end = appearance
                             if start != annotation["start"] and end != annotation["end"]:
                                 new_annotation = {'start': start, 'end': end, 'text': annotation['text'],
@@ -168,7 +182,7 @@ class Phrases:
                                 result.append(new_annotation)
                                 res.append(new_annotation)
                         result2 = text_highlighter(
-                            text=article[3].replace('\n', '  \n'),
+                            text=content,
                             labels=[("define", "yellow"), ("search", "blue")],                            annotations=res,
                         )
                         break
@@ -197,8 +211,9 @@ class Phrases:
                         st.error("Error: Phrase not defined")
                     else:
                         article = self.tb.build_entire_text(article_title)
+                        content = article[3].replace('\n', '  \n')
                         result = []
-                        for appearance in search_phrase_in_text(phrase, article[3].replace('\n', '  \n')):
+                        for appearance in search_phrase_in_text(phrase, content):
                             start, end = appearance
                             new_annotation = {'start': start, 'end': end, 'text': phrase,
                                               'tag': 'searched word', 'color': 'blue'}
@@ -212,7 +227,7 @@ class Phrases:
                         st.write(f"Reporter: {article[2]}")
                         st.write("Content:")
                         result2 = text_highlighter(
-                            text=article[3].replace('\n', '  \n'),
+                            text=content,
                             labels=[("searched word", "blue")],
                             annotations=result,
                         )
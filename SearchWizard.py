@@ -11,6 +11,28 @@ from db_handler import *
 import pandas as pd
 from datetime import *
 
+# The articles of a reporter, with their newspaper and date. Takes the reporter_id.
+REPORTER_ARTICLES_QUERY = (" SELECT a.article_title, n.np_name, a.date "
+                           " FROM art_info.articles a JOIN art_info.newspapers n "
+                           " ON a.np_id = n.np_id "
+                           " WHERE a.reporter_id = %s ")
+
+# The articles of a newspaper, with their date. Takes the np_id.
+NP_ARTICLES_QUERY = (" SELECT article_title, date "
+                     " FROM art_info.articles WHERE np_id = %s")
+
+# The articles published on a date, with their newspaper. Takes the date.
+DATE_ARTICLES_QUERY = (" SELECT a.article_title, n.np_name "
+                       " FROM art_info.articles a JOIN art_info.newspapers n "
+                       " ON a.np_id = n.np_id "
+                       " WHERE a.date = %s")
+
+# A line of an article with the offsets of its words, as stored at ingest (see TextLoader.load_lines).
+# Takes the article_id, the paragraph_number and the line_number.
+LINE_QUERY = (" SELECT content, word_starts, word_ends "
+              " FROM text_handle.article_lines "
+              " WHERE article_id = %s AND paragraph_number = %s AND line_number = %s ")
+
 
 def parse_date(date_str_inp):
     """
@@ -57,11 +79,7 @@ class SearchWizard:
             reporter_ids = self.db_handler.get_reporter_id_from_name(reporter_full_name)
             for reporter_id_tuple in reporter_ids:
                 reporter_id = reporter_id_tuple[0]
-                self.db_handler.cursor.execute(" SELECT a.article_title, n.np_name, a.date "
-                                               " FROM art_info.articles a JOIN art_info.newspapers n "
-                                               " ON a.np_id = n.np_id "
-                                               " WHERE a.reporter_id = %s ", (reporter_id,))
-                self.db_handler.connection.commit()
+                self.db_handler.cursor.execute(REPORTER_ARTICLES_QUERY, (reporter_id,))
             return self.db_handler.cursor.fetchall()
 
     # Search for all the articles in a specific newspaper.
@@ -82,9 +100,7 @@ class SearchWizard:
             return None
         else:
             np_id = np_id_ret[0][0]
-            self.db_handler.cursor.execute(" SELECT article_title, date "
-                                           " FROM art_info.articles WHERE np_id = %s", (np_id,))
-            self.db_handler.connection.commit()
+            self.db_handler.cursor.execute(NP_ARTICLES_QUERY, (np_id,))
             return self.db_handler.cursor.fetchall()
 
     # Search for all the articles that were published a specific date
@@ -98,11 +114,7 @@ class SearchWizard:
         Returns:
             List[Tuple[Any, ...]]: A list of tuples containing article information.
         """
-        self.db_handler.cursor.execute(" SELECT a.article_title, n.np_name "
-                                       " FROM art_info.articles a JOIN art_info.newspapers n "
-                                       " ON a.np_id = n.np_id "
-                                       " WHERE a.date = %s", (date,))
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(DATE_ARTICLES_QUERY, (date,))
         return self.db_handler.cursor.fetchall()
 
     # Search for all the articles that contain a specific word.
@@ -125,16 +137,18 @@ class SearchWizard:
                                            " FROM art_info.articles a JOIN art_info.newspapers n "
                                            " ON a.np_id = n.np_id "
                                            " WHERE a.article_id IN"
-                                           " (SELECT (unnest(occurrences)).article_id AS article_id "
-                                           " FROM text_handle.words "
+                                           " (SELECT article_id "
+                                           " FROM text_handle.words_positions "
                                            " WHERE word_id = %s)", (word_id,))
-            self.db_handler.connection.commit()
             return self.db_handler.cursor.fetchall()
 
     def search_word_at_position(self, article_title, paragraph_number, line_number, position_in_line):
         """
         Search for a word at a specific position in an article.
 
+        The line is read by its key from the lines stored at ingest (see TextLoader.load_lines), and the word
+        is cut out of it at the offsets of its position.
+
         Args:
             article_title (str): The title of the article.
             paragraph_number (int): The paragraph number.
@@ -145,21 +159,12 @@ class SearchWizard:
             Optional[str]: The word at the specified position, or None if not found.
         """
         article_id = self.db_handler.get_article_id_from_title(article_title)[0][0]
-        query = """
-            SELECT word
-            FROM words,
-                 LATERAL unnest(occurrences) AS occ(article_id, positions),
-                 LATERAL unnest(occ.positions) AS pos(paragraph_number, line_number, position_in_line, finishing_chars)
-            WHERE occ.article_id = %s
-              AND pos.paragraph_number = %s
-              AND pos.line_number = %s
-              AND pos.position_in_line = %s;
-        """
-        self.db_handler.cursor.execute(query, (article_id, paragraph_number, line_number, position_in_line))
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(LINE_QUERY, (article_id, paragraph_number, line_number))
         res = self.db_handler.cursor.fetchone()
-        if res:
-            return res[0]
+        position_in_line = int(position_in_line)
+        if res and 1 <= position_in_line <= len(res[1]):
+            content, word_starts, word_ends = res
+            return content[word_starts[position_in_line - 1]:word_ends[position_in_line - 1]]
         else:
             return None
 
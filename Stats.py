@@ -1,8 +1,199 @@
 """
 This module is responsible for calculating db statistics
 The methods in this class implement the last requirements in the assignment
+
+The queries are module constants, shared with the asynchronous AsyncStats (see async_db).
 """
+import asyncio
+
 from db_handler import *
+from async_db import AsyncDBHandler
+
+# Every word in the database with its length, from the shortest to the longest.
+CHARS_PER_WORD_QUERY = """SELECT word, char_length(word) as word_length
+                          FROM text_handle.words
+                          ORDER BY word_length"""
+
+# The number of occurrences of every word in the database, numbered alphabetically.
+FREQUENCY_LIST_DB_QUERY = """SELECT ROW_NUMBER() OVER (ORDER BY word) AS row_number, word, COUNT(word) AS frequency
+                             FROM text_handle.words_positions
+                             GROUP BY word"""
+
+# The average length of the words in the database.
+AVG_CHARS_PER_WORD_QUERY = """SELECT ROUND(AVG(char_length(word)),2)
+                              FROM text_handle.words"""
+
+# The distinct words of an article with their lengths. Takes the article_id.
+CHARS_PER_WORD_IN_ARTICLE_QUERY = """
+    SELECT DISTINCT
+        word,
+        char_length(word) as word_length
+    FROM
+        text_handle.words_positions
+    WHERE
+        article_id = %s
+"""
+
+# The average length of the distinct words of an article. Takes the article_id.
+AVG_CHARS_PER_WORD_IN_ARTICLE_QUERY = """
+    SELECT ROUND(AVG(char_length(word)),2)
+    FROM (SELECT DISTINCT word_id, word
+          FROM text_handle.words_positions
+          WHERE article_id = %s) AS article_words
+"""
+
+# The number of characters of every line of an article, with its spaces. Takes the article_id.
+CHARS_IN_LINE_QUERY = """
+    SELECT
+        paragraph_number,
+        line_number,
+        SUM(char_length(word)) + SUM(char_length(starting_chars)) +SUM(char_length(finishing_chars)) +
+        MAX(position_in_line) -2 AS total_characters_in_line
+    FROM
+        text_handle.words_positions
+    WHERE article_id = %s
+    GROUP BY
+        paragraph_number, line_number
+    ORDER BY
+        paragraph_number, line_number
+"""
+
+# The average number of characters of the lines of an article. Takes the article_id.
+AVG_CHARS_IN_LINE_QUERY = """
+    SELECT ROUND(AVG(total_characters_in_line),2) AS avg_chars_in_line
+    FROM (SELECT
+                paragraph_number,
+                line_number,
+                SUM(char_length(word)) + SUM(char_length(starting_chars)) +SUM(char_length(finishing_chars)) +
+                MAX(position_in_line) -2 AS total_characters_in_line
+            FROM
+                text_handle.words_positions
+            WHERE article_id = %s
+            GROUP BY
+                paragraph_number, line_number) AS chars_in_line
+"""
+
+# The number of characters of every paragraph of an article. Takes the article_id.
+CHARS_IN_PARAGRAPH_QUERY = """
+    SELECT
+        paragraph_number,
+        SUM(char_length(word)) + SUM(char_length(starting_chars)) + SUM(char_length(finishing_chars)) +
+        COUNT(word) - (COUNT(DISTINCT line_number) + 2) AS total_characters_in_paragraph
+    FROM
+        text_handle.words_positions
+    WHERE article_id = %s
+    GROUP BY
+        paragraph_number
+"""
+
+# The average number of characters of the paragraphs of an article. Takes the article_id.
+AVG_CHARS_IN_PARAGRAPH_QUERY = """
+    SELECT ROUND(AVG(total_characters_in_paragraph),2) AS avg_char_in_paragraph
+    FROM(  SELECT
+                paragraph_number,
+                SUM(char_length(word)) + SUM(char_length(starting_chars)) + SUM(char_length(finishing_chars)) +
+                COUNT(word) - (COUNT(DISTINCT line_number) + 2)
+             AS total_characters_in_paragraph
+            FROM
+                text_handle.words_positions
+            WHERE article_id = %s
+            GROUP BY
+                paragraph_number) AS total_chars_per_paragraph
+"""
+
+# The number of characters of an article. Takes the article_id.
+CHARS_IN_ARTICLE_QUERY = """
+    SELECT SUM(total_characters_in_paragraph) +
+           (count(*)-1)*2 AS total_chars_in_Article
+    FROM(SELECT SUM(char_length(word)) + SUM(char_length(starting_chars)) +
+                SUM(char_length(finishing_chars)) + COUNT(word) -
+                (COUNT(DISTINCT line_number) + 2) AS total_characters_in_paragraph
+            FROM
+                text_handle.words_positions
+            WHERE article_id = %s
+            GROUP BY paragraph_number) AS total_chars_per_paragraph
+"""
+
+# The number of characters of all the articles.
+CHARS_IN_DB_QUERY = """
+    SELECT SUM(total_chhars_per_article)
+    FROM(
+    SELECT SUM(total_characters_in_paragraph) + (MAX(total_paragraphs)-1) *
+     2 AS total_chhars_per_article
+    FROM(
+        SELECT article_id, SUM(char_length(word)) +
+        SUM(char_length(starting_chars)) + SUM(char_length(finishing_chars)) +
+        COUNT(word) - (COUNT(DISTINCT line_number) + 2) AS total_characters_in_paragraph,
+        COUNT(paragraph_number) over (partition by article_id) as total_paragraphs
+        FROM
+            text_handle.words_positions
+        GROUP BY article_id, paragraph_number) AS total_in_Article
+    GROUP BY article_id
+    )"""
+
+# The average number of characters of the articles.
+AVG_CHARS_IN_DB_QUERY = """
+    SELECT ROUND(AVG(total_chhars_per_article),2)
+    FROM(
+    SELECT SUM(total_characters_in_paragraph) + (MAX(total_paragraphs)-1)
+    * 2 AS total_chhars_per_article
+    FROM(
+        SELECT article_id, SUM(char_length(word)) +
+                           SUM(char_length(starting_chars)) +
+                           SUM(char_length(finishing_chars)) +
+                           COUNT(word) - (COUNT(DISTINCT line_number) + 2)
+                           AS total_characters_in_paragraph,
+                           COUNT(paragraph_number) over
+                           (partition by article_id) as total_paragraphs
+                FROM
+                    text_handle.words_positions
+                GROUP BY article_id, paragraph_number) AS total_in_Article
+    GROUP BY article_id)"""
+
+# The number of distinct words in the database.
+WORDS_IN_DB_QUERY = """SELECT COUNT(word_id)
+                       FROM text_handle.words"""
+
+# The number of words of an article. Takes the article_id.
+WORDS_IN_ARTICLE_QUERY = """SELECT COUNT(word)
+                            FROM text_handle.words_positions
+                            WHERE article_id = %s"""
+
+# The number of words of every paragraph of an article. Takes the article_id.
+WORDS_IN_PARAGRAPH_QUERY = """SELECT COUNT(word)
+                              FROM text_handle.words_positions
+                              WHERE article_id = %s
+                              GROUP BY paragraph_number
+                              ORDER BY paragraph_number"""
+
+# The average number of words of the paragraphs of an article. Takes the article_id.
+AVG_WORDS_IN_PARAGRAPH_QUERY = """SELECT ROUND(AVG(num_of_words_per_par), 2)
+                                  FROM (SELECT COUNT(word) AS num_of_words_per_par
+                                  FROM text_handle.words_positions
+                                  WHERE article_id = %s
+                                  GROUP BY paragraph_number)"""
+
+# The number of words of every line of an article. Takes the article_id.
+WORDS_IN_LINE_QUERY = """SELECT paragraph_number, line_number, COUNT(word) AS num_of_words_in_line
+                         FROM text_handle.words_positions
+                         WHERE article_id = %s
+                         GROUP BY paragraph_number, line_number
+                         ORDER BY paragraph_number, line_number"""
+
+# The average number of words of the lines of an article. Takes the article_id.
+AVG_WORDS_IN_LINE_QUERY = """SELECT ROUND(AVG(num_of_words_in_line), 2) as avg_words_per_line
+                             FROM(   SELECT paragraph_number, line_number,
+                                     COUNT(word) AS num_of_words_in_line
+                                     FROM text_handle.words_positions
+                                     WHERE article_id = %s
+                                     GROUP BY paragraph_number, line_number) AS num_words_per_line"""
+
+# The number of occurrences of every word of an article, numbered alphabetically. Takes the article_id.
+FREQUENCY_LIST_ARTICLE_QUERY = """SELECT ROW_NUMBER() OVER (ORDER BY word) AS row_number, word,
+                                         COUNT(word) AS frequency
+                                  FROM text_handle.words_positions
+                                  WHERE article_id = %s
+                                  GROUP BY word"""
 
 
 class Stats:
@@ -12,6 +203,23 @@ class Stats:
         """
         self.db_handler = DBHandler()
 
+    def article_query(self, query, article_title):
+        """
+        Runs a query that takes the article_id of an article.
+
+        Args:
+            query (str): The query.
+            article_title (str): The title of the article.
+
+        Returns:
+            Optional[List[Tuple[Any, ...]]]: The rows of the result, or None if there is no such article.
+        """
+        article_id_full = self.db_handler.get_article_id_from_title(article_title)
+        if article_id_full:
+            article_id = article_id_full[0][0]
+            self.db_handler.cursor.execute(query, (article_id,))
+            return self.db_handler.cursor.fetchall()
+
     def num_of_chars_per_word(self):
         """
         Returns a table with the word and the length of each word in the database.
@@ -19,12 +227,21 @@ class Stats:
         Returns:
             List[Tuple[str, int]]: A list of tuples, each containing a word and its length.
         """
-        self.db_handler.cursor.execute("""SELECT word, char_length(word) as word_length 
-                                          FROM text_handle.words
-                                          ORDER BY word_length""")
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(CHARS_PER_WORD_QUERY)
         return self.db_handler.cursor.fetchall()
 
+    def iter_num_of_chars_per_word(self, itersize=None):
+        """
+        Streams the words in the database with their lengths, with a server-side cursor (see DBHandler.stream).
+
+        Args:
+            itersize (Optional[int]): The number of rows fetched at a time. Defaults to STREAM_ITERSIZE.
+
+        Returns:
+            Iterator[Tuple[str, int]]: Tuples, each containing a word and its length.
+        """
+        return self.db_handler.stream(CHARS_PER_WORD_QUERY, itersize=itersize)
+
     def avg_num_of_chars_per_word(self):
         """
         Calculates the average number of characters per word in the database.
@@ -32,9 +249,7 @@ class Stats:
         Returns:
             float: The average number of characters per word.
         """
-        self.db_handler.cursor.execute("SELECT ROUND(AVG(char_length(word)),2) "
-                                       "FROM text_handle.words")
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(AVG_CHARS_PER_WORD_QUERY)
         return self.db_handler.cursor.fetchall()[0][0]
 
     def num_of_chars_per_word_in_article(self, article_title):
@@ -47,21 +262,7 @@ class Stats:
         Returns:
             List[Tuple[str, int]]: A list of tuples, each containing a word and its length in the specified article.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""
-                                            SELECT 
-                                                w.word, 
-                                                char_length(w.word) as word_length
-                                            FROM 
-                                                text_handle.words w,
-                                                unnest(w.occurrences) as o(article_id, positions)
-                                            WHERE 
-                                                o.article_id = %s  
-                                            """, (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()
+        return self.article_query(CHARS_PER_WORD_IN_ARTICLE_QUERY, article_title)
 
     def avg_num_of_chars_per_word_in_article(self, article_title):
         """
@@ -73,19 +274,9 @@ class Stats:
         Returns:
             float: The average number of characters per word in the article.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""
-                                            SELECT ROUND(AVG(char_length(w.word)),2)
-                                            FROM 
-                                                text_handle.words w,
-                                                unnest(w.occurrences) as o(article_id, positions)
-                                            WHERE 
-                                                o.article_id = %s  
-                                            """, (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()[0][0]
+        rows = self.article_query(AVG_CHARS_PER_WORD_IN_ARTICLE_QUERY, article_title)
+        if rows is not None:
+            return rows[0][0]
 
     def num_of_characters_in_line(self, article_title):
         """
@@ -97,25 +288,7 @@ class Stats:
         Returns:
             List[Tuple[int, int, int]]: A list of tuples, each containing (paragraph_number, line_number, total_characters_in_line).
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""
-                                            SELECT 
-                                                paragraph_number,
-                                                line_number,
-                                                SUM(char_length(word)) + SUM(char_length(starting_chars)) +SUM(char_length(finishing_chars)) + 
-                                                MAX(position_in_line) -2 AS total_characters_in_line
-                                            FROM 
-                                                text_handle.words_positions
-                                            WHERE article_id = %s
-                                            GROUP BY 
-                                                paragraph_number, line_number
-                                            ORDER BY        
-                                                paragraph_number, line_number
-                                            """, (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()
+        return self.article_query(CHARS_IN_LINE_QUERY, article_title)
 
     def avg_of_characters_in_line(self, article_title):
         """
@@ -127,24 +300,9 @@ class Stats:
         Returns:
             float: The average number of characters per line.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""
-                                            SELECT ROUND(AVG(total_characters_in_line),2) AS avg_chars_in_line
-                                            FROM (SELECT 
-                                                        paragraph_number,
-                                                        line_number,
-                                                        SUM(char_length(word)) + SUM(char_length(starting_chars)) +SUM(char_length(finishing_chars)) + 
-                                                        MAX(position_in_line) -2 AS total_characters_in_line
-                                                    FROM 
-                                                        text_handle.words_positions
-                                                    WHERE article_id = %s
-                                                    GROUP BY 
-                                                        paragraph_number, line_number) AS chars_in_line
-                                            """, (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()[0][0]
+        rows = self.article_query(AVG_CHARS_IN_LINE_QUERY, article_title)
+        if rows is not None:
+            return rows[0][0]
 
     def num_of_chars_in_paragraph(self, article_title):
         """
@@ -156,22 +314,7 @@ class Stats:
         Returns:
             List[Tuple[int, int]]: A list of tuples, each containing (paragraph_number, total_characters_in_paragraph).
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""
-                                            SELECT 
-                                                paragraph_number,
-                                                SUM(char_length(word)) + SUM(char_length(starting_chars)) + SUM(char_length(finishing_chars)) + 
-                                                COUNT(word) - (COUNT(DISTINCT line_number) + 2) AS total_characters_in_paragraph
-                                            FROM 
-                                                text_handle.words_positions
-                                            WHERE article_id = %s
-                                            GROUP BY 
-                                                paragraph_number
-                                            """, (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()
+        return self.article_query(CHARS_IN_PARAGRAPH_QUERY, article_title)
 
     def avg_chars_in_paragraph(self, article_title):
         """
@@ -183,24 +326,9 @@ class Stats:
         Returns:
             float: The average number of characters per paragraph.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""
-                                            SELECT ROUND(AVG(total_characters_in_paragraph),2) AS avg_char_in_paragraph
-                                            FROM(  SELECT 
-                                                        paragraph_number,
-                                                        SUM(char_length(word)) + SUM(char_length(starting_chars)) + SUM(char_length(finishing_chars)) + 
-                                                        COUNT(word) - (COUNT(DISTINCT line_number) + 2)
-                                                     AS total_characters_in_paragraph
-                                                    FROM 
-                                                        text_handle.words_positions
-                                                    WHERE article_id = %s
-                                                    GROUP BY 
-                                                        paragraph_number) AS total_chars_per_paragraph
-                                            """, (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()[0][0]
+        rows = self.article_query(AVG_CHARS_IN_PARAGRAPH_QUERY, article_title)
+        if rows is not None:
+            return rows[0][0]
 
     def num_of_chars_in_article(self, article_title):
         """
@@ -212,22 +340,9 @@ class Stats:
         Returns:
             int: The total number of characters in the article.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""
-                                            SELECT SUM(total_characters_in_paragraph) + 
-                                                   (count(*)-1)*2 AS total_chars_in_Article
-                                            FROM(SELECT SUM(char_length(word)) + SUM(char_length(starting_chars)) + 
-                                                        SUM(char_length(finishing_chars)) + COUNT(word) - 
-                                                        (COUNT(DISTINCT line_number) + 2) AS total_characters_in_paragraph
-                                                    FROM 
-                                                        text_handle.words_positions
-                                                    WHERE article_id = %s
-                                                    GROUP BY paragraph_number) AS total_chars_per_paragraph
-                                                                                        """, (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()[0][0]
+        rows = self.article_query(CHARS_IN_ARTICLE_QUERY, article_title)
+        if rows is not None:
+            return rows[0][0]
 
     def num_of_chars_in_db(self):
         """
@@ -236,22 +351,7 @@ class Stats:
         Returns:
             List[Tuple[int]]: A list containing a single tuple with the total character count.
         """
-        self.db_handler.cursor.execute("""
-                                        SELECT SUM(total_chhars_per_article)
-                                        FROM(
-                                        SELECT SUM(total_characters_in_paragraph) + (MAX(total_paragraphs)-1) *
-                                         2 AS total_chhars_per_article
-                                        FROM(
-                                            SELECT article_id, SUM(char_length(word)) + 
-                                            SUM(char_length(starting_chars)) + SUM(char_length(finishing_chars)) + 
-                                            COUNT(word) - (COUNT(DISTINCT line_number) + 2) AS total_characters_in_paragraph, 
-                                            COUNT(paragraph_number) over (partition by article_id) as total_paragraphs
-                                            FROM 
-                                                text_handle.words_positions
-                                            GROUP BY article_id, paragraph_number) AS total_in_Article
-                                        GROUP BY article_id
-                                        )""")
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(CHARS_IN_DB_QUERY)
         return self.db_handler.cursor.fetchall()
 
     # Returns the number of characters in the entire database(Of all the articles)
@@ -262,24 +362,7 @@ class Stats:
         Returns:
             float: The average number of characters per article.
         """
-        self.db_handler.cursor.execute("""
-                                        SELECT ROUND(AVG(total_chhars_per_article),2)
-                                        FROM(
-                                        SELECT SUM(total_characters_in_paragraph) + (MAX(total_paragraphs)-1) 
-                                        * 2 AS total_chhars_per_article
-                                        FROM(
-                                            SELECT article_id, SUM(char_length(word)) + 
-                                                               SUM(char_length(starting_chars)) + 
-                                                               SUM(char_length(finishing_chars)) + 
-                                                               COUNT(word) - (COUNT(DISTINCT line_number) + 2) 
-                                                               AS total_characters_in_paragraph, 
-                                                               COUNT(paragraph_number) over 
-                                                               (partition by article_id) as total_paragraphs
-                                                    FROM 
-                                                        text_handle.words_positions
-                                                    GROUP BY article_id, paragraph_number) AS total_in_Article
-                                        GROUP BY article_id)""")
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(AVG_CHARS_IN_DB_QUERY)
         return self.db_handler.cursor.fetchall()
 
     def num_of_words_in_db(self):
@@ -289,9 +372,7 @@ class Stats:
         Returns:
             List[Tuple[int]]: A list containing a single tuple with the total word count.
         """
-        self.db_handler.cursor.execute("""SELECT COUNT(word_id)
-                                          FROM text_handle.words""")
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(WORDS_IN_DB_QUERY)
         return self.db_handler.cursor.fetchall()
 
     def num_of_words_in_article(self, article_title):
@@ -304,14 +385,7 @@ class Stats:
         Returns:
             List[Tuple[int]]: A list containing a single tuple with the word count for the article.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""SELECT COUNT(word)
-                                              FROM text_handle.words_positions
-                                              WHERE article_id = %s""", (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()
+        return self.article_query(WORDS_IN_ARTICLE_QUERY, article_title)
 
     def num_of_words_in_paragraph(self, article_title):
         """
@@ -323,16 +397,7 @@ class Stats:
         Returns:
             List[Tuple[int]]: A list of tuples, each containing the word count for a paragraph.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""  SELECT COUNT(word)
-                                                FROM text_handle.words_positions
-                                                WHERE article_id = %s
-                                                GROUP BY paragraph_number
-                                                ORDER BY paragraph_number""", (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()
+        return self.article_query(WORDS_IN_PARAGRAPH_QUERY, article_title)
 
     def avg_words_in_paragraph(self, article_title):
         """
@@ -344,16 +409,7 @@ class Stats:
         Returns:
             List[Tuple[float]]: A list containing a single tuple with the average word count per paragraph.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""  SELECT ROUND(AVG(num_of_words_per_par), 2)
-                                                FROM (SELECT COUNT(word) AS num_of_words_per_par
-                                                FROM text_handle.words_positions
-                                                WHERE article_id = %s
-                                                GROUP BY paragraph_number)""", (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()
+        return self.article_query(AVG_WORDS_IN_PARAGRAPH_QUERY, article_title)
 
     def num_of_words_in_line(self, article_title):
         """
@@ -365,16 +421,7 @@ class Stats:
         Returns:
             List[Tuple[int, int, int]]: A list of tuples, each containing (paragraph_number, line_number, num_of_words_in_line).
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""  SELECT paragraph_number, line_number, COUNT(word) AS num_of_words_in_line
-                                                FROM text_handle.words_positions
-                                                WHERE article_id = %s
-                                                GROUP BY paragraph_number, line_number
-                                                ORDER BY paragraph_number, line_number""", (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()
+        return self.article_query(WORDS_IN_LINE_QUERY, article_title)
 
     # Returns the average number of words in the line
     def avg_words_in_line(self, article_title):
@@ -387,18 +434,7 @@ class Stats:
         Returns:
             List[Tuple[float]]: A list containing a single tuple with the average word count per line.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""  SELECT ROUND(AVG(num_of_words_in_line), 2) as avg_words_per_line
-                                                FROM(   SELECT paragraph_number, line_number, 
-                                                        COUNT(word) AS num_of_words_in_line
-                                                        FROM text_handle.words_positions
-                                                        WHERE article_id = %s
-                                                        GROUP BY paragraph_number, line_number) AS num_words_per_line""",
-                                           (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()
+        return self.article_query(AVG_WORDS_IN_LINE_QUERY, article_title)
 
     def frequency_list_db(self):
         """
@@ -407,13 +443,22 @@ class Stats:
         Returns:
             List[Tuple[int, str, int]]: A list of tuples, each containing (row_number, word, frequency) for all words in the database.
         """
-        self.db_handler.cursor.execute("""  SELECT ROW_NUMBER() OVER 
-                                            (ORDER BY word) AS row_number, word, COUNT(word) AS frequency 
-                                            FROM text_handle.words_positions
-                                            GROUP BY word""")
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(FREQUENCY_LIST_DB_QUERY)
         return self.db_handler.cursor.fetchall()
 
+    def iter_frequency_list_db(self, itersize=None):
+        """
+        Streams the frequency list of words for the entire database, with a server-side cursor
+        (see DBHandler.stream).
+
+        Args:
+            itersize (Optional[int]): The number of rows fetched at a time. Defaults to STREAM_ITERSIZE.
+
+        Returns:
+            Iterator[Tuple[int, str, int]]: Tuples, each containing (row_number, word, frequency).
+        """
+        return self.db_handler.stream(FREQUENCY_LIST_DB_QUERY, itersize=itersize)
+
     def frequency_list_article(self, article_title):
         """
         Generates a frequency list of words for a specific article.
@@ -424,17 +469,7 @@ class Stats:
         Returns:
             List[Tuple[int, str, int]]: A list of tuples, each containing (row_number, word, frequency) for all words in the specified article.
         """
-        article_id_full = self.db_handler.get_article_id_from_title(article_title)
-        if article_id_full:
-            article_id = article_id_full[0][0]
-            self.db_handler.cursor.execute("""  SELECT ROW_NUMBER() OVER (ORDER BY word) AS row_number, word, 
-                                                        COUNT(word) AS frequency 
-                                                FROM text_handle.words_positions
-                                                WHERE article_id = %s
-                                                GROUP BY word""",
-                                           (article_id,))
-            self.db_handler.connection.commit()
-            return self.db_handler.cursor.fetchall()
+        return self.article_query(FREQUENCY_LIST_ARTICLE_QUERY, article_title)
 
     def get_total_articles(self):
         """
@@ -443,7 +478,245 @@ class Stats:
         Returns:
             int: The total number of articles.
         """
-        self.db_handler.cursor.execute("SELECT COUNT(*) FROM art_info.articles")
-        return self.cursor.fetchone()[0]
+        self.db_handler.cursor.execute(TOTAL_ARTICLES_QUERY)
+        return self.db_handler.cursor.fetchone()[0]
+
+    def statistics(self, article_title=None):
+        """
+        Read all the statistics of the statistics page, in one snapshot so that they agree with each other.
+
+        Args:
+            article_title (Optional[str]): The title of the article, or None for the whole database.
+
+        Returns:
+            Optional[Dict[str, Any]]: The statistics (see statistics_page_values), or None if there are no words.
+        """
+        with self.db_handler.snapshot():
+            if article_title is not None:
+                words = self.num_of_chars_per_word_in_article(article_title)
+                if not words:
+                    return None
+                return statistics_page_values(
+                    words=words,
+                    char_count=self.num_of_chars_in_article(article_title),
+                    word_count=self.num_of_words_in_article(article_title)[0][0],
+                    avg_chars_per_word=self.avg_num_of_chars_per_word_in_article(article_title),
+                    avg_words_per_line=self.avg_words_in_line(article_title)[0][0],
+                    avg_chars_per_line=self.avg_of_characters_in_line(article_title),
+                    avg_words_per_paragraph=self.avg_words_in_paragraph(article_title)[0][0],
+                    avg_chars_per_paragraph=self.avg_chars_in_paragraph(article_title),
+                    word_freq=self.frequency_list_article(article_title),
+                    page_count=1)
+            words = self.num_of_chars_per_word()
+            if not words:
+                return None
+            return statistics_page_values(
+                words=words,
+                char_count=self.num_of_chars_in_db()[0][0],
+                word_count=self.num_of_words_in_db()[0][0],
+                avg_chars_per_word=self.avg_num_of_chars_per_word(),
+                word_freq=self.frequency_list_db(),
+                page_count=self.get_total_articles())
+
+
+class AsyncStats:
+    """
+    The queries of Stats as coroutines, on an AsyncDBHandler (see async_db). Independent queries can run
+    concurrently, e.g. with asyncio.gather, each on its own connection.
+    """
+
+    def __init__(self, db_handler=None):
+        """
+        Initializes the AsyncStats class.
+
+        Args:
+            db_handler (Optional[AsyncDBHandler]): The handler the queries run on. Defaults to a new one.
+        """
+        self.db_handler = db_handler or AsyncDBHandler()
+
+    async def article_query(self, query, article_title):
+        """
+        Runs a query that takes the article_id of an article.
+
+        Args:
+            query (str): The query.
+            article_title (str): The title of the article.
+
+        Returns:
+            Optional[List[Tuple[Any, ...]]]: The rows of the result, or None if there is no such article.
+        """
+        article_id_full = await self.db_handler.get_article_id_from_title(article_title)
+        if article_id_full:
+            return await self.db_handler.fetchall(query, (article_id_full[0][0],))
+
+    async def article_value(self, query, article_title):
+        """
+        Runs a query that takes the article_id of an article and returns a single value.
+
+        Args:
+            query (str): The query.
+            article_title (str): The title of the article.
+
+        Returns:
+            Any: The value, or None if there is no such article.
+        """
+        rows = await self.article_query(query, article_title)
+        if rows is not None:
+            return rows[0][0]
+
+    async def num_of_chars_per_word(self):
+        """See Stats.num_of_chars_per_word."""
+        return await self.db_handler.fetchall(CHARS_PER_WORD_QUERY)
+
+    async def avg_num_of_chars_per_word(self):
+        """See Stats.avg_num_of_chars_per_word."""
+        return (await self.db_handler.fetchone(AVG_CHARS_PER_WORD_QUERY))[0]
+
+    async def num_of_chars_per_word_in_article(self, article_title):
+        """See Stats.num_of_chars_per_word_in_article."""
+        return await self.article_query(CHARS_PER_WORD_IN_ARTICLE_QUERY, article_title)
+
+    async def avg_num_of_chars_per_word_in_article(self, article_title):
+        """See Stats.avg_num_of_chars_per_word_in_article."""
+        return await self.article_value(AVG_CHARS_PER_WORD_IN_ARTICLE_QUERY, article_title)
+
+    async def num_of_characters_in_line(self, article_title):
+        """See Stats.num_of_characters_in_line."""
+        return await self.article_query(CHARS_IN_LINE_QUERY, article_title)
+
+    async def avg_of_characters_in_line(self, article_title):
+        """See Stats.avg_of_characters_in_line."""
+        return await self.article_value(AVG_CHARS_IN_LINE_QUERY, article_title)
+
+    async def num_of_chars_in_paragraph(self, article_title):
+        """See Stats.num_of_chars_in_paragraph."""
+        return await self.article_query(CHARS_IN_PARAGRAPH_QUERY, article_title)
 
+    async def avg_chars_in_paragraph(self, article_title):
+        """See Stats.avg_chars_in_paragraph."""
+        return await self.article_value(AVG_CHARS_IN_PARAGRAPH_QUERY, article_title)
 
+    async def num_of_chars_in_article(self, article_title):
+        """See Stats.num_of_chars_in_article."""
+        return await self.article_value(CHARS_IN_ARTICLE_QUERY, article_title)
+
+    async def num_of_chars_in_db(self):
+        """See Stats.num_of_chars_in_db."""
+        return await self.db_handler.fetchall(CHARS_IN_DB_QUERY)
+
+    async def avg_chars_in_db(self):
+        """See Stats.avg_chars_in_db."""
+        return await self.db_handler.fetchall(AVG_CHARS_IN_DB_QUERY)
+
+    async def num_of_words_in_db(self):
+        """See Stats.num_of_words_in_db."""
+        return await self.db_handler.fetchall(WORDS_IN_DB_QUERY)
+
+    async def num_of_words_in_article(self, article_title):
+        """See Stats.num_of_words_in_article."""
+        return await self.article_query(WORDS_IN_ARTICLE_QUERY, article_title)
+
+    async def num_of_words_in_paragraph(self, article_title):
+        """See Stats.num_of_words_in_paragraph."""
+        return await self.article_query(WORDS_IN_PARAGRAPH_QUERY, article_title)
+
+    async def avg_words_in_paragraph(self, article_title):
+        """See Stats.avg_words_in_paragraph."""
+        return await self.article_query(AVG_WORDS_IN_PARAGRAPH_QUERY, article_title)
+
+    async def num_of_words_in_line(self, article_title):
+        """See Stats.num_of_words_in_line."""
+        return await self.article_query(WORDS_IN_LINE_QUERY, article_title)
+
+    async def avg_words_in_line(self, article_title):
+        """See Stats.avg_words_in_line."""
+        return await self.article_query(AVG_WORDS_IN_LINE_QUERY, article_title)
+
+    async def frequency_list_db(self):
+        """See Stats.frequency_list_db."""
+        return await self.db_handler.fetchall(FREQUENCY_LIST_DB_QUERY)
+
+    async def frequency_list_article(self, article_title):
+        """See Stats.frequency_list_article."""
+        return await self.article_query(FREQUENCY_LIST_ARTICLE_QUERY, article_title)
+
+    async def get_total_articles(self):
+        """See Stats.get_total_articles."""
+        return await self.db_handler.get_total_articles()
+
+    async def statistics(self, article_title=None):
+        """
+        Read all the statistics of the statistics page concurrently, from one snapshot (see Stats.statistics).
+
+        Args:
+            article_title (Optional[str]): The title of the article, or None for the whole database.
+
+        Returns:
+            Optional[Dict[str, Any]]: The statistics (see statistics_page_values), or None if there are no words.
+        """
+        fetchall = self.db_handler.fetchall
+        async with self.db_handler.snapshot():
+            if article_title is not None:
+                article_id_full = await self.db_handler.get_article_id_from_title(article_title)
+                if not article_id_full:
+                    return None
+                params = (article_id_full[0][0],)
+                (words, char_count, word_count, avg_chars_per_word, avg_words_per_line, avg_chars_per_line,
+                 avg_words_per_paragraph, avg_chars_per_paragraph, word_freq) = await asyncio.gather(
+                    fetchall(CHARS_PER_WORD_IN_ARTICLE_QUERY, params),
+                    fetchall(CHARS_IN_ARTICLE_QUERY, params),
+                    fetchall(WORDS_IN_ARTICLE_QUERY, params),
+                    fetchall(AVG_CHARS_PER_WORD_IN_ARTICLE_QUERY, params),
+                    fetchall(AVG_WORDS_IN_LINE_QUERY, params),
+                    fetchall(AVG_CHARS_IN_LINE_QUERY, params),
+                    fetchall(AVG_WORDS_IN_PARAGRAPH_QUERY, params),
+                    fetchall(AVG_CHARS_IN_PARAGRAPH_QUERY, params),
+                    fetchall(FREQUENCY_LIST_ARTICLE_QUERY, params))
+                if not words:
+                    return None
+                return statistics_page_values(
+                    words=words, char_count=char_count[0][0], word_count=word_count[0][0],
+                    avg_chars_per_word=avg_chars_per_word[0][0], avg_words_per_line=avg_words_per_line[0][0],
+                    avg_chars_per_line=avg_chars_per_line[0][0],
+                    avg_words_per_paragraph=avg_words_per_paragraph[0][0],
+                    avg_chars_per_paragraph=avg_chars_per_paragraph[0][0], word_freq=word_freq, page_count=1)
+            words, char_count, word_count, avg_chars_per_word, word_freq, page_count = await asyncio.gather(
+                fetchall(CHARS_PER_WORD_QUERY),
+                fetchall(CHARS_IN_DB_QUERY),
+                fetchall(WORDS_IN_DB_QUERY),
+                fetchall(AVG_CHARS_PER_WORD_QUERY),
+                fetchall(FREQUENCY_LIST_DB_QUERY),
+                fetchall(TOTAL_ARTICLES_QUERY))
+            if not words:
+                return None
+            return statistics_page_values(
+                words=words, char_count=char_count[0][0], word_count=word_count[0][0],
+                avg_chars_per_word=avg_chars_per_word[0][0], word_freq=word_freq, page_count=page_count[0][0])
+
+
+def statistics_page_values(words, char_count, word_count, avg_chars_per_word, word_freq, page_count,
+                           avg_words_per_line=None, avg_chars_per_line=None, avg_words_per_paragraph=None,
+                           avg_chars_per_paragraph=None):
+    """
+    Collect the values shown on the statistics page. The line and paragraph averages are only computed
+    for a single article.
+
+    Args:
+        words (List[Tuple[str, int]]): The words with their lengths.
+        char_count (int): The number of characters.
+        word_count (int): The number of words.
+        avg_chars_per_word (float): The average number of characters per word.
+        word_freq (List[Tuple[int, str, int]]): The frequency list.
+        page_count (int): The number of articles (each article is one page).
+        avg_words_per_line (Optional[float]): The average number of words per line.
+        avg_chars_per_line (Optional[float]): The average number of characters per line.
+        avg_words_per_paragraph (Optional[float]): The average number of words per paragraph.
+        avg_chars_per_paragraph (Optional[float]): The average number of characters per paragraph.
+
+    Returns:
+        Dict[str, Any]: The values, by the name of their argument.
+    """
+    return {"words": words, "char_count": char_count, "word_count": word_count,
+            "avg_chars_per_word": avg_chars_per_word, "word_freq": word_freq, "page_count": page_count,
+            "avg_words_per_line": avg_words_per_line, "avg_chars_per_line": avg_chars_per_line,
+            "avg_words_per_paragraph": avg_words_per_paragraph, "avg_chars_per_paragraph": avg_chars_per_paragraph}
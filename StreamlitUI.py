@@ -12,7 +12,8 @@ from word_group import *
 from phrases import *
 from collections import Counter
 import plotly.express as px
-from stats import Stats
+from stats import Stats, AsyncStats
+from async_db import async_available, run_async
 from pandas import *
 
 
@@ -206,53 +207,40 @@ class StreamlitUI:
         selected_title = st.selectbox("Select an article or leave blank for all articles", article_titles)
 
         if st.button("Get Statistics"):
-            stats = Stats()  # Create an instance of the Stats class
+            article_title = selected_title if selected_title != "Please select" else None
+            # All the statistics are read from one snapshot, so they agree with each other. With the
+            # asynchronous layer, the queries run concurrently.
+            if async_available():
+                statistics = run_async(AsyncStats().statistics(article_title))
+            else:
+                statistics = Stats().statistics(article_title)
+            if statistics is None:
+                if article_title is not None:
+                    st.error(f"No words found for article '{selected_title}'. The article might not exist or be empty.")
+                else:
+                    st.error("No words found in the database. The database might be empty.")
+                return
+            char_count = statistics["char_count"]
+            word_count = statistics["word_count"]
+            avg_chars_per_word = statistics["avg_chars_per_word"]
+            page_count = statistics["page_count"]  # Each article is one page
+            # The line and paragraph averages are only available for a single article
+            avg_words_per_line = statistics["avg_words_per_line"]
+            avg_chars_per_line = statistics["avg_chars_per_line"]
+            avg_words_per_paragraph = statistics["avg_words_per_paragraph"]
+            avg_chars_per_paragraph = statistics["avg_chars_per_paragraph"]
+            sentence_count = None
+            word_freq = statistics["word_freq"]
 
             if selected_title != "Please select":
-                # Statistics for a specific article
-                words = stats.num_of_chars_per_word_in_article(selected_title)
-                if not words:
-                    st.error(f"No words found for article '{selected_title}'. The article might not exist or be empty.")
-                    return
                 st.write(f"Statistics for article '{selected_title}':")
-                page_count = 1  # A Single article is always one page
-
-                # Article-specific statistics
-                char_count = stats.num_of_chars_in_article(selected_title)
-                word_count = stats.num_of_words_in_article(selected_title)[0][0]
-                avg_chars_per_word = stats.avg_num_of_chars_per_word_in_article(selected_title)
-                avg_words_per_line = stats.avg_words_in_line(selected_title)[0][0]
-                avg_chars_per_line = stats.avg_of_characters_in_line(selected_title)
-                avg_words_per_paragraph = stats.avg_words_in_paragraph(selected_title)[0][0]
-                avg_chars_per_paragraph = stats.avg_chars_in_paragraph(selected_title)
-
                 # Get full article text for sentence counting
                 article = self.tb.build_entire_text(selected_title)
                 content = article[3]
                 sentence_count = count_sentences(content)
             else:
-                # Statistics for all articles
-                words = stats.num_of_chars_per_word()
-                if not words:
-                    st.error("No words found in the database. The database might be empty.")
-                    return
                 st.write("Statistics for all articles:")
 
-                db_handler = DBHandler()
-
-                # Database-wide statistics
-                char_count = stats.num_of_chars_in_db()[0][0]
-                word_count = stats.num_of_words_in_db()[0][0]
-                avg_chars_per_word = stats.avg_num_of_chars_per_word()
-                page_count = db_handler.get_total_articles()  # Total number of articles (each article is one page)
-
-                # These are not available for all articles combined, so we'll skip them
-                avg_words_per_line = None
-                avg_chars_per_line = None
-                avg_words_per_paragraph = None
-                avg_chars_per_paragraph = None
-                sentence_count = None
-
             # Character statistics
             st.subheader("Character Statistics")
             st.write(f"Total characters: {char_count}")
@@ -288,12 +276,10 @@ class StreamlitUI:
 
             st.subheader("Word Frequency")
             if selected_title != "Please select":
-                word_freq = stats.frequency_list_article(selected_title)
                 word_freq.sort(key=lambda x: x[2], reverse=True)  # Sort by frequency (descending)
                 freq_df = pd.DataFrame([(word, freq) for _, word, freq in word_freq], columns=['Word', 'Frequency'])
                 st.write(f"All words in article '{selected_title}' (sorted by frequency):")
             else:
-                word_freq = stats.frequency_list_db()
                 word_freq.sort(key=lambda x: x[2], reverse=True)  # Sort by frequency (descending)
                 freq_df = pd.DataFrame([(word, freq) for _, word, freq in word_freq], columns=['Word', 'Frequency'])
                 st.write("All words across all articles (sorted by frequency):")
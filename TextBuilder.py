@@ -10,8 +10,288 @@ and context retrieval from the database.
 import streamlit as st
 import pandas as pd
 from db_handler import *
+from async_db import AsyncDBHandler
+from article_cache import get_article_cache, get_context_cache
 from collections import defaultdict
-import re
+import sys
+from tokenizer import join_tokens
+
+# Every word in the database, in alphabetical order.
+ALL_WORDS_QUERY = " SELECT word from text_handle.words order by word "
+
+# The date, the reporter and the stored text of an article, one row per chunk of the text (see
+# TextLoader.load_text_chunk), in order. An article with no words has one row, with no content. Takes the article_id.
+ARTICLE_QUERY = """SELECT a.date, r.first_name, r.last_name, t.content
+                   FROM art_info.articles a JOIN art_info.reporters r
+                   ON a.reporter_id = r.reporter_id
+                   LEFT JOIN text_handle.article_texts t
+                   ON t.article_id = a.article_id
+                   WHERE a.article_id = %s
+                   ORDER BY t.chunk_number """
+
+# The words of an article with their positions, in the order of the text. Takes the article_id.
+# The text of an article is stored at ingest; joining the words back is only needed for a part of it.
+ARTICLE_TEXT_QUERY = """ SELECT
+                                word,
+                                paragraph_number,
+                                line_number,
+                                position_in_line,
+                                starting_chars,
+                                finishing_chars
+                            FROM
+                                text_handle.words_positions
+                            WHERE
+                                article_id = %s
+                                order by paragraph_number, line_number, position_in_line;
+                                """
+
+# The distinct words of an article, in alphabetical order. Takes the article_id.
+ARTICLE_WORDS_QUERY = (" SELECT DISTINCT word "
+                       " from text_handle.words_positions "
+                       " WHERE article_id = %s"
+                       " order by word ")
+
+# The number of lines before and after the line of a word that build_context shows by default.
+CONTEXT_LINES = 1
+
+# The lines around the occurrences of a word in an article, within their paragraphs, in the order of the text, as
+# stored at ingest (see TextLoader.load_lines). Each line is read once, by its key, however many occurrences it is
+# near. The occurrences are read first (SQLite keeps the order of a CROSS JOIN), then the lines around each one.
+# Takes the article_id, the word_id, the lines before and the lines after.
+CONTEXT_LINES_QUERY = """ SELECT DISTINCT
+                                l.paragraph_number,
+                                l.line_number,
+                                l.content,
+                                l.word_starts,
+                                l.word_ends
+                            FROM
+                                text_handle.words_positions o CROSS JOIN text_handle.article_lines l
+                            WHERE
+                                o.article_id = %s AND o.word_id = %s
+                                AND l.article_id = o.article_id AND l.paragraph_number = o.paragraph_number
+                                AND l.line_number BETWEEN o.line_number - %s AND o.line_number + %s
+                                order by l.paragraph_number, l.line_number; """
+
+# The lines of an article with the offsets of their words, in the order of the text. Takes the article_id.
+ARTICLE_LINES_QUERY = """ SELECT
+                                paragraph_number,
+                                line_number,
+                                content,
+                                word_starts,
+                                word_ends
+                            FROM
+                                text_handle.article_lines
+                            WHERE
+                                article_id = %s
+                                order by paragraph_number, line_number; """
+
+# The words of an article with their IDs and positions, in the order of the text, for the windows of words of
+# build_context, which may span lines and paragraphs. Takes the article_id.
+ARTICLE_TOKENS_QUERY = """ SELECT
+                                word_id,
+                                word,
+                                paragraph_number,
+                                line_number,
+                                position_in_line,
+                                starting_chars,
+                                finishing_chars
+                            FROM
+                                text_handle.words_positions
+                            WHERE
+                                article_id = %s
+                                order by paragraph_number, line_number, position_in_line; """
+
+# The positions of some words in an article, in the order of the text. Takes the article_id and the words.
+GROUP_WORDS_INDEX_QUERY = """ SELECT
+                                word,
+                                paragraph_number,
+                                line_number,
+                                position_in_line
+                            FROM
+                                text_handle.words_positions
+                            WHERE
+                                article_id = %s
+                                AND word = ANY(%s)
+                                order by paragraph_number, line_number, position_in_line; """
+
+# The positions of the words of an article, grouped by word. Takes the article_id.
+WORDS_INDEX_QUERY = """ SELECT
+                                word,
+                                paragraph_number,
+                                line_number,
+                                position_in_line
+                            FROM
+                                text_handle.words_positions
+                            WHERE
+                                article_id = %s
+                                order by word, paragraph_number,
+                                line_number, position_in_line; """
+
+
+def join_words(rows):
+    """
+    Join words into text: a line starts with its first word, and the other words follow a space.
+
+    Args:
+        rows (Iterable[Tuple[str, int, int, int, str, str]]): The words in the order of the text, as
+            (word, paragraph_number, line_number, position_in_line, starting_chars, finishing_chars).
+
+    Returns:
+        str: The text.
+    """
+    return join_tokens((row[0], row[1:]) for row in rows)
+
+
+def join_chunks(rows):
+    """
+    Join the chunks of the text of an article, as read by ARTICLE_QUERY.
+
+    Args:
+        rows (List[Tuple[Any, str, str, Optional[str]]]): The (date, first name, last name, content) rows.
+
+    Returns:
+        Tuple[Any, str, str]: The date of issue, the reporter's full name and the text of the article.
+    """
+    date_of_issue, rep_f_name, rep_last_name, _ = rows[0]
+    return date_of_issue, rep_f_name + " " + rep_last_name, "".join(row[3] or "" for row in rows)
+
+
+class ArticleContexts:
+    """
+    The lines of an article, and the lines every word occurs on, from which the context of any occurrence
+    is joined without reading the database.
+
+    Attributes:
+        line_texts (Dict[Tuple[int, int], str]): The text of each (paragraph_number, line_number) line.
+        word_offsets (Dict[Tuple[int, int], List[Tuple[int, int]]]): The offsets in its text where each word
+            of each line starts and ends, by position_in_line.
+        occurrences (Dict[str, List[Tuple[int, int]]]): The lines of the occurrences of each word, in the order
+            of the text.
+    """
+
+    def __init__(self, rows):
+        """
+        Index the lines and the occurrences in one pass over the lines.
+
+        Args:
+            rows (Iterable[Tuple[int, int, str, List[int], List[int]]]): The (paragraph_number, line_number,
+                content, word_starts, word_ends) rows of the article or of some of its lines, in the order of the
+                text (see ARTICLE_LINES_QUERY and CONTEXT_LINES_QUERY).
+        """
+        self.line_texts = {}
+        self.word_offsets = {}
+        self.occurrences = defaultdict(list)
+        for paragraph_number, line_number, content, word_starts, word_ends in rows:
+            key = (paragraph_number, line_number)
+            self.line_texts[key] = content
+            self.word_offsets[key] = offsets = list(zip(word_starts, word_ends))
+            for start, end in offsets:
+                self.occurrences[content[start:end]].append(key)
+
+    def contexts(self, word, lines=CONTEXT_LINES, marker=None):
+        """
+        Get the context of each occurrence of a word.
+
+        Args:
+            word (str): The word.
+            lines (int): The number of lines before and after the line of each occurrence that are shown,
+                within its paragraph.
+            marker (Optional[str]): When given, every occurrence of the word in the contexts, in any case, is
+                put between two markers (e.g. "**" to show it in bold in Markdown).
+
+        Returns:
+            List[str]: The context of each occurrence, in the order of the text.
+        """
+        contexts = []
+        for paragraph_number, line_number in self.occurrences.get(word, ()):
+            keys = [(paragraph_number, number) for number in range(line_number - lines, line_number + lines + 1)
+                    if (paragraph_number, number) in self.line_texts]
+            contexts.append("".join(self.line_texts[key] if marker is None else self.highlight(key, word, marker)
+                                    for key in keys))
+        return contexts
+
+    def highlight(self, key, word, marker):
+        """
+        Put the occurrences of a word in a line, in any case, between two markers, using the offsets of
+        the words of the line.
+
+        Args:
+            key (Tuple[int, int]): The (paragraph_number, line_number) of the line.
+            word (str): The word.
+            marker (str): The marker.
+
+        Returns:
+            str: The text of the line, with the word marked.
+        """
+        text = self.line_texts[key]
+        word = word.lower()
+        parts = []
+        previous_end = 0
+        for start, end in self.word_offsets[key]:
+            if text[start:end].lower() == word:
+                parts.append(text[previous_end:start])
+                parts.append(marker + text[start:end] + marker)
+                previous_end = end
+        parts.append(text[previous_end:])
+        return "".join(parts)
+
+    def size(self):
+        """
+        Estimate the memory used by the lines, their offsets and the occurrences.
+
+        Returns:
+            int: The size, in bytes.
+        """
+        occurrences = sum(len(lines) for lines in self.occurrences.values())
+        offsets = sum(len(line_offsets) for line_offsets in self.word_offsets.values())
+        return (sum(sys.getsizeof(text) for text in self.line_texts.values())
+                + sum(sys.getsizeof(word) for word in self.occurrences)
+                + sys.getsizeof(self.line_texts) + sys.getsizeof(self.word_offsets) + sys.getsizeof(self.occurrences)
+                + (occurrences + offsets) * sys.getsizeof((0, 0)))
+
+
+def word_contexts(rows, word_id, words):
+    """
+    Build the context of each occurrence of a word from the words of the article, in one pass.
+
+    Args:
+        rows (List[Tuple[int, str, int, int, int, str, str]]): The words of the article in the order of the text,
+            as read by ARTICLE_TOKENS_QUERY.
+        word_id (int): The ID of the word.
+        words (int): The number of words before and after each occurrence in its context.
+
+    Returns:
+        List[str]: The context of each occurrence, in the order of the text.
+    """
+    contexts = []
+    for index, row in enumerate(rows):
+        if row[0] == word_id:
+            # A window of words may start in the middle of a line, after the space before its first word.
+            contexts.append(join_words(context_row[1:]
+                                       for context_row in rows[max(index - words, 0):index + words + 1]).strip())
+    return contexts
+
+
+def group_positions(rows):
+    """
+    Group the positions of words by word.
+
+    Args:
+        rows (Iterable[Tuple[str, int, int, int]]): (word, paragraph_number, line_number, position_in_line)
+            rows, ordered by word.
+
+    Returns:
+        List[Tuple[str, List[Tuple[int, int, int]]]]: Each word with the list of its positions.
+    """
+    occurrences_dict = defaultdict(list)
+    for row in rows:
+        word, paragraph_number, line_number, position_in_line = row
+        occurrence = (paragraph_number, line_number, position_in_line)
+        occurrences_dict[word].append(occurrence)
+    index_arr = []
+    for word, occurrences in occurrences_dict.items():
+        index_arr.append((word, occurrences))
+    return index_arr
 
 
 class TextBuilder:
@@ -23,12 +303,16 @@ class TextBuilder:
     """
 
     def __init__(self):
-        """Initialize the TextBuilder with a database handler."""
+        """Initialize the TextBuilder with a database handler and the article and context caches of its database."""
         self.db_handler = DBHandler()
+        self.article_cache = get_article_cache(self.db_handler.database)
+        self.context_cache = get_context_cache(self.db_handler.database)
 
     def build_entire_text(self, article_title):
         """
-        Reconstruct the entire text of an article from the database.
+        Reconstruct the entire text of an article from the database, with a single read of the article's
+        rows and of its stored text. Reconstructed articles are kept in the article cache (see article_cache),
+        so viewing an article again only looks its title up.
 
         Args:
             article_title (str): The title of the article to reconstruct.
@@ -38,46 +322,17 @@ class TextBuilder:
             date of issue, reporter's full name, and the full text of the article.
             Returns None if the article is not found.
        """
-        text_arr = []
         art_id_full = self.db_handler.get_article_id_from_title(article_title)
         if len(art_id_full) == 0:
             return None
         else:
             article_id = art_id_full[0][0]
-        self.db_handler.cursor.execute("""SELECT a.date, r.first_name, r.last_name 
-                                          FROM art_info.articles a JOIN art_info.reporters r 
-                                          ON a.reporter_id = r.reporter_id 
-                                          WHERE a.article_id = %s """,
-                                       (article_id,))
-        self.db_handler.connection.commit()
-        date_of_issue, rep_f_name, rep_last_name = self.db_handler.cursor.fetchall()[0]
-        rep_full_name = rep_f_name + " " + rep_last_name
-        self.db_handler.cursor.execute(""" SELECT 
-                                                w.word,
-                                                pos.paragraph_number,
-                                                pos.line_number,
-                                                pos.position_in_line,
-                                                pos.starting_chars,
-                                                pos.finishing_chars
-                                            FROM 
-                                                text_handle.words w,
-                                                unnest(w.occurrences) as o(article_id, positions),
-                                                unnest(o.positions) as pos(paragraph_number, line_number, 
-                                                position_in_line, starting_chars, finishing_chars)
-                                            WHERE 
-                                                o.article_id = %s
-                                                order by pos.paragraph_number, pos.line_number, pos.position_in_line; 
-                                                """, (article_id,))
-        self.db_handler.connection.commit()
-        for row in self.db_handler.cursor:
-            text_arr.append((row[0], row[1], row[2], row[3], row[4], row[5]))
-        final_text = ""
-        for tup in text_arr:
-            if tup[3] == 1:
-                final_text += f"{tup[4]}" + f"{tup[0]}" + f"{tup[5]}"
-            else:
-                final_text += " " + f"{tup[4]}" + f"{tup[0]}" + f"{tup[5]}"
-        return article_title, date_of_issue, rep_full_name, final_text
+        article = self.article_cache.get(article_id)
+        if article is None:
+            self.db_handler.cursor.execute(ARTICLE_QUERY, (article_id,))
+            article = join_chunks(self.db_handler.cursor.fetchall())
+            self.article_cache.put(article_id, article)
+        return (article_title,) + article
 
     def all_words(self):
         """
@@ -86,12 +341,21 @@ class TextBuilder:
         Returns:
             List[Tuple[str]]: A list of tuples, each containing a single word.
         """
-        self.db_handler.cursor.execute(" SELECT word "
-                                       " from text_handle.words"
-                                       " order by word ")
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(ALL_WORDS_QUERY)
         return self.db_handler.cursor.fetchall()
 
+    def iter_all_words(self, itersize=None):
+        """
+        Stream all words from the database with a server-side cursor (see DBHandler.stream).
+
+        Args:
+            itersize (Optional[int]): The number of rows fetched at a time. Defaults to STREAM_ITERSIZE.
+
+        Returns:
+            Iterator[Tuple[str]]: Tuples, each containing a single word.
+        """
+        return self.db_handler.stream(ALL_WORDS_QUERY, itersize=itersize)
+
     def all_words_in_article(self, article_title):
         """
         Retrieve all words used in a specific article.
@@ -103,68 +367,58 @@ class TextBuilder:
             List[Tuple[str]]: A list of tuples, each containing a single word used in the article.
         """
         article_id = self.db_handler.get_article_id_from_title(article_title)[0][0]
-        self.db_handler.cursor.execute(" SELECT word "
-                                       " from text_handle.words, unnest(occurrences) AS occ "
-                                       " WHERE (occ).article_id = %s"
-                                       " order by word ", (article_id,))
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(ARTICLE_WORDS_QUERY, (article_id,))
         return self.db_handler.cursor.fetchall()
 
-    def build_context(self, article_title, word):
+    def build_context(self, article_title, word, lines=CONTEXT_LINES, words=None):
         """
         Build the context for a specific word in an article.
 
+        The contexts of all the occurrences of the word are built in one pass over the rows of a single query:
+        the lines around the occurrences, each line once and ready-made (see TextLoader.load_lines), or the
+        words of the article. When the contexts of the whole article are cached (see build_context_map), the
+        lines are read from the cache instead.
+
         Args:
             article_title (str): The title of the article.
             word (str): The word to find context for.
+            lines (int): The number of lines before and after the line of each occurrence that are shown,
+                within its paragraph.
+            words (Optional[int]): The number of words before and after each occurrence that are shown,
+                across lines and paragraphs. When given, it is used instead of lines.
 
         Returns:
-            List[str]: A list of context strings for each occurrence of the word.
+            List[str]: A list of context strings for each occurrence of the word, in the order of the text.
         """
-        res = []
-        lines_arr = []
         article_id = self.db_handler.get_article_id_from_title(article_title)[0][0]
         word_id = self.db_handler.get_word_id_from_word(word)
-        self.db_handler.cursor.execute(""" SELECT 
-                                                paragraph_number,
-                                                line_number
-                                            FROM 
-                                                text_handle.words_positions
-                                            WHERE 
-                                                article_id = %s and word_id = %s """,
-                                       (article_id, word_id))
-        self.db_handler.connection.commit()
-        for row in self.db_handler.cursor:
-            lines_arr.append((row[0], row[1]))
-        for line in lines_arr:
-            query = """
-                    SELECT 
-                        word,
-                        paragraph_number,
-                        line_number,
-                        position_in_line,
-                        starting_chars,
-                        finishing_chars
-                    FROM 
-                        text_handle.words_positions
-                    WHERE 
-                        article_id = %s and paragraph_number = %s and line_number in (%s,%s,%s)
-                        order by paragraph_number, line_number, position_in_line;
-            """
-            self.db_handler.cursor.execute(query, (article_id, line[0], line[1] - 1, line[1], line[1] + 1))
-            self.db_handler.connection.commit()
-            result = self.db_handler.cursor.fetchall()
-            text_arr = []
-            for row in result:
-                text_arr.append((row[0], row[1], row[2], row[3], row[4], row[5]))
-            final_context = ""
-            for tup in text_arr:
-                if tup[3] == 1:
-                    final_context += f"{tup[4]}" + f"{tup[0]}" + f"{tup[5]}"
-                else:
-                    final_context += " " + f"{tup[4]}" + f"{tup[0]}" + f"{tup[5]}"
-            res.append(final_context)
-        return res
+        if words is None:
+            article_contexts = self.context_cache.get(article_id)
+            if article_contexts is None:
+                self.db_handler.cursor.execute(CONTEXT_LINES_QUERY, (article_id, word_id, lines, lines))
+                article_contexts = ArticleContexts(self.db_handler.cursor.fetchall())
+            return article_contexts.contexts(word, lines)
+        self.db_handler.cursor.execute(ARTICLE_TOKENS_QUERY, (article_id,))
+        return word_contexts(self.db_handler.cursor.fetchall(), word_id, words)
+
+    def build_context_map(self, article_title):
+        """
+        Build the contexts of every word of an article, with a single read of its lines. The contexts are
+        kept in the context cache (see article_cache), so the contexts of an article are built once.
+
+        Args:
+            article_title (str): The title of the article.
+
+        Returns:
+            ArticleContexts: The contexts of the words of the article.
+        """
+        article_id = self.db_handler.get_article_id_from_title(article_title)[0][0]
+        article_contexts = self.context_cache.get(article_id)
+        if article_contexts is None:
+            self.db_handler.cursor.execute(ARTICLE_LINES_QUERY, (article_id,))
+            article_contexts = ArticleContexts(self.db_handler.cursor.fetchall())
+            self.context_cache.put(article_id, article_contexts, article_contexts.size())
+        return article_contexts
 
     # An index is defined as the position of the word in the article.
     # The position consists of the paragraph number, the line number and the position in the line.
@@ -185,31 +439,8 @@ class TextBuilder:
             return None
         else:
             article_id = art_id_full[0][0]
-        self.db_handler.cursor.execute(""" SELECT 
-                                                word,
-                                                paragraph_number,
-                                                line_number,
-                                                position_in_line
-                                            FROM 
-                                                text_handle.words_positions
-                                            WHERE 
-                                                article_id = %s
-                                                order by word, paragraph_number, 
-                                                line_number, position_in_line; """,
-                                       (article_id,))
-        self.db_handler.connection.commit()
-        words_index = self.db_handler.cursor.fetchall()
-
-        occurrences_dict = defaultdict(list)
-        for row in words_index:
-            word, paragraph_number, line_number, position_in_line = row
-            occurrence = (paragraph_number, line_number, position_in_line)
-            occurrences_dict[word].append(occurrence)
-        index_arr = []
-        for word, occurrences in occurrences_dict.items():
-            index_arr.append((word, occurrences))
-
-        return index_arr
+        self.db_handler.cursor.execute(WORDS_INDEX_QUERY, (article_id,))
+        return group_positions(self.db_handler.cursor.fetchall())
 
     def handle_indexes(self, flag):
         """
@@ -265,21 +496,7 @@ class TextBuilder:
                a word and its position (paragraph, line, position in line).
         """
         article_id = self.db_handler.get_article_id_from_title(article_title)[0][0]
-        query = """
-            SELECT 
-                word,
-                paragraph_number,
-                line_number,
-                position_in_line
-            FROM 
-                text_handle.words_positions
-            WHERE 
-                article_id = %s
-                AND word = ANY(%s)
-                order by paragraph_number, line_number, position_in_line;
-        """
-        self.db_handler.cursor.execute(query, (article_id, words))
-        self.db_handler.connection.commit()
+        self.db_handler.cursor.execute(GROUP_WORDS_INDEX_QUERY, (article_id, words))
         group_words_index = self.db_handler.cursor.fetchall()
         st.subheader(f"The words index for this group in the article '{article_title}': ")
         st.write("* Please note that the index is a paragraph number, row number and position in the row")
@@ -328,6 +545,9 @@ class TextBuilder:
         if st.button("View") and article_title:
             words = self.all_words_in_article(article_title)
             if words:
+                # Streamlit renders every popover as the page loads, so the contexts of all the words are
+                # built at once, and each popover joins its contexts from memory.
+                article_contexts = self.build_context_map(article_title)
                 st.subheader(f"All the words in the article '{article_title}' are: ")
                 for word in words:
                     col1, col2, col3 = st.columns(3, vertical_alignment="center")
@@ -336,17 +556,11 @@ class TextBuilder:
                     with col2:
                         with st.popover("Show Context", help=f"Click for '{word[0]}' context in the article"):
                             st.markdown(f"context/s for {word[0]}:")
-                            context_list = self.build_context(article_title, word[0])
+                            # The word is highlighted where the offsets of the lines put it.
+                            context_list = article_contexts.contexts(word[0], marker="**")
                             for i, context in enumerate(context_list, 1):
                                 st.markdown(f"context {i}:")
-                                # Highlight the word:
-                                highlighted_context = re.sub(
-                                    r'\b' + re.escape(word[0]) + r'\b',
-                                    f"**{word[0]}**",
-                                    context,
-                                    flags=re.IGNORECASE
-                                )
-                                st.markdown(highlighted_context.replace('\n', '  \n'))
+                                st.markdown(context.replace('\n', '  \n'))
                             st.markdown(f"the word is '{word[0]}' and article name is '{article_title}'")
 
             elif article_title and words is None:
@@ -358,12 +572,14 @@ class TextBuilder:
         """
         Handle the display of all words in the database in the Streamlit UI.
         """
-        words = self.all_words()
-        if words:
+        # The words are streamed, so the first ones are shown before the whole table is read.
+        words = self.iter_all_words()
+        first_word = next(words, None)
+        if first_word:
             st.subheader("All the words in the database are: ")
+            st.write(first_word[0])
             for word_tup in words:
                 st.write(word_tup[0])
-            st.write(words)
         else:
             st.error("The database has no words yet.")
 
@@ -384,3 +600,101 @@ class TextBuilder:
                 st.write(final_text)
             else:
                 st.error("Article not found.")
+
+
+class AsyncTextBuilder:
+    """
+    The query methods of TextBuilder as coroutines, on an AsyncDBHandler (see async_db). iter_all_words and
+    the methods that render Streamlit widgets aren't mirrored.
+    """
+
+    def __init__(self, db_handler=None):
+        """
+        Initialize the AsyncTextBuilder.
+
+        Args:
+            db_handler (Optional[AsyncDBHandler]): The handler the queries run on. Defaults to a new one.
+        """
+        self.db_handler = db_handler or AsyncDBHandler()
+        self.article_cache = get_article_cache(self.db_handler.database)
+        self.context_cache = get_context_cache(self.db_handler.database)
+
+    async def build_entire_text(self, article_title):
+        """
+        Reconstruct the entire text of an article (see TextBuilder.build_entire_text).
+
+        Args:
+            article_title (str): The title of the article to reconstruct.
+
+        Returns:
+            Optional[Tuple[str, Any, str, str]]: The article title, date of issue, reporter's full name
+            and the full text of the article, or None if the article is not found.
+        """
+        art_id_full = await self.db_handler.get_article_id_from_title(article_title)
+        if len(art_id_full) == 0:
+            return None
+        article_id = art_id_full[0][0]
+        article = self.article_cache.get(article_id)
+        if article is None:
+            article = join_chunks(await self.db_handler.fetchall(ARTICLE_QUERY, (article_id,)))
+            self.article_cache.put(article_id, article)
+        return (article_title,) + article
+
+    async def all_words(self):
+        """See TextBuilder.all_words."""
+        return await self.db_handler.fetchall(ALL_WORDS_QUERY)
+
+    async def all_words_in_article(self, article_title):
+        """See TextBuilder.all_words_in_article."""
+        article_id = (await self.db_handler.get_article_id_from_title(article_title))[0][0]
+        return await self.db_handler.fetchall(ARTICLE_WORDS_QUERY, (article_id,))
+
+    async def build_context(self, article_title, word, lines=CONTEXT_LINES, words=None):
+        """
+        Build the context of each occurrence of a word in an article (see TextBuilder.build_context).
+
+        Args:
+            article_title (str): The title of the article.
+            word (str): The word to find context for.
+            lines (int): The number of lines before and after the line of each occurrence that are shown,
+                within its paragraph.
+            words (Optional[int]): The number of words before and after each occurrence that are shown,
+                across lines and paragraphs. When given, it is used instead of lines.
+
+        Returns:
+            List[str]: A list of context strings for each occurrence of the word, in the order of the text.
+        """
+        article_id = (await self.db_handler.get_article_id_from_title(article_title))[0][0]
+        word_id = await self.db_handler.get_word_id_from_word(word)
+        if words is None:
+            article_contexts = self.context_cache.get(article_id)
+            if article_contexts is None:
+                article_contexts = ArticleContexts(await self.db_handler.fetchall(
+                    CONTEXT_LINES_QUERY, (article_id, word_id, lines, lines)))
+            return article_contexts.contexts(word, lines)
+        return word_contexts(await self.db_handler.fetchall(ARTICLE_TOKENS_QUERY, (article_id,)), word_id, words)
+
+    async def build_context_map(self, article_title):
+        """
+        Build the contexts of every word of an article, with a single read of its lines, and keep them
+        in the context cache (see TextBuilder.build_context_map).
+
+        Args:
+            article_title (str): The title of the article.
+
+        Returns:
+            ArticleContexts: The contexts of the words of the article.
+        """
+        article_id = (await self.db_handler.get_article_id_from_title(article_title))[0][0]
+        article_contexts = self.context_cache.get(article_id)
+        if article_contexts is None:
+            article_contexts = ArticleContexts(await self.db_handler.fetchall(ARTICLE_LINES_QUERY, (article_id,)))
+            self.context_cache.put(article_id, article_contexts, article_contexts.size())
+        return article_contexts
+
+    async def build_words_index(self, article_title):
+        """See TextBuilder.build_words_index."""
+        art_id_full = await self.db_handler.get_article_id_from_title(article_title)
+        if len(art_id_full) == 0:
+            return None
+        return group_positions(await self.db_handler.fetchall(WORDS_INDEX_QUERY, (art_id_full[0][0],)))
@@ -7,7 +7,20 @@ as well as a TextLoader class for handling database operations related to
 reporters, newspapers, articles, and text content.
 """
 
+import io
+from itertools import islice
+
+from psycopg2.errors import DeadlockDetected
+
 from db_handler import *
+from article_cache import invalidate_articles
+from tokenizer import join_tokens, reading_order
+
+# The number of (word, position) pairs loaded at a time from a streamed article.
+STREAM_CHUNK_SIZE = 50000
+
+# The number of times an article that was chosen as a deadlock victim is loaded again.
+DEADLOCK_RETRIES = 3
 
 
 def parse_name(full_name):
@@ -44,17 +57,97 @@ def convert_dict_to_array_of_tuples(big_dict):
     return array_of_tuples
 
 
+def build_copy_buffer(dict_text, word_ids):
+    """
+    Build a COPY input buffer with one row per (word, position) pair of an article.
+
+    Args:
+        dict_text (Dict[str, List[Tuple[int, int, int, str, str]]]): A dictionary mapping words to their positions.
+        word_ids (Dict[str, int]): The IDs of the words.
+
+    Returns:
+        io.StringIO: The buffer, positioned at its beginning.
+    """
+    buffer = io.StringIO()
+    for word, positions in dict_text.items():
+        word_id = word_ids[word]
+        for pos in positions:
+            write_copy_row(buffer, word_id, pos)
+    buffer.seek(0)
+    return buffer
+
+
+def build_stream_copy_buffer(word_positions, word_ids):
+    """
+    Build a COPY input buffer from (word, position) pairs, as produced by tokenizer.tokenize_lines.
+
+    Args:
+        word_positions (Iterable[Tuple[str, Tuple[int, int, int, str, str]]]): The words and their positions.
+        word_ids (Dict[str, int]): The IDs of the words.
+
+    Returns:
+        io.StringIO: The buffer, positioned at its beginning.
+    """
+    buffer = io.StringIO()
+    for word, pos in word_positions:
+        write_copy_row(buffer, word_ids[word], pos)
+    buffer.seek(0)
+    return buffer
+
+
+def write_copy_row(buffer, word_id, pos):
+    """
+    Write one (word_id, position) row to a COPY input buffer.
+
+    Args:
+        buffer (io.StringIO): The buffer.
+        word_id (int): The ID of the word.
+        pos (Tuple[int, int, int, str, str]): The position of the word.
+    """
+    buffer.write('\t'.join((str(word_id), str(pos[0]), str(pos[1]), str(pos[2]),
+                            copy_escape(pos[3]), copy_escape(pos[4]))))
+    buffer.write('\n')
+
+
 class TextLoader:
     """
     A class for loading text and related information into the database.
 
     This class provides methods for inserting and retrieving information about
     reporters, newspapers, articles, and text content.
+
+    The load_* methods don't commit. Whole articles are loaded with ingest_article, which
+    commits once every commit_every articles and rolls a failed article back on its own.
+
+    Word IDs are looked up in the word ID cache of the database (see word_cache) before the database.
+    The IDs of the words inserted by the open transaction are kept aside, and added to the cache
+    only when the transaction commits.
     """
 
-    def __init__(self):
-        """Initialize the TextLoader with a database handler."""
-        self.db_handler = DBHandler()
+    def __init__(self, commit_every=1, stream_chunk_size=STREAM_CHUNK_SIZE, deadlock_retries=DEADLOCK_RETRIES):
+        """
+        Initialize the TextLoader with a database handler.
+
+        Args:
+            commit_every (int): The number of articles loaded in each transaction. Larger values
+                make bulk loads faster, at the cost of redoing more articles after a crash.
+            stream_chunk_size (int): The number of (word, position) pairs of a streamed article
+                that are held in memory and loaded at a time.
+            deadlock_retries (int): The number of times an article that was rolled back because of a
+                deadlock with another connection is loaded again. Streamed articles are not retried.
+        """
+        self.db_handler = DBHandler(autocommit=False)
+        self.commit_every = commit_every
+        self.stream_chunk_size = stream_chunk_size
+        self.deadlock_retries = deadlock_retries
+        self.pending_articles = 0
+        # The words inserted by the open transaction, and by the article being loaded.
+        self.uncommitted_word_ids = {}
+        self.article_word_ids = {}
+        # The articles loaded by the open transaction, removed from the article caches when it commits.
+        self.uncommitted_article_ids = []
+        # The cache is filled by a separate autocommit handler, so that no transaction is left open.
+        DBHandler().prefill_word_cache()
 
     def load_reporter(self, reporter_full_name):
         """
@@ -66,6 +159,15 @@ class TextLoader:
         Returns:
              int: The reporter's ID in the database.
         """
+        if self.db_handler.duplicate_checks == "constraints":
+            first_name, last_name = parse_name(reporter_full_name)
+            # The no-op update makes RETURNING give the ID of an existing reporter too.
+            self.db_handler.cursor.execute(" INSERT INTO art_info.reporters (first_name, last_name) "
+                                           " VALUES (%s, %s) "
+                                           " ON CONFLICT (LOWER(first_name), LOWER(last_name)) "
+                                           " DO UPDATE SET first_name = art_info.reporters.first_name "
+                                           " RETURNING reporter_id", (first_name, last_name))
+            return self.db_handler.cursor.fetchone()[0]
         reporter_id = self.db_handler.get_reporter_id_from_name(reporter_full_name)
         # If the reporter is not in the database, we add him.
         if len(reporter_id) == 0:
@@ -73,7 +175,6 @@ class TextLoader:
             last_name = parse_name(reporter_full_name)[1]
             self.db_handler.cursor.execute(" INSERT INTO art_info.reporters (first_name, last_name) "
                                            " VALUES (%s, %s) RETURNING reporter_id", (first_name, last_name))
-            self.db_handler.connection.commit()
             ret = self.db_handler.cursor.fetchall()[0][0]
         # If the reporter is in the database, we return the reporter_id.
         else:
@@ -90,12 +191,17 @@ class TextLoader:
         Returns:
             str: The newspaper's ID (UUID) in the database.
        """
+        if self.db_handler.duplicate_checks == "constraints":
+            self.db_handler.cursor.execute(" INSERT INTO art_info.newspapers (np_id, np_name) "
+                                           " VALUES (gen_random_uuid (), %s) "
+                                           " ON CONFLICT (np_name) DO UPDATE SET np_name = EXCLUDED.np_name "
+                                           " RETURNING np_id", (np_name,))
+            return self.db_handler.cursor.fetchone()[0]
         np_id = self.db_handler.get_np_id_from_name(np_name)
         # If the magazine is not in the database, we add it.
         if len(np_id) == 0:
             self.db_handler.cursor.execute(" INSERT INTO art_info.newspapers (np_id, np_name) "
                                            " VALUES (gen_random_uuid (), %s) RETURNING np_id", (np_name,))
-            self.db_handler.connection.commit()
             ret = self.db_handler.cursor.fetchall()[0][0]
         else:
             ret = np_id[0][0]
@@ -113,22 +219,34 @@ class TextLoader:
 
         Returns:
             List[Tuple[int]]: A list containing a tuple with the article's ID.
+
+        Raises:
+            ValueError: If an article with the same title and date is already loaded, when duplicates
+                are prevented by constraints. With triggers, the trigger raises a database error.
         """
+        if self.db_handler.duplicate_checks == "constraints":
+            on_conflict = " ON CONFLICT (article_title, date) DO NOTHING "
+        else:
+            on_conflict = ""
         self.db_handler.cursor.execute(" INSERT INTO art_info.articles (np_id, article_title, date, reporter_id) "
-                                       " VALUES (%s, %s, %s, %s) "
+                                       " VALUES (%s, %s, %s, %s) " + on_conflict +
                                        " RETURNING article_id",
                                        (np_id, article_title, date, reporter_id))
-        self.db_handler.connection.commit()
         article_id = self.db_handler.cursor.fetchall()
+        if len(article_id) == 0:
+            raise ValueError(f"The article '{article_title}' of {date} is already loaded.")
         return article_id
 
-    #
     def load_text(self, article_id, dict_text):
         """
         Load the text content of an article into the database.
 
-        This method processes each word in the article, inserting new words into the database
-        or updating existing words with new occurrences.
+        The IDs of the words are resolved first (see resolve_word_ids). All the (word_id, position)
+        pairs of the article are then staged in a temporary table with a single COPY, and merged with
+        one set-based statement. One postings row is added per occurrence, and in the "arrays" layout
+        every word also gets a new occurrence appended. The text of the article, joined from its words,
+        is stored in article_texts, its lines in article_lines, and the positions of each word packed
+        in packed_positions.
 
         Args:
             article_id (int): The ID of the article.
@@ -136,28 +254,374 @@ class TextLoader:
                 and values are lists of tuples representing the word's occurrences in the article.
                 Each tuple contains (paragraph_number, line_number, position_in_line, starting_chars, finishing_chars).
         """
-        dis_text = convert_dict_to_array_of_tuples(dict_text)
-        for word_occurrences in dis_text:
-            self.db_handler.cursor.execute("SELECT word_id FROM text_handle.words WHERE word = %s",
-                                           (word_occurrences[0],))
-            self.db_handler.connection.commit()
-            word_id = self.db_handler.cursor.fetchall()
-            if len(word_id) == 0:
-                self.db_handler.cursor.execute(" INSERT INTO text_handle.words (word, occurrences) VALUES ( "
-                                               " %s,  ARRAY[ "
-                                               "ROW( %s, %s::position_type[])]::occurrence_type[]) ",
-                                               (word_occurrences[0], article_id[0][0], word_occurrences[1]))
-                self.db_handler.connection.commit()
+        word_ids = self.resolve_word_ids(dict_text.keys())
+        self.load_staged_text(article_id, build_copy_buffer(dict_text, word_ids))
+        word_positions = reading_order(dict_text)
+        self.load_text_chunk(article_id, 1, join_tokens(word_positions))
+        self.load_lines(article_id, word_positions)
+        self.db_handler.copy_packed_positions(article_id[0][0], ((word_ids[word], positions)
+                                                                 for word, positions in dict_text.items()))
+
+    def load_text_stream(self, article_id, word_positions):
+        """
+        Load the text content of an article from a stream of words and positions.
+
+        The stream is consumed in chunks of stream_chunk_size pairs, and each chunk is staged and
+        merged like a whole article in load_text, so memory use doesn't grow with the size of the article.
+        In the "arrays" layout, the positions of each chunk are appended to the article's occurrence of
+        the word, and the text of each chunk is stored as a chunk of the article's text. A line that
+        goes on in the next chunk is stored with it, so the result is the same as loading the article at once.
+        The positions of a word may be in any chunk, so they are packed from the postings once all are loaded.
+
+        Args:
+            article_id (List[Tuple[int]]): A list containing a tuple with the article's ID.
+            word_positions (Iterable[Tuple[str, Tuple[int, int, int, str, str]]]): The words of the article
+                and their positions, in reading order (see tokenizer.tokenize_lines).
+        """
+        word_positions = iter(word_positions)
+        chunk_number = 0
+        # The words of the last line of the previous chunk, which may go on in this one.
+        line_start = []
+        while True:
+            chunk = list(islice(word_positions, self.stream_chunk_size))
+            if not chunk:
+                break
+            chunk_number += 1
+            word_ids = self.resolve_word_ids({word for word, _ in chunk})
+            self.load_staged_text(article_id, build_stream_copy_buffer(chunk, word_ids))
+            self.load_text_chunk(article_id, chunk_number, join_tokens(chunk))
+            chunk = line_start + chunk
+            last_line = len(chunk)
+            while last_line > 0 and chunk[last_line - 1][1][:2] == chunk[-1][1][:2]:
+                last_line -= 1
+            self.load_lines(article_id, chunk[:last_line])
+            line_start = chunk[last_line:]
+        if line_start:
+            self.load_lines(article_id, line_start)
+        self.db_handler.pack_article_positions(article_id[0][0])
+
+    def load_text_chunk(self, article_id, chunk_number, content):
+        """
+        Store a chunk of the text of an article in the article_texts table.
+
+        Args:
+            article_id (List[Tuple[int]]): A list containing a tuple with the article's ID.
+            chunk_number (int): The number of the chunk in the article, starting from 1.
+            content (str): The text of the chunk (see tokenizer.join_tokens).
+        """
+        self.db_handler.cursor.execute(" INSERT INTO text_handle.article_texts (article_id, chunk_number, content) "
+                                       " VALUES (%s, %s, %s) ",
+                                       (article_id[0][0], chunk_number, content))
+
+    def load_lines(self, article_id, word_positions):
+        """
+        Store lines of an article in the article_lines table, with a single COPY.
+
+        Args:
+            article_id (List[Tuple[int]]): A list containing a tuple with the article's ID.
+            word_positions (Iterable[Tuple[str, Tuple[int, int, int, str, str]]]): The words of the lines and
+                their positions, in reading order, with every line whole.
+        """
+        self.db_handler.copy_article_lines(article_id[0][0], word_positions)
+
+    def resolve_word_ids(self, words):
+        """
+        Get the IDs of the given words, inserting the words that aren't in the database yet.
+
+        The words are looked up in the word ID cache, then among the words inserted by the open
+        transaction, and only the remaining ones in the database, with a single query.
+        The new words are inserted with a single statement (see insert_words).
+
+        Args:
+            words (Iterable[str]): The distinct words to resolve.
+
+        Returns:
+            Dict[str, int]: The IDs of the words.
+        """
+        word_ids, missing = self.db_handler.word_cache.get_many(words)
+        unresolved = []
+        for word in missing:
+            word_id = self.uncommitted_word_ids.get(word, self.article_word_ids.get(word))
+            if word_id is None:
+                unresolved.append(word)
             else:
-                new_positions_array = "ARRAY[%s]::position_type[]" % ','.join(
-                    "ROW(%s, %s, %s, '%s', '%s')" % pos for pos in word_occurrences[1])
-                new_occurrence_record = "ROW(%s, %s)::occurrence_type" % (article_id[0][0], new_positions_array)
-                self.db_handler.cursor.execute(
-                    f"""
-                    UPDATE text_handle.words 
-                    SET occurrences = array_append(occurrences, {new_occurrence_record})
-                    WHERE word_id = %s
-                    """,
-                    (word_id[0][0],)
-                )
-                self.db_handler.connection.commit()
+                word_ids[word] = word_id
+        if unresolved:
+            # The words inserted by this transaction were resolved above, so the found words are committed ones.
+            found = self.db_handler.find_word_ids(unresolved)
+            self.db_handler.word_cache.put_many(found)
+            word_ids.update(found)
+            new_words = [word for word in unresolved if word not in word_ids]
+            if new_words:
+                inserted = self.insert_words(new_words)
+                self.article_word_ids.update(inserted)
+                word_ids.update(inserted)
+                if len(inserted) < len(new_words):
+                    # Another connection inserted some of the words, and committed, since they were looked up.
+                    found = self.db_handler.find_word_ids([word for word in new_words if word not in word_ids])
+                    self.db_handler.word_cache.put_many(found)
+                    word_ids.update(found)
+        return word_ids
+
+    def insert_words(self, words):
+        """
+        Insert new words into the words table.
+
+        When the words table has a unique index (see DBHandler.create_unique_indexes), words that
+        another connection inserted in the meantime are skipped. The words are inserted in sorted
+        order, so two connections inserting many of the same words wait for each other in the same
+        order instead of deadlocking.
+
+        Args:
+            words (List[str]): The words to insert.
+
+        Returns:
+            List[Tuple[str, int]]: (word, word_id) pairs of the words that were inserted.
+        """
+        if self.db_handler.duplicate_checks == "constraints":
+            on_conflict = " ON CONFLICT (word) DO NOTHING "
+        else:
+            on_conflict = ""
+        self.db_handler.cursor.execute(" INSERT INTO text_handle.words (word) "
+                                       " SELECT word FROM unnest(%s::text[]) AS new_words(word) "
+                                       " ORDER BY word " + on_conflict +
+                                       " RETURNING word, word_id ",
+                                       (words,))
+        return self.db_handler.cursor.fetchall()
+
+    def load_staged_text(self, article_id, copy_buffer):
+        """
+        Stage (word_id, position) rows with a single COPY, and merge them into the storage layout in use.
+
+        Args:
+            article_id (List[Tuple[int]]): A list containing a tuple with the article's ID.
+            copy_buffer (io.StringIO): The rows, in COPY text format (see build_copy_buffer).
+        """
+        self.db_handler.cursor.execute(" CREATE TEMP TABLE IF NOT EXISTS staged_positions ( "
+                                       " word_id INTEGER, paragraph_number INTEGER, line_number INTEGER, "
+                                       " position_in_line INTEGER, starting_chars TEXT, finishing_chars TEXT) "
+                                       " ON COMMIT DELETE ROWS; "
+                                       " TRUNCATE staged_positions; ")
+        self.db_handler.cursor.copy_expert(" COPY staged_positions (word_id, paragraph_number, line_number, "
+                                           " position_in_line, starting_chars, finishing_chars) FROM STDIN ",
+                                           copy_buffer)
+        if self.db_handler.storage_layout == "arrays":
+            self.merge_staged_arrays(article_id)
+        # The postings are the indexed positions the words_positions view reads, in both layouts.
+        self.merge_staged_postings(article_id)
+
+    def merge_staged_arrays(self, article_id):
+        """
+        Merge the staged positions of an article into the occurrences arrays of the words table.
+
+        Args:
+            article_id (List[Tuple[int]]): A list containing a tuple with the article's ID.
+        """
+        # The positions are cast positionally into position_type, the same way the per-word inserts did.
+        # When the last occurrence of a word already belongs to this article (an earlier chunk of a
+        # streamed article), the positions are added to it rather than appended as a new occurrence.
+        # New words have no occurrences yet, and array_append starts their array.
+        # The rows of the words are locked in word_id order first, so that two connections loading
+        # articles with many words in common wait for each other instead of deadlocking.
+        self.db_handler.cursor.execute("""
+                                        SELECT 1
+                                        FROM text_handle.words
+                                        WHERE word_id IN (SELECT word_id FROM staged_positions)
+                                        ORDER BY word_id
+                                        FOR UPDATE;
+                                        WITH staged AS (
+                                            SELECT word_id,
+                                                   array_agg(ROW(paragraph_number, line_number, position_in_line,
+                                                                 starting_chars, finishing_chars)::position_type
+                                                             ORDER BY paragraph_number, line_number,
+                                                                      position_in_line) AS positions
+                                            FROM staged_positions
+                                            GROUP BY word_id
+                                        )
+                                        UPDATE text_handle.words w
+                                        SET occurrences = CASE
+                                            WHEN (w.occurrences[cardinality(w.occurrences)]).article_id = %s
+                                            THEN w.occurrences[1:cardinality(w.occurrences) - 1]
+                                                 || ROW(%s, (w.occurrences[cardinality(w.occurrences)]).positions
+                                                            || s.positions)::occurrence_type
+                                            ELSE array_append(w.occurrences, ROW(%s, s.positions)::occurrence_type)
+                                            END
+                                        FROM staged s
+                                        WHERE w.word_id = s.word_id
+                                        """,
+                                       (article_id[0][0],) * 3)
+
+    def merge_staged_postings(self, article_id):
+        """
+        Merge the staged positions of an article into the postings table.
+
+        Args:
+            article_id (List[Tuple[int]]): A list containing a tuple with the article's ID.
+        """
+        self.db_handler.cursor.execute(" INSERT INTO text_handle.postings (word_id, article_id, paragraph_number, "
+                                       " line_number, position_in_line, starting_chars, finishing_chars) "
+                                       " SELECT word_id, %s, paragraph_number, line_number, position_in_line, "
+                                       " starting_chars, finishing_chars "
+                                       " FROM staged_positions ",
+                                       (article_id[0][0],))
+
+    def ingest_article(self, article_title, reporter_full_name, np_name, date, dict_text):
+        """
+        Load a whole article (reporter, newspaper, article row and text) into the database.
+
+        The article is loaded atomically (see load_whole_article), and the transaction is committed
+        once commit_every articles have been loaded.
+
+        Args:
+            article_title (str): The title of the article.
+            reporter_full_name (str): The full name of the reporter.
+            np_name (str): The name of the newspaper.
+            date (str): The publication date of the article.
+            dict_text (Dict[str, List[Tuple[int, int, int, str, str]]]): A dictionary mapping words to their positions.
+
+        Returns:
+            int: The ID of the new article.
+        """
+        article_id = self.load_whole_article(article_title, reporter_full_name, np_name, date, dict_text)
+        if self.pending_articles >= self.commit_every:
+            self.commit()
+        return article_id
+
+    def ingest_article_stream(self, article_title, reporter_full_name, np_name, date, word_positions):
+        """
+        Load a whole article whose text is streamed rather than held in memory (see stream_article).
+
+        The article is loaded atomically, in chunks (see load_text_stream), and the transaction is
+        committed once commit_every articles have been loaded.
+
+        Args:
+            article_title (str): The title of the article.
+            reporter_full_name (str): The full name of the reporter.
+            np_name (str): The name of the newspaper.
+            date (str): The publication date of the article.
+            word_positions (Iterable[Tuple[str, Tuple[int, int, int, str, str]]]): The words of the article
+                and their positions, in reading order.
+
+        Returns:
+            int: The ID of the new article.
+        """
+        article_id = self.load_whole_article(article_title, reporter_full_name, np_name, date, word_positions,
+                                             stream=True)
+        if self.pending_articles >= self.commit_every:
+            self.commit()
+        return article_id
+
+    def ingest_batch(self, articles):
+        """
+        Load a batch of articles in a single transaction.
+
+        An article that fails is rolled back to its savepoint without affecting the rest of the batch.
+
+        Args:
+            articles (Iterable[Tuple[str, str, str, str, Dict[str, List[Tuple[int, int, int, str, str]]]]]):
+                The articles, as (title, reporter full name, newspaper name, date, words dictionary) tuples.
+
+        Returns:
+            Tuple[List[int], List[Tuple[str, Exception]]]: The IDs of the loaded articles, and the titles
+            of the articles that failed with their errors.
+        """
+        loaded = []
+        failed = []
+        for article_title, reporter_full_name, np_name, date, dict_text in articles:
+            try:
+                loaded.append(self.load_whole_article(article_title, reporter_full_name, np_name, date, dict_text))
+            except Exception as e:
+                failed.append((article_title, e))
+        self.commit()
+        return loaded, failed
+
+    def load_whole_article(self, article_title, reporter_full_name, np_name, date, dict_text, stream=False):
+        """
+        Load a whole article in the current transaction, without committing (see load_whole_article_once).
+
+        An article that is rolled back because of a deadlock with another connection is loaded again,
+        up to deadlock_retries times, unless its text is streamed.
+
+        Args:
+            article_title (str): The title of the article.
+            reporter_full_name (str): The full name of the reporter.
+            np_name (str): The name of the newspaper.
+            date (str): The publication date of the article.
+            dict_text (Dict[str, List[Tuple[int, int, int, str, str]]]): A dictionary mapping words to their positions.
+                When stream is True, an iterable of (word, position) pairs instead.
+            stream (bool): Whether the text is loaded in chunks with load_text_stream.
+
+        Returns:
+            int: The ID of the new article.
+        """
+        attempt = 0
+        while True:
+            try:
+                return self.load_whole_article_once(article_title, reporter_full_name, np_name, date, dict_text,
+                                                    stream)
+            except DeadlockDetected:
+                if stream or attempt >= self.deadlock_retries:
+                    raise
+                attempt += 1
+
+    def load_whole_article_once(self, article_title, reporter_full_name, np_name, date, dict_text, stream=False):
+        """
+        Load a whole article in the current transaction, without committing.
+
+        If any part of the article fails, everything it wrote is rolled back and the error is raised.
+        When other articles are waiting in the same transaction, only this article is rolled back,
+        to a savepoint taken before it.
+
+        Args:
+            article_title (str): The title of the article.
+            reporter_full_name (str): The full name of the reporter.
+            np_name (str): The name of the newspaper.
+            date (str): The publication date of the article.
+            dict_text (Dict[str, List[Tuple[int, int, int, str, str]]]): A dictionary mapping words to their positions.
+                When stream is True, an iterable of (word, position) pairs instead.
+            stream (bool): Whether the text is loaded in chunks with load_text_stream.
+
+        Returns:
+            int: The ID of the new article.
+        """
+        use_savepoint = self.pending_articles > 0
+        self.article_word_ids = {}
+        if use_savepoint:
+            self.db_handler.cursor.execute(" SAVEPOINT article_ingest ")
+        try:
+            reporter_id = self.load_reporter(reporter_full_name)
+            np_id = self.load_newspaper(np_name)
+            article_id = self.load_article(np_id, article_title, date, reporter_id)
+            if stream:
+                self.load_text_stream(article_id, dict_text)
+            else:
+                self.load_text(article_id, dict_text)
+        except Exception:
+            if use_savepoint:
+                self.db_handler.cursor.execute(" ROLLBACK TO SAVEPOINT article_ingest ")
+            else:
+                self.db_handler.connection.rollback()
+                self.uncommitted_word_ids = {}
+                self.uncommitted_article_ids = []
+            # The words inserted by this article were rolled back with it.
+            self.article_word_ids = {}
+            raise
+        if use_savepoint:
+            self.db_handler.cursor.execute(" RELEASE SAVEPOINT article_ingest ")
+        self.uncommitted_word_ids.update(self.article_word_ids)
+        self.article_word_ids = {}
+        self.uncommitted_article_ids.append(article_id[0][0])
+        self.pending_articles += 1
+        return article_id[0][0]
+
+    def commit(self):
+        """
+        Commit the articles loaded since the last commit, cache the IDs of the words they inserted,
+        and remove the articles from the article caches.
+        """
+        self.db_handler.connection.commit()
+        self.db_handler.word_cache.put_many(self.uncommitted_word_ids.items())
+        self.uncommitted_word_ids = {}
+        invalidate_articles(self.db_handler.database, self.uncommitted_article_ids)
+        self.uncommitted_article_ids = []
+        self.pending_articles = 0
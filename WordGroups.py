@@ -53,7 +53,6 @@ class WordGroup:
         """
         self.db_handler.cursor.execute("SELECT group_id FROM text_handle.word_groups WHERE group_description = %s",
                                        (group_description,))
-        self.db_handler.connection.commit()
         group_id = self.db_handler.cursor.fetchall()
         if len(group_id) == 0:
             return None
@@ -95,12 +94,10 @@ class WordGroup:
         """
         self.db_handler.cursor.execute("SELECT word_ids FROM text_handle.word_groups WHERE group_description = %s",
                                        (group_description,))
-        self.db_handler.connection.commit()
         word_ids = self.db_handler.cursor.fetchall()
         words = []
         for word_id in word_ids[0][0]:
             self.db_handler.cursor.execute("SELECT word FROM text_handle.words WHERE word_id = %s", (word_id,))
-            self.db_handler.connection.commit()
             word = self.db_handler.cursor.fetchall()
             words.append(word[0][0])
         return words
@@ -113,7 +110,6 @@ class WordGroup:
             List[str]: A list of all group descriptions, with "Please select" as the first option.
         """
         self.db_handler.cursor.execute("SELECT group_description FROM text_handle.word_groups")
-        self.db_handler.connection.commit()
         groups = self.db_handler.cursor.fetchall()
         ret = ["Please select"]
         ret.extend(make_arr_from_tuparr(groups))
@@ -136,7 +132,6 @@ class WordGroup:
         WHERE group_id = %s AND %s = ANY(word_ids);
         """
         self.db_handler.cursor.execute(query, (group_id, word_id))
-        self.db_handler.connection.commit()
         if self.db_handler.cursor.fetchall():
             return True
         else:
@@ -0,0 +1,199 @@
+"""
+This module keeps what is built from an article in memory, so that viewing an article again (every
+Streamlit rerun of the View, Phrases and Statistics pages rebuilds it) doesn't read it from the database:
+    - the article cache (see get_article_cache) keeps reconstructed articles;
+    - the context cache (see get_context_cache) keeps the contexts of the words of an article
+      (see TextBuilder.build_context_map).
+
+There is one of each cache per database, shared by every TextBuilder of the process that reads it: the same
+article_id names different articles in different databases. Each cache is bounded by the total size of what
+it holds, and the least recently used articles are evicted first. An article is never changed once its
+transaction commits, so a cached article stays correct. Code that writes the text of an article calls
+invalidate_articles when it commits, so a reader never keeps a text that was replaced.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+# The maximal total size of the cached articles, in bytes. The least recently used articles are evicted first.
+ARTICLE_CACHE_BYTES = 64 * 1024 * 1024
+
+# The maximal total size of the cached contexts, in bytes. The contexts of an article are its lines and the
+# lines of every word, a little more than the size of its text.
+CONTEXT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def article_size(article):
+    """
+    Estimate the memory used by a cached article.
+
+    Args:
+        article (Tuple[Any, str, str]): The date of issue, the reporter's full name and the text.
+
+    Returns:
+        int: The size of the article's strings, in bytes.
+    """
+    return sum(sys.getsizeof(value) for value in article)
+
+
+class ArticleCache:
+    """
+    A thread-safe article_id -> value map, bounded by size in bytes, with LRU eviction and hit/miss counters.
+    The values are reconstructed articles, or anything else built from an article.
+
+    Attributes:
+        max_bytes (int): The maximal total size of the cached values.
+        size_bytes (int): The total size of the cached values.
+        hits (int): The number of lookups answered by the cache.
+        misses (int): The number of lookups the cache couldn't answer.
+        evictions (int): The number of articles evicted to make room for others.
+    """
+
+    def __init__(self, max_bytes=ARTICLE_CACHE_BYTES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int): The maximal total size of the cached articles, in bytes.
+        """
+        self.max_bytes = max_bytes
+        self.articles = OrderedDict()
+        self.lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, article_id):
+        """
+        Look an article up.
+
+        Args:
+            article_id (int): The ID of the article.
+
+        Returns:
+            Optional[Any]: The cached value of the article, e.g. the date of issue, the reporter's full name
+            and the text of the article, or None if it isn't cached.
+        """
+        with self.lock:
+            entry = self.articles.get(article_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.articles.move_to_end(article_id)
+            return entry[0]
+
+    def put(self, article_id, article, size=None):
+        """
+        Add a value built from a committed article to the cache, evicting the least recently used articles
+        if needed. A value larger than the whole cache isn't cached.
+
+        Args:
+            article_id (int): The ID of the article.
+            article (Any): The value, e.g. the date of issue, the reporter's full name and the text.
+            size (Optional[int]): The size of the value, in bytes. Defaults to its article_size.
+        """
+        if size is None:
+            size = article_size(article)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.articles.pop(article_id, None)
+            if previous is not None:
+                self.size_bytes -= previous[1]
+            self.articles[article_id] = (article, size)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.articles.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, article_ids):
+        """
+        Remove articles whose data changed from the cache.
+
+        Args:
+            article_ids (Iterable[int]): The IDs of the articles.
+        """
+        with self.lock:
+            for article_id in article_ids:
+                entry = self.articles.pop(article_id, None)
+                if entry is not None:
+                    self.size_bytes -= entry[1]
+
+    def clear(self):
+        """Empty the cache and reset its counters."""
+        with self.lock:
+            self.articles.clear()
+            self.size_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Get the counters of the cache.
+
+        Returns:
+            Dict[str, Any]: The number of cached articles, their size in bytes, the hits, the misses,
+            the hit rate and the evictions.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self.articles), "size_bytes": self.size_bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0, "evictions": self.evictions}
+
+
+_article_caches = {}
+_context_caches = {}
+_article_cache_lock = threading.Lock()
+
+
+def get_article_cache(database):
+    """
+    Get the article cache of a database in this process, creating it on first use.
+
+    Args:
+        database (Tuple[Any, ...]): The database, as identified by DBHandler.database.
+
+    Returns:
+        ArticleCache: The cache.
+    """
+    with _article_cache_lock:
+        article_cache = _article_caches.get(database)
+        if article_cache is None:
+            article_cache = _article_caches[database] = ArticleCache()
+        return article_cache
+
+
+def get_context_cache(database):
+    """
+    Get the context cache of a database in this process, creating it on first use.
+
+    Args:
+        database (Tuple[Any, ...]): The database, as identified by DBHandler.database.
+
+    Returns:
+        ArticleCache: The cache.
+    """
+    with _article_cache_lock:
+        context_cache = _context_caches.get(database)
+        if context_cache is None:
+            context_cache = _context_caches[database] = ArticleCache(CONTEXT_CACHE_BYTES)
+        return context_cache
+
+
+def invalidate_articles(database, article_ids):
+    """
+    Remove articles whose data changed from the article and context caches of their database.
+
+    Args:
+        database (Tuple[Any, ...]): The database, as identified by DBHandler.database.
+        article_ids (Iterable[int]): The IDs of the articles.
+    """
+    article_ids = list(article_ids)
+    get_article_cache(database).invalidate(article_ids)
+    get_context_cache(database).invalidate(article_ids)
@@ -0,0 +1,368 @@
+"""
+This module is the asynchronous counterpart of DBHandler: the read queries of the app as coroutines, over the
+asyncio driver of psycopg 3 and a pool of connections, so a page that needs many independent reads (like the
+statistics page) can run them concurrently, each on its own connection, and wait only for the slowest one.
+
+psycopg 3 takes the same %s placeholders as psycopg2, so the coroutines run the very queries of the blocking
+classes (the *_QUERY constants of db_handler, Stats and TextBuilder). AsyncStats and AsyncTextBuilder, next to
+Stats and TextBuilder, mirror their query methods on an AsyncDBHandler. The reads of the pages are mirrored; these
+are not:
+    - the iter_* methods, which stream with a server-side cursor;
+    - the getters the TextLoader uses at ingest (get_word_ids, find_word_ids, get_loaded_article_keys) and
+      get_packed_positions;
+    - the methods that render Streamlit widgets while they read (the handle_* methods and
+      TextBuilder.build_group_words_index).
+
+Concurrent queries run on different connections, so they can't share a transaction. Inside
+`async with db_handler.snapshot():`, the queries of every task import the snapshot exported by one open
+transaction (SET TRANSACTION SNAPSHOT), so they all see the database at the same moment. The transaction
+holds a connection of a second, smaller pool for the whole block, so however many snapshot blocks are open,
+the queries they wait for always get connections of the query pool.
+
+Streamlit runs a page outside of any event loop. run_async runs a coroutine on the event loop of this module,
+a daemon thread that owns a pool for the life of the process, and waits for its result. A pool is opened per
+event loop, so the coroutines can also be awaited from an application's own loop, which closes it with
+close_async_pool before the loop ends.
+
+The layer needs psycopg 3 with its pool (pip install "psycopg[pool]") and the PostgreSQL backend; see async_available.
+"""
+
+import asyncio
+import atexit
+import contextvars
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+try:
+    from psycopg import sql
+    from psycopg.conninfo import make_conninfo
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:
+    AsyncConnectionPool = None
+
+import connection_pool
+import db_handler
+import query_stats
+from db_handler import (ALL_ARTICLES_QUERY, ALL_TITLES_QUERY, ARTICLE_ID_QUERY, NP_ID_QUERY, REPORTER_ID_QUERY,
+                        TOTAL_ARTICLES_QUERY, WORD_ID_QUERY, parse_name)
+from word_cache import get_word_cache
+
+# The maximal number of connections of the asynchronous pool of an event loop.
+ASYNC_POOL_MAX_CONNECTIONS = 10
+
+# The maximal number of snapshot blocks open at once in an event loop (see AsyncDBHandler.snapshot). Each holds
+# a connection of the snapshot pool, kept apart from the query pool, for its whole duration; more blocks wait.
+ASYNC_SNAPSHOT_CONNECTIONS = 4
+
+# The number of connections the asynchronous pool keeps open when idle.
+ASYNC_POOL_MIN_CONNECTIONS = 1
+
+# The ID of the snapshot the queries of the current task read from, set by AsyncDBHandler.snapshot.
+_snapshot_id = contextvars.ContextVar("snapshot_id", default=None)
+
+# The opening of the pools of every event loop, as tasks, by kind ("queries" or "snapshots").
+_pools = weakref.WeakKeyDictionary()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def async_available():
+    """
+    Check whether the asynchronous layer can be used.
+
+    Returns:
+        bool: True if psycopg 3 and its pool are installed and the app uses the PostgreSQL backend.
+    """
+    return AsyncConnectionPool is not None and db_handler.STORAGE_BACKEND == "postgresql"
+
+
+async def open_pool(max_size=ASYNC_POOL_MAX_CONNECTIONS):
+    """
+    Open an asynchronous pool of connections to the server of connection_pool.CONNECTION_PARAMS.
+
+    Args:
+        max_size (int): The maximal number of connections of the pool.
+
+    Returns:
+        psycopg_pool.AsyncConnectionPool: The pool. Its connections are in autocommit mode.
+
+    Raises:
+        ImportError: If psycopg 3 or its pool isn't installed.
+    """
+    if AsyncConnectionPool is None:
+        raise ImportError('The asynchronous database layer needs psycopg 3: pip install "psycopg[pool]"')
+    pool = AsyncConnectionPool(make_conninfo(**connection_pool.CONNECTION_PARAMS),
+                               min_size=min(ASYNC_POOL_MIN_CONNECTIONS, max_size), max_size=max_size,
+                               timeout=connection_pool.POOL_TIMEOUT, kwargs={"autocommit": True}, open=False)
+    await pool.open()
+    return pool
+
+
+async def get_async_pool(kind="queries"):
+    """
+    Get an asynchronous pool of the running event loop, opening it on first use.
+
+    Args:
+        kind (str): "queries" for the pool the queries run on, or "snapshots" for the pool of the connections
+            that hold the snapshots of snapshot blocks (see AsyncDBHandler.snapshot).
+
+    Returns:
+        psycopg_pool.AsyncConnectionPool: The pool.
+    """
+    loop = asyncio.get_running_loop()
+    pools = _pools.setdefault(loop, {})
+    opening = pools.get(kind)
+    if opening is None:
+        max_size = ASYNC_SNAPSHOT_CONNECTIONS if kind == "snapshots" else ASYNC_POOL_MAX_CONNECTIONS
+        opening = pools[kind] = loop.create_task(open_pool(max_size))
+    try:
+        # A cancelled caller mustn't cancel the opening that other callers wait for.
+        return await asyncio.shield(opening)
+    except Exception:
+        if pools.get(kind) is opening:
+            del pools[kind]
+        raise
+
+
+async def close_async_pool():
+    """Close the asynchronous pools of the running event loop, if they were opened. Call it before the loop ends."""
+    for opening in _pools.pop(asyncio.get_running_loop(), {}).values():
+        await (await opening).close()
+
+
+def get_event_loop():
+    """
+    Get the event loop of this module, starting its thread on first use.
+
+    Returns:
+        asyncio.AbstractEventLoop: The loop.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async_db", daemon=True).start()
+            atexit.register(run_async, close_async_pool())
+        return _loop
+
+
+def run_async(coroutine):
+    """
+    Run a coroutine on the event loop of this module, from code that isn't running in an event loop.
+
+    Args:
+        coroutine (Coroutine): The coroutine, e.g. AsyncStats().statistics(title).
+
+    Returns:
+        Any: The result of the coroutine.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop()).result()
+
+
+class AsyncDBHandler:
+    """
+    Runs read queries as coroutines, each on a connection of the asynchronous pool of the running event loop,
+    which is returned to the pool as soon as the query has run. Every query is timed (see query_stats).
+
+    Attributes:
+        pool (Optional[psycopg_pool.AsyncConnectionPool]): The pool, or None for the pool of the running loop.
+        snapshot_pool (Optional[psycopg_pool.AsyncConnectionPool]): The pool of the connections that hold
+            snapshots, or None for the snapshot pool of the running loop.
+        database (Tuple[Any, ...]): The database of the pools (see connection_pool.database_of).
+        word_cache (WordIdCache): The word ID cache of the database, shared with the DBHandlers of the process.
+    """
+
+    def __init__(self, pool=None, snapshot_pool=None):
+        """
+        Initialize the handler. No connection is opened until a query runs.
+
+        Args:
+            pool (Optional[psycopg_pool.AsyncConnectionPool]): The pool. Defaults to the pool of the running loop.
+            snapshot_pool (Optional[psycopg_pool.AsyncConnectionPool]): The pool of the connections that hold
+                snapshots, to the server of pool. It must not be pool itself, or snapshot blocks could hold
+                every connection their queries wait for. Defaults to the snapshot pool of the running loop.
+        """
+        self.pool = pool
+        self.snapshot_pool = snapshot_pool
+        # The pools connect to the server of connection_pool.CONNECTION_PARAMS.
+        self.database = connection_pool.database_of(connection_pool.CONNECTION_PARAMS)
+        self.word_cache = get_word_cache(self.database)
+
+    async def connection_pool(self):
+        """
+        Get the pool the queries run on.
+
+        Returns:
+            psycopg_pool.AsyncConnectionPool: The pool.
+        """
+        return self.pool if self.pool is not None else await get_async_pool()
+
+    @asynccontextmanager
+    async def snapshot(self):
+        """
+        Make the queries of the async with block, including those of the tasks it starts, read one snapshot of
+        the database, so concurrent queries agree with each other. Inside another snapshot block, the block
+        just uses it. The transaction that exports the snapshot holds a connection of the snapshot pool, so
+        at most ASYNC_SNAPSHOT_CONNECTIONS blocks are open at once, and the others wait for one to end.
+        """
+        if _snapshot_id.get() is not None:
+            yield
+            return
+        pool = self.snapshot_pool if self.snapshot_pool is not None else await get_async_pool("snapshots")
+        async with pool.connection() as connection:
+            async with connection.transaction():
+                await connection.execute(" SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY ")
+                cursor = await connection.execute(" SELECT pg_export_snapshot() ")
+                token = _snapshot_id.set((await cursor.fetchone())[0])
+                try:
+                    yield
+                finally:
+                    _snapshot_id.reset(token)
+
+    def fetchall(self, query, params=None):
+        """
+        Run a query and fetch its rows.
+
+        Args:
+            query (str): The query.
+            params (Optional[Sequence[Any]]): The parameters of the query.
+
+        Returns:
+            Awaitable[List[Tuple[Any, ...]]]: The rows.
+        """
+        # The caller is found now: a coroutine passed to asyncio.gather runs in a task of its own,
+        # whose stack doesn't lead back to the method that started it.
+        return self.run_query(query, params, query_stats.find_caller())
+
+    async def run_query(self, query, params, caller):
+        """
+        Run a query and fetch its rows (see fetchall).
+
+        Args:
+            query (str): The query.
+            params (Optional[Sequence[Any]]): The parameters of the query.
+            caller (str): The method that ran the query, for the query statistics.
+
+        Returns:
+            List[Tuple[Any, ...]]: The rows.
+        """
+        pool = await self.connection_pool()
+        snapshot_id = _snapshot_id.get()
+        start = time.perf_counter()
+        rows = []
+        try:
+            async with pool.connection() as connection:
+                if snapshot_id is None:
+                    cursor = await connection.execute(query, params)
+                    rows = await cursor.fetchall()
+                else:
+                    async with connection.transaction():
+                        await connection.execute(" SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY ")
+                        await connection.execute(sql.SQL(" SET TRANSACTION SNAPSHOT {} ").format(
+                            sql.Literal(snapshot_id)))
+                        cursor = await connection.execute(query, params)
+                        rows = await cursor.fetchall()
+        finally:
+            if query_stats.QUERY_TIMING:
+                query_stats.get_query_stats().record(query, time.perf_counter() - start, len(rows), caller)
+        return rows
+
+    async def fetchone(self, query, params=None):
+        """
+        Run a query and fetch its first row.
+
+        Args:
+            query (str): The query.
+            params (Optional[Sequence[Any]]): The parameters of the query.
+
+        Returns:
+            Optional[Tuple[Any, ...]]: The first row, or None if there are no rows.
+        """
+        rows = await self.fetchall(query, params)
+        return rows[0] if rows else None
+
+    async def get_article_id_from_title(self, article_title):
+        """
+        Get the article ID from the article title (see DBHandler.get_article_id_from_title).
+
+        Args:
+            article_title (str): The title of the article.
+
+        Returns:
+            List[Tuple[Any, ...]]: A list of tuples containing article ID(s).
+        """
+        return await self.fetchall(ARTICLE_ID_QUERY, (article_title,))
+
+    async def get_reporter_id_from_name(self, reporter_full_name):
+        """
+        Get the reporter ID(s) from the reporter's full name (see DBHandler.get_reporter_id_from_name).
+
+        Args:
+            reporter_full_name (str): The full name of the reporter.
+
+        Returns:
+            List[Tuple[Any, ...]]: A list of tuples containing reporter ID(s).
+        """
+        return await self.fetchall(REPORTER_ID_QUERY, parse_name(reporter_full_name))
+
+    async def get_np_id_from_name(self, np_name):
+        """
+        Get the newspaper ID from the newspaper name (see DBHandler.get_np_id_from_name).
+
+        Args:
+            np_name (str): The name of the newspaper.
+
+        Returns:
+            List[Tuple[Any, ...]]: A list of tuples containing newspaper ID(s).
+        """
+        return await self.fetchall(NP_ID_QUERY, (np_name,))
+
+    async def get_word_id_from_word(self, word):
+        """
+        Get the word ID for a given word (see DBHandler.get_word_id_from_word). The word ID cache is read
+        first, but isn't prefilled: that is a blocking read of the words table.
+
+        Args:
+            word (str): The word to look up.
+
+        Returns:
+            int: The word ID if found, -1 otherwise.
+        """
+        word_id = self.word_cache.get(word)
+        if word_id is not None:
+            return word_id
+        row = await self.fetchone(WORD_ID_QUERY, (word,))
+        if row is None:
+            return -1
+        self.word_cache.put(word, row[0])
+        return row[0]
+
+    async def get_all_article_titles(self):
+        """
+        Get all article titles from the database.
+
+        Returns:
+            List[Tuple[str]]: A list of tuples, each containing an article title.
+        """
+        return await self.fetchall(ALL_TITLES_QUERY)
+
+    async def get_total_articles(self):
+        """
+        Get the total number of articles in the database.
+
+        Returns:
+            int: The total number of articles.
+        """
+        return (await self.fetchone(TOTAL_ARTICLES_QUERY))[0]
+
+    async def get_all_articles(self):
+        """
+        Get all articles from the database (see DBHandler.get_all_articles).
+
+        Returns:
+            List[Tuple[Any, ...]]: A list of tuples containing articles.
+        """
+        return await self.fetchall(ALL_ARTICLES_QUERY)
@@ -0,0 +1,349 @@
+"""
+This module is a command line tool for loading many article files into the database at once.
+
+The articles are tokenized in a pool of worker processes and written to the database by a
+small number of writer threads, each with its own connection. Articles that are already in
+the database are skipped, so an interrupted run can simply be started again. Very large files
+are streamed by the writers in bounded chunks instead of being tokenized in memory.
+
+Usage:
+    python batch_ingest.py DIRECTORY_OR_GLOB [DIRECTORY_OR_GLOB ...] [--workers N] [--writers N] [--commit-every N]
+                           [--stream-larger-than MB]
+"""
+
+import argparse
+import glob
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date as date_type
+
+from article import parse_article_text, stream_article
+from connection_pool import POOL_MAX_CONNECTIONS
+from db_handler import DBHandler
+from text_loader import TextLoader
+from tokenizer import extract_words
+from word_cache import get_word_cache
+
+# The number of writer threads when the duplicate checks let several connections insert words at once.
+PARALLEL_WRITERS = 2
+
+
+def collect_article_files(patterns):
+    """
+    Expand directories and glob patterns into a sorted list of article files.
+
+    Args:
+        patterns (List[str]): Directories (searched recursively for .txt files) or glob patterns.
+
+    Returns:
+        List[str]: The paths of the article files, without duplicates.
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(glob.glob(os.path.join(pattern, '**', '*.txt'), recursive=True))
+        else:
+            paths.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def read_article_key(path):
+    """
+    Read only the header of an article file and return the key used to detect loaded articles.
+
+    Args:
+        path (str): The path of the article file.
+
+    Returns:
+        Tuple[str, str]: The title of the article and its date. The date is normalized to
+        YYYY-MM-DD when it is written in that format.
+    """
+    with open(path, 'rb') as file:
+        header = [file.readline().decode('utf-8') for _ in range(4)]
+    title = header[0].strip()
+    date = header[3].strip()
+    try:
+        date = date_type.fromisoformat(date).isoformat()
+    except ValueError:
+        pass
+    return title, date
+
+
+def parse_article_file(path):
+    """
+    Read and tokenize an article file. This function runs in the worker processes.
+
+    Args:
+        path (str): The path of the article file.
+
+    Returns:
+        Tuple[str, str, str, str, str, Dict[str, List[Tuple[int, int, int, str, str]]], int]: The path,
+        title, authors, newspaper, date, the words dictionary and the number of words in the article.
+    """
+    with open(path, 'rb') as file:
+        title, authors, newspaper, date, content = parse_article_text(file.read().decode('utf-8'))
+    words = extract_words(content)
+    word_count = sum(len(positions) for positions in words.values())
+    return path, title, authors, newspaper, date, words, word_count
+
+
+def ingest_streamed_file(tl, path):
+    """
+    Load a large article file by streaming its text in chunks (see TextLoader.ingest_article_stream).
+
+    Args:
+        tl (TextLoader): The loader of the writer thread.
+        path (str): The path of the article file.
+
+    Returns:
+        int: The number of words in the article.
+    """
+    word_count = 0
+
+    def counted(word_positions):
+        nonlocal word_count
+        for word_position in word_positions:
+            word_count += 1
+            yield word_position
+
+    with open(path, encoding='utf-8', newline='\n') as file:
+        title, authors, newspaper, date, word_positions = stream_article(file)
+        tl.ingest_article_stream(title, authors, newspaper, date, counted(word_positions))
+    return word_count
+
+
+class IngestProgress:
+    """
+    Thread-safe counters for a batch ingest run.
+
+    Attributes:
+        articles (int): The number of articles loaded so far.
+        words (int): The number of words (occurrences) loaded so far.
+        skipped (int): The number of articles skipped because they were already loaded.
+        failed (List[Tuple[str, str]]): The paths of the articles that failed, with the error message.
+    """
+
+    def __init__(self):
+        """Initialize the counters and start the clock."""
+        self.lock = threading.Lock()
+        self.start_time = time.perf_counter()
+        self.articles = 0
+        self.words = 0
+        self.skipped = 0
+        self.failed = []
+
+    def article_loaded(self, word_count):
+        """
+        Record a loaded article.
+
+        Args:
+            word_count (int): The number of words in the article.
+        """
+        with self.lock:
+            self.articles += 1
+            self.words += word_count
+
+    def article_failed(self, path, error):
+        """
+        Record an article that could not be loaded.
+
+        Args:
+            path (str): The path of the article file.
+            error (Exception): The error raised while loading it.
+        """
+        with self.lock:
+            self.failed.append((path, str(error).strip()))
+
+    def report(self):
+        """
+        Build a one-line summary of the run so far.
+
+        Returns:
+            str: The counters and the articles/sec and words/sec rates.
+        """
+        with self.lock:
+            elapsed = max(time.perf_counter() - self.start_time, 1e-9)
+            return (f"{self.articles} articles ({self.articles / elapsed:.1f}/sec), "
+                    f"{self.words} words ({self.words / elapsed:.0f}/sec), "
+                    f"{self.skipped} skipped, {len(self.failed)} failed, {elapsed:.1f}s elapsed")
+
+
+def writer_loop(work_queue, progress, commit_every):
+    """
+    Load the parsed articles from the queue into the database until a None sentinel arrives.
+
+    Args:
+        work_queue (queue.Queue): The queue of parsed articles (see parse_article_file), or of
+            paths of files to stream (see ingest_streamed_file).
+        progress (IngestProgress): The counters of the run.
+        commit_every (int): The number of articles loaded in each transaction.
+    """
+    try:
+        tl = TextLoader(commit_every=commit_every)
+        start_error = None
+    except Exception as e:
+        # A writer that can't start (e.g. no connection for the word ID cache) still takes the articles
+        # off the queue and fails them, so the producer never waits on a queue nobody reads.
+        tl = None
+        start_error = e
+    try:
+        while True:
+            parsed = work_queue.get()
+            if parsed is None:
+                break
+            path = parsed if isinstance(parsed, str) else parsed[0]
+            if tl is None:
+                progress.article_failed(path, start_error)
+                continue
+            try:
+                # A failed article is rolled back by the loader without losing the rest of the transaction.
+                if isinstance(parsed, str):
+                    word_count = ingest_streamed_file(tl, path)
+                else:
+                    _, title, authors, newspaper, date, words, word_count = parsed
+                    tl.ingest_article(title, authors, newspaper, date, words)
+                progress.article_loaded(word_count)
+            except Exception as e:
+                # Any error fails only this article, so the writer keeps taking articles off the queue
+                # and the producer never waits on a queue nobody reads.
+                progress.article_failed(path, e)
+    finally:
+        # The articles loaded since the last commit are committed even if the writer stops on an error.
+        if tl is not None:
+            tl.commit()
+
+
+def ingest_files(paths, workers=None, writers=None, commit_every=1, report_every=5.0, stream_larger_than=None):
+    """
+    Load article files into the database, skipping the articles that are already loaded.
+
+    Args:
+        paths (List[str]): The paths of the article files.
+        workers (Optional[int]): The number of tokenizer processes. Defaults to the number of CPUs.
+        writers (Optional[int]): The number of writer threads (database connections). Defaults to
+            PARALLEL_WRITERS with the "constraints" duplicate checks, and to 1 otherwise.
+        commit_every (int): The number of articles each writer loads in one transaction.
+        report_every (float): The number of seconds between progress reports.
+        stream_larger_than (Optional[int]): Files larger than this many bytes are streamed by the
+            writers instead of being tokenized in memory by the worker processes.
+
+    Returns:
+        IngestProgress: The counters of the run.
+
+    Raises:
+        ValueError: If several writers are asked for without the unique words index they need.
+    """
+    db_handler = DBHandler()
+    # Only the unique index of the "constraints" duplicate checks stops two writers from inserting
+    # the same new word (see TextLoader.insert_words).
+    parallel_safe = db_handler.duplicate_checks == "constraints"
+    if writers is None:
+        writers = PARALLEL_WRITERS if parallel_safe else 1
+    elif writers > 1 and not parallel_safe:
+        raise ValueError('Several writers need the "constraints" duplicate checks (see db_handler.DUPLICATE_CHECKS).')
+    workers = workers or os.cpu_count() or 1
+    progress = IngestProgress()
+    loaded = db_handler.get_loaded_article_keys()
+    pending = []
+    streamed = []
+    for path in paths:
+        try:
+            key = read_article_key(path)
+        except (OSError, ValueError) as e:
+            # An unreadable file, or a header that isn't UTF-8, fails only this article.
+            progress.article_failed(path, e)
+            continue
+        if key in loaded:
+            progress.skipped += 1
+        else:
+            loaded.add(key)
+            if stream_larger_than is not None and os.path.getsize(path) > stream_larger_than:
+                streamed.append(path)
+            else:
+                pending.append(path)
+
+    # The queue is bounded so that the tokenizers can't run far ahead of the writers.
+    work_queue = queue.Queue(maxsize=writers * 4)
+    writer_threads = [threading.Thread(target=writer_loop, args=(work_queue, progress, commit_every),
+                                      daemon=True)
+                      for _ in range(writers)]
+    for thread in writer_threads:
+        thread.start()
+
+    last_report = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            remaining = iter(pending)
+            for path in remaining:
+                in_flight.append((path, pool.submit(parse_article_file, path)))
+                if len(in_flight) >= workers * 4:
+                    break
+            while in_flight:
+                path, future = in_flight.popleft()
+                try:
+                    work_queue.put(future.result())
+                except Exception as e:
+                    # A file that can't be read or tokenized fails only this article.
+                    progress.article_failed(path, e)
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    in_flight.append((next_path, pool.submit(parse_article_file, next_path)))
+                if time.perf_counter() - last_report >= report_every:
+                    print(progress.report(), flush=True)
+                    last_report = time.perf_counter()
+
+        for path in streamed:
+            work_queue.put(path)
+    finally:
+        # The writers commit their open transactions and stop, whatever stopped the producer.
+        for _ in writer_threads:
+            work_queue.put(None)
+        for thread in writer_threads:
+            thread.join()
+    return progress
+
+
+def main():
+    """Parse the command line arguments and run the batch ingest."""
+    parser = argparse.ArgumentParser(description="Load a directory of article .txt files into the database.")
+    parser.add_argument('paths', nargs='+', help="Directories (searched recursively) or glob patterns of articles.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of tokenizer processes (default: number of CPUs).")
+    parser.add_argument('--writers', type=int, default=None,
+                        help=f"Number of database writer connections (default: {PARALLEL_WRITERS} with the "
+                             f"\"constraints\" duplicate checks, 1 otherwise).")
+    parser.add_argument('--commit-every', type=int, default=10,
+                        help="Number of articles loaded in each transaction. An interrupted run reloads "
+                             "at most this many articles per writer.")
+    parser.add_argument('--report-every', type=float, default=5.0, help="Seconds between progress reports.")
+    parser.add_argument('--stream-larger-than', type=float, default=64.0, metavar='MB',
+                        help="Stream files larger than this many megabytes in bounded chunks instead of "
+                             "tokenizing them in memory.")
+    args = parser.parse_args()
+    # Every writer keeps a connection of the pool while its transaction is open.
+    if args.writers is not None and args.writers >= POOL_MAX_CONNECTIONS:
+        parser.error(f"--writers must be less than the size of the connection pool ({POOL_MAX_CONNECTIONS}).")
+    if args.writers is not None and args.writers > 1 and DBHandler().duplicate_checks != "constraints":
+        parser.error('--writers above 1 needs DUPLICATE_CHECKS = "constraints" in db_handler.py, '
+                     'or the writers may insert the same word twice.')
+
+    paths = collect_article_files(args.paths)
+    print(f"Found {len(paths)} article files.", flush=True)
+    progress = ingest_files(paths, workers=args.workers, writers=args.writers,
+                            commit_every=args.commit_every, report_every=args.report_every,
+                            stream_larger_than=int(args.stream_larger_than * 1024 * 1024))
+    print(progress.report())
+    cache_stats = get_word_cache(DBHandler().database).stats()
+    print(f"Word ID cache: {cache_stats['size']} words, {cache_stats['hits']} hits, "
+          f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.1%} hit rate)")
+    for path, error in progress.failed:
+        print(f"Failed to load {path}: {error}")
+
+
+if __name__ == "__main__":
+    main()
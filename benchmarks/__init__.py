@@ -0,0 +1,6 @@
+"""
+Benchmarks for the article processing system.
+
+Run them from the root of the repository, e.g.:
+    python -m benchmarks.tokenizer_bench
+"""
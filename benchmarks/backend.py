@@ -0,0 +1,38 @@
+"""
+The --backend and --sqlite-path options of the benchmarks, which choose the database they run against.
+
+With --backend sqlite, a benchmark runs in-process on an SQLite file (see sqlite_backend), created on
+first use, so it needs no PostgreSQL server.
+"""
+
+import db_handler
+import sqlite_backend
+from schema_migrations import migrate_schema
+
+
+def add_backend_arguments(parser):
+    """
+    Add the backend options to the command line of a benchmark.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser of the benchmark.
+    """
+    parser.add_argument('--backend', choices=["postgresql", "sqlite"], default=db_handler.STORAGE_BACKEND,
+                        help="The database to run against (default: STORAGE_BACKEND of db_handler).")
+    parser.add_argument('--sqlite-path', default=sqlite_backend.SQLITE_PATH,
+                        help="The database file of the sqlite backend.")
+
+
+def select_backend(args):
+    """
+    Make the DBHandlers created from now on use the chosen backend, and bring its schema up to date.
+
+    Args:
+        args (argparse.Namespace): The parsed command line, with the backend options.
+
+    Returns:
+        List[str]: The schema changes made (see migrate_schema).
+    """
+    db_handler.STORAGE_BACKEND = args.backend
+    sqlite_backend.SQLITE_PATH = args.sqlite_path
+    return migrate_schema(db_handler.DBHandler())
@@ -0,0 +1,149 @@
+"""
+Stress test of parallel ingestion: several loaders, each with its own connection, load articles that
+share most of their vocabulary at the same time.
+
+The articles are loaded into the database configured in db_handler, under titles unique to the run.
+The word index stored for them is then read back from the words_positions view and compared with the
+index a serial load produces, which is exactly what the tokenizer extracts from each article. The run
+also checks that no word was inserted twice.
+
+Run it with DUPLICATE_CHECKS = "constraints" in db_handler.py (and the schema created in that mode):
+with the duplicate-check triggers, concurrent loaders can insert the same word twice.
+
+Usage:
+    python -m benchmarks.concurrent_ingest_stress [--loaders N] [--articles N] [--words N] [--commit-every N]
+                                                  [--backend {postgresql,sqlite}] [--sqlite-path FILE]
+"""
+
+import argparse
+import queue
+import threading
+import time
+
+from benchmarks.backend import add_backend_arguments, select_backend
+from benchmarks.corpus import CorpusGenerator
+from db_handler import DBHandler
+from text_loader import TextLoader
+from tokenizer import extract_words
+
+
+def loader_loop(work_queue, commit_every, errors):
+    """
+    Load articles from the queue until it is empty.
+
+    Args:
+        work_queue (queue.Queue): The (title, words dictionary) pairs of the articles.
+        commit_every (int): The number of articles loaded in each transaction.
+        errors (List[Tuple[str, Exception]]): The titles of the articles that failed, with their errors.
+    """
+    tl = TextLoader(commit_every=commit_every)
+    while True:
+        try:
+            title, words = work_queue.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            tl.ingest_article(title, "Stress Reporter", "Stress Gazette", "2024-01-01", words)
+        except Exception as e:
+            errors.append((title, e))
+    tl.commit()
+
+
+def stored_index(db_handler, title_prefix):
+    """
+    Read back the word index of the articles of a run.
+
+    Args:
+        db_handler (DBHandler): The database handler.
+        title_prefix (str): The common prefix of the titles of the run's articles.
+
+    Returns:
+        Dict[str, Dict[str, List[Tuple[int, int, int, str, str]]]]: The words dictionary of each article, by title.
+    """
+    db_handler.cursor.execute(" SELECT a.article_title, wp.word, wp.paragraph_number, wp.line_number, "
+                              " wp.position_in_line, wp.starting_chars, wp.finishing_chars "
+                              " FROM text_handle.words_positions wp JOIN art_info.articles a "
+                              " ON wp.article_id = a.article_id "
+                              " WHERE a.article_title LIKE %s ",
+                              (title_prefix + '%',))
+    index = {}
+    for title, word, paragraph, line, position, starting_chars, finishing_chars in db_handler.cursor.fetchall():
+        index.setdefault(title, {}).setdefault(word, []).append(
+            (paragraph, line, position, starting_chars, finishing_chars))
+    for words in index.values():
+        for positions in words.values():
+            positions.sort()
+    return index
+
+
+def duplicated_words(db_handler, words):
+    """
+    Find the words that appear more than once in the words table.
+
+    Args:
+        db_handler (DBHandler): The database handler.
+        words (List[str]): The words to check.
+
+    Returns:
+        List[str]: The duplicated words.
+    """
+    db_handler.cursor.execute(" SELECT word FROM text_handle.words "
+                              " WHERE word = ANY(%s) "
+                              " GROUP BY word HAVING COUNT(*) > 1 ",
+                              (words,))
+    return [row[0] for row in db_handler.cursor.fetchall()]
+
+
+def main():
+    """Run the stress test, print the results, and exit with an error if the index is wrong."""
+    parser = argparse.ArgumentParser(description="Load articles with many concurrent loaders and check the index.")
+    parser.add_argument('--loaders', type=int, default=8, help="Number of concurrent loaders (connections).")
+    parser.add_argument('--articles', type=int, default=200, help="Number of articles to load.")
+    parser.add_argument('--words', type=int, default=2000, help="Number of tokens in each article.")
+    parser.add_argument('--vocabulary', type=int, default=5000, help="Number of distinct words in the vocabulary.")
+    parser.add_argument('--commit-every', type=int, default=1, help="Number of articles loaded in each transaction.")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+    select_backend(args)
+
+    title_prefix = f"Stress test {time.time_ns()} #"
+    expected = {}
+    work_queue = queue.Queue()
+    # All the articles draw from one vocabulary, so concurrent loaders insert many of the same words.
+    generator = CorpusGenerator(vocabulary_size=args.vocabulary)
+    for i in range(args.articles):
+        title = f"{title_prefix}{i}"
+        expected[title] = extract_words(generator.content(args.words))
+        work_queue.put((title, expected[title]))
+
+    errors = []
+    start = time.perf_counter()
+    threads = [threading.Thread(target=loader_loop, args=(work_queue, args.commit_every, errors))
+               for _ in range(args.loaders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {args.articles} articles with {args.loaders} loaders in {elapsed:.1f}s "
+          f"({args.articles / elapsed:.1f} articles/sec).")
+
+    db_handler = DBHandler()
+    all_words = sorted({word for words in expected.values() for word in words})
+    duplicates = duplicated_words(db_handler, all_words)
+    stored = stored_index(db_handler, title_prefix)
+    for words in expected.values():
+        for positions in words.values():
+            positions.sort()
+    mismatched = [title for title in expected if stored.get(title) != expected[title]]
+
+    for title, error in errors:
+        print(f"Failed to load {title}: {str(error).strip()}")
+    print(f"{len(duplicates)} duplicated words, {len(mismatched)} articles that differ from a serial load.")
+    if errors or duplicates or mismatched:
+        raise SystemExit(1)
+    print("The index matches a serial load.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Generator of synthetic news corpora in the article file format of the app: four header lines
+(title, reporter, newspaper, date) followed by the content, with paragraphs separated by blank lines.
+
+Word frequencies follow a Zipf distribution over a single vocabulary shared by all the articles,
+so the words table grows the way it does with a real corpus: quickly at first, then slowly.
+
+Usage:
+    python -m benchmarks.corpus OUTPUT_DIRECTORY [--articles N] [--words N] [--vocabulary N] [--seed N]
+"""
+
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+from benchmarks.tokenizer_bench import PREFIXES, SUFFIXES, STANDALONE, synthetic_vocabulary
+
+FIRST_NAMES = ["Dana", "Yossi", "Maya", "Noam", "Tamar", "Avi", "Shira", "Eitan", "Lior", "Michal",
+               "John", "Sarah", "David", "Emma", "Daniel", "Olivia", "James", "Rachel", "Adam", "Nora"]
+LAST_NAMES = ["Cohen", "Levi", "Mizrahi", "Peretz", "Biton", "Friedman", "Smith", "Brown", "Miller",
+              "Wilson", "Taylor", "Clark", "Lewis", "Walker", "Hall", "Young", "King", "Wright"]
+NEWSPAPERS = ["The Daily Ledger", "Morning Herald", "Evening Post", "The Chronicle", "City Times",
+              "National Review", "The Observer", "Weekly Gazette", "Metro News", "The Courier"]
+
+
+class CorpusGenerator:
+    """
+    Generates synthetic articles with a shared Zipfian vocabulary.
+
+    Attributes:
+        mean_words (int): The mean number of tokens in an article.
+        rng (random.Random): The random generator.
+        vocabulary (List[str]): The words, from the most frequent to the least frequent.
+        reporters (List[str]): The full names of the reporters the articles are attributed to.
+    """
+
+    def __init__(self, mean_words=600, vocabulary_size=50000, reporters=200, seed=0):
+        """
+        Initialize the generator.
+
+        Args:
+            mean_words (int): The mean number of tokens in an article.
+            vocabulary_size (int): The number of distinct words in the vocabulary.
+            reporters (int): The number of distinct reporters.
+            seed (int): The seed of the random generator.
+        """
+        self.mean_words = mean_words
+        self.rng = random.Random(seed)
+        self.vocabulary = synthetic_vocabulary(vocabulary_size, self.rng)
+        self.cumulative_weights = []
+        total = 0.0
+        for rank in range(1, len(self.vocabulary) + 1):
+            total += 1 / rank
+            self.cumulative_weights.append(total)
+        self.reporters = [f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}" for _ in range(reporters)]
+
+    def content(self, word_count):
+        """
+        Generate the content of an article.
+
+        Args:
+            word_count (int): The number of tokens in the article.
+
+        Returns:
+            str: The content, with lines of 6-14 tokens and paragraphs of 1-6 lines.
+        """
+        rng = self.rng
+        chosen_words = rng.choices(self.vocabulary, cum_weights=self.cumulative_weights, k=word_count)
+        paragraphs = []
+        lines = []
+        tokens = []
+        line_length = rng.randint(6, 14)
+        paragraph_length = rng.randint(1, 6)
+        for word in chosen_words:
+            if rng.random() < 0.02:
+                tokens.append(rng.choice(STANDALONE))
+            else:
+                tokens.append(rng.choice(PREFIXES) + word + rng.choice(SUFFIXES))
+            if len(tokens) >= line_length:
+                lines.append(' '.join(tokens))
+                tokens = []
+                line_length = rng.randint(6, 14)
+                if len(lines) >= paragraph_length:
+                    paragraphs.append('\n'.join(lines))
+                    lines = []
+                    paragraph_length = rng.randint(1, 6)
+        if tokens:
+            lines.append(' '.join(tokens))
+        if lines:
+            paragraphs.append('\n'.join(lines))
+        return '\n\n'.join(paragraphs)
+
+    def article(self, title):
+        """
+        Generate an article file.
+
+        Args:
+            title (str): The title of the article. Titles should be unique, since the app rejects an
+                article whose title and date are already loaded.
+
+        Returns:
+            str: The text of the article file.
+        """
+        rng = self.rng
+        # Article lengths vary like real news: mostly short, with a long tail.
+        word_count = max(20, int(rng.lognormvariate(0, 0.5) * self.mean_words / 1.13))
+        published = date(2020, 1, 1) + timedelta(days=rng.randrange(5 * 365))
+        header = [title, rng.choice(self.reporters), rng.choice(NEWSPAPERS), published.isoformat()]
+        return '\n'.join(header) + '\n\n' + self.content(word_count)
+
+    def articles(self, count, title_prefix="Article"):
+        """
+        Generate article files.
+
+        Args:
+            count (int): The number of articles.
+            title_prefix (str): The prefix of the titles, which are numbered from 1.
+
+        Returns:
+            Iterator[str]: The texts of the article files.
+        """
+        for i in range(1, count + 1):
+            yield self.article(f"{title_prefix} {i}")
+
+
+def write_corpus(directory, count, title_prefix="Article", **generator_options):
+    """
+    Write a synthetic corpus as article .txt files, which batch_ingest.py can load.
+
+    Args:
+        directory (str): The output directory. It is created if needed.
+        count (int): The number of articles.
+        title_prefix (str): The prefix of the titles.
+        **generator_options: The options of CorpusGenerator.
+
+    Returns:
+        List[str]: The paths of the written files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i, text in enumerate(CorpusGenerator(**generator_options).articles(count, title_prefix), start=1):
+        path = os.path.join(directory, f"article_{i:06d}.txt")
+        with open(path, 'w', encoding='utf-8', newline='\n') as file:
+            file.write(text)
+        paths.append(path)
+    return paths
+
+
+def main():
+    """Parse the command line arguments and write the corpus."""
+    parser = argparse.ArgumentParser(description="Write a synthetic corpus of article .txt files.")
+    parser.add_argument('directory', help="Output directory.")
+    parser.add_argument('--articles', type=int, default=1000, help="Number of articles.")
+    parser.add_argument('--words', type=int, default=600, help="Mean number of tokens in an article.")
+    parser.add_argument('--vocabulary', type=int, default=50000, help="Number of distinct words in the vocabulary.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the random generator.")
+    args = parser.parse_args()
+
+    paths = write_corpus(args.directory, args.articles, mean_words=args.words,
+                         vocabulary_size=args.vocabulary, seed=args.seed)
+    print(f"Wrote {len(paths)} articles to {args.directory}.")
+
+
+if __name__ == "__main__":
+    main()
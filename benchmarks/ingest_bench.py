@@ -0,0 +1,221 @@
+"""
+Ingestion throughput benchmark: loads a synthetic corpus (see benchmarks.corpus) into the database
+configured in db_handler, in growing stages, to show how tokenizing and loading an article degrade
+as the words table grows.
+
+Each stage loads articles until the given number of articles has been loaded by the run, then records:
+    - tokenize, load_text and whole-article ingest latency percentiles, in milliseconds,
+    - articles/sec and rows/sec (word occurrences) of the stage,
+    - the size of every table of the schema, with its TOAST table and indexes (on PostgreSQL),
+      or its number of rows (on SQLite).
+
+The results are written as JSON, together with the commit and the storage settings, so runs on
+different commits can be compared.
+
+Usage:
+    python -m benchmarks.ingest_bench [--sizes 100 1000 10000] [--words N] [--commit-every N] [--output FILE]
+                                      [--backend {postgresql,sqlite}] [--sqlite-path FILE]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from article import parse_article_text
+from benchmarks.backend import add_backend_arguments, select_backend
+from benchmarks.corpus import CorpusGenerator
+from text_loader import TextLoader
+from tokenizer import extract_words
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentiles(samples):
+    """
+    Summarize latency samples.
+
+    Args:
+        samples (List[float]): The latencies, in seconds.
+
+    Returns:
+        Dict[str, float]: The PERCENTILES (nearest rank), the mean and the maximum, in milliseconds.
+    """
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    summary = {}
+    for p in PERCENTILES:
+        rank = -(-p * len(ordered) // 100)
+        summary[f"p{p}"] = ordered[max(rank, 1) - 1] * 1000
+    summary["mean"] = sum(ordered) / len(ordered) * 1000
+    summary["max"] = ordered[-1] * 1000
+    return summary
+
+
+class TimedTextLoader(TextLoader):
+    """
+    A TextLoader that records how long each load_text call takes.
+
+    Attributes:
+        load_text_times (List[float]): The duration of every load_text call, in seconds.
+    """
+
+    def __init__(self, **options):
+        """
+        Initialize the loader.
+
+        Args:
+            **options: The options of TextLoader.
+        """
+        super().__init__(**options)
+        self.load_text_times = []
+
+    def load_text(self, article_id, dict_text):
+        """Load the text of an article (see TextLoader.load_text), and record how long it took."""
+        start = time.perf_counter()
+        super().load_text(article_id, dict_text)
+        self.load_text_times.append(time.perf_counter() - start)
+
+
+def table_sizes(db_handler):
+    """
+    Get the sizes of the tables of the app.
+
+    Args:
+        db_handler (DBHandler): The database handler.
+
+    Returns:
+        Dict[str, Dict[str, int]]: For each table, its row estimate and the sizes in bytes of its heap,
+        its TOAST table and its indexes. On SQLite, only its number of rows.
+    """
+    if db_handler.backend == "sqlite":
+        db_handler.cursor.execute(" SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY 1 ")
+        tables = [row[0] for row in db_handler.cursor.fetchall()]
+        sizes = {}
+        for table in tables:
+            db_handler.cursor.execute(f" SELECT COUNT(*) FROM {table} ")
+            sizes[table] = {"rows": db_handler.cursor.fetchone()[0]}
+        return sizes
+    db_handler.cursor.execute(" SELECT n.nspname || '.' || c.relname, c.reltuples::bigint, "
+                              " pg_relation_size(c.oid), "
+                              " COALESCE(pg_total_relation_size(NULLIF(c.reltoastrelid, 0)), 0), "
+                              " pg_indexes_size(c.oid) "
+                              " FROM pg_class c JOIN pg_namespace n ON c.relnamespace = n.oid "
+                              " WHERE n.nspname IN ('art_info', 'text_handle') AND c.relkind = 'r' "
+                              " ORDER BY 1 ")
+    return {name: {"rows_estimate": rows, "heap_bytes": heap, "toast_bytes": toast, "index_bytes": indexes}
+            for name, rows, heap, toast, indexes in db_handler.cursor.fetchall()}
+
+
+def git_commit():
+    """
+    Get the commit the benchmark runs on.
+
+    Returns:
+        Optional[str]: The hash of HEAD, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stage(tl, articles, count):
+    """
+    Tokenize and load articles, timing every step.
+
+    Args:
+        tl (TimedTextLoader): The loader.
+        articles (Iterator[str]): The texts of the article files.
+        count (int): The number of articles to load.
+
+    Returns:
+        Dict[str, Any]: The results of the stage.
+    """
+    tokenize_times = []
+    ingest_times = []
+    rows = 0
+    tl.load_text_times = []
+    start = time.perf_counter()
+    for _ in range(count):
+        text = next(articles)
+        tokenize_start = time.perf_counter()
+        title, authors, newspaper, date, content = parse_article_text(text)
+        words = extract_words(content)
+        ingest_start = time.perf_counter()
+        tl.ingest_article(title, authors, newspaper, date, words)
+        ingest_end = time.perf_counter()
+        tokenize_times.append(ingest_start - tokenize_start)
+        ingest_times.append(ingest_end - ingest_start)
+        rows += sum(len(positions) for positions in words.values())
+    tl.commit()
+    elapsed = time.perf_counter() - start
+    return {
+        "articles": count,
+        "rows": rows,
+        "seconds": elapsed,
+        "articles_per_sec": count / elapsed,
+        "rows_per_sec": rows / elapsed,
+        "tokenize_ms": percentiles(tokenize_times),
+        "load_text_ms": percentiles(tl.load_text_times),
+        "ingest_ms": percentiles(ingest_times),
+    }
+
+
+def main():
+    """Run the benchmark and write the results as JSON."""
+    parser = argparse.ArgumentParser(description="Measure article ingestion as the database grows.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="Total numbers of articles loaded by the end of each stage.")
+    parser.add_argument('--words', type=int, default=600, help="Mean number of tokens in an article.")
+    parser.add_argument('--vocabulary', type=int, default=50000, help="Number of distinct words in the vocabulary.")
+    parser.add_argument('--commit-every', type=int, default=1, help="Number of articles loaded in each transaction.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the corpus generator.")
+    parser.add_argument('--output', help="File to write the JSON results to (default: standard output).")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    select_backend(args)
+    tl = TimedTextLoader(commit_every=args.commit_every)
+    generator = CorpusGenerator(mean_words=args.words, vocabulary_size=args.vocabulary, seed=args.seed)
+    # The titles are unique to the run, so the benchmark can run again on the same database.
+    articles = generator.articles(max(args.sizes), title_prefix=f"Benchmark {time.time_ns()} article")
+    results = {
+        "benchmark": "ingest",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "backend": tl.db_handler.backend,
+        "storage_layout": tl.db_handler.storage_layout,
+        "duplicate_checks": tl.db_handler.duplicate_checks,
+        "commit_every": args.commit_every,
+        "mean_words": args.words,
+        "vocabulary": args.vocabulary,
+        "seed": args.seed,
+        "initial_tables": table_sizes(tl.db_handler),
+        "stages": [],
+    }
+    loaded = 0
+    for size in sorted(set(args.sizes)):
+        stage = run_stage(tl, articles, size - loaded)
+        loaded = size
+        stage["total_articles"] = loaded
+        stage["tables"] = table_sizes(tl.db_handler)
+        results["stages"].append(stage)
+        print(f"{loaded} articles: {stage['articles_per_sec']:.1f} articles/sec, "
+              f"{stage['rows_per_sec']:.0f} rows/sec, load_text p95 {stage['load_text_ms']['p95']:.1f} ms",
+              flush=True, file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
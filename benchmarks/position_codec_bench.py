@@ -0,0 +1,253 @@
+"""
+Size and decode-speed benchmark of the packed position encoding (see position_codec) against the
+position_type composites of the "arrays" layout, on the same synthetic corpus.
+
+Without a database, the positions of every word in every article of the corpus are encoded both ways:
+    - as position_type composites in PostgreSQL's text format, which is what psycopg2 receives, and
+      parsed the way psycopg2.extras.register_composite parses them (its tokenizing regular expression,
+      then a cast of every field);
+    - packed, and decoded with position_codec.
+
+With --database, the articles already loaded in the database configured in db_handler are packed into
+the packed_positions table (see DBHandler.pack_positions), and the stored sizes of the occurrences
+arrays, the postings table and the packed_positions table are compared, with the time it takes to read
+the positions of the most frequent words from the postings and from the packed values.
+
+Usage:
+    python -m benchmarks.position_codec_bench [--articles N] [--words N] [--repeat N] [--database]
+"""
+
+import argparse
+import gc
+import re
+import time
+
+from benchmarks.corpus import CorpusGenerator
+from db_handler import DBHandler
+from position_codec import decode_position_arrays, decode_positions, encode_positions
+from tokenizer import extract_words
+
+# The tokenizer of psycopg2's CompositeCaster.
+COMPOSITE_TOKEN = re.compile(r"""
+  \(? ([,)])                        # an empty token, representing NULL
+| \(? " ((?: [^"] | "")*) " [,)]    # or a quoted string
+| \(? ([^",)]+) [,)]                # or an unquoted string
+    """, re.VERBOSE)
+COMPOSITE_UNDOUBLE = re.compile(r'(["\\])\1')
+
+# The number of most frequent words whose positions are read in the --database benchmark.
+FREQUENT_WORDS = 100
+
+
+def composite_field(value):
+    """
+    Format a field of a composite value in PostgreSQL's text format.
+
+    Args:
+        value (Union[int, str]): The field.
+
+    Returns:
+        str: The field, quoted if needed.
+    """
+    text = str(value)
+    if text and not any(char in text for char in ',()"\\ '):
+        return text
+    return '"' + text.replace('\\', '\\\\').replace('"', '""') + '"'
+
+
+def composite_text(position):
+    """
+    Format a position as a position_type composite in PostgreSQL's text format.
+
+    Args:
+        position (Tuple[int, int, int, str, str]): The position.
+
+    Returns:
+        str: The composite, e.g. (1,2,3,"",",").
+    """
+    return '(' + ','.join(composite_field(value) for value in position) + ')'
+
+
+def parse_composite(text):
+    """
+    Parse a position_type composite the way psycopg2.extras.register_composite does.
+
+    Args:
+        text (str): The composite in PostgreSQL's text format.
+
+    Returns:
+        Tuple[int, int, int, str, str]: The position.
+    """
+    tokens = []
+    for match in COMPOSITE_TOKEN.finditer(text):
+        if match.group(1) is not None:
+            tokens.append(None)
+        elif match.group(2) is not None:
+            tokens.append(COMPOSITE_UNDOUBLE.sub(r"\1", match.group(2)))
+        else:
+            tokens.append(match.group(3))
+    return int(tokens[0]), int(tokens[1]), int(tokens[2]), tokens[3], tokens[4]
+
+
+def parse_all_composites(composites):
+    """
+    Parse the composites of every word in every article.
+
+    Args:
+        composites (List[List[str]]): The composites of each (word, article).
+
+    Returns:
+        int: The number of positions parsed.
+    """
+    return sum(len([parse_composite(text) for text in texts]) for texts in composites)
+
+
+def decode_all(packed):
+    """
+    Decode the packed positions of every word in every article into tuples.
+
+    Args:
+        packed (List[bytes]): The packed positions of each (word, article).
+
+    Returns:
+        int: The number of positions decoded.
+    """
+    return sum(len(decode_positions(data)) for data in packed)
+
+
+def decode_all_arrays(packed):
+    """
+    Decode the packed positions of every word in every article into arrays.
+
+    Args:
+        packed (List[bytes]): The packed positions of each (word, article).
+
+    Returns:
+        int: The number of positions decoded.
+    """
+    return sum(len(decode_position_arrays(data)[0]) for data in packed)
+
+
+def best_time(function, argument, repeat):
+    """
+    Time a function, with the garbage collector disabled while it runs.
+
+    Args:
+        function (Callable[[Any], Any]): The function to time.
+        argument (Any): The argument passed to the function.
+        repeat (int): The number of runs.
+
+    Returns:
+        float: The fastest run, in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function(argument)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def run_offline(articles, words, repeat):
+    """
+    Compare the sizes and decoding times of the two encodings on a synthetic corpus, and print them.
+
+    Args:
+        articles (int): The number of articles.
+        words (int): The mean number of tokens in an article.
+        repeat (int): The number of runs of each decoder.
+    """
+    generator = CorpusGenerator(mean_words=words)
+    composites = []
+    packed = []
+    for _ in range(articles):
+        for positions in extract_words(generator.content(words)).values():
+            positions = sorted(positions)
+            composites.append([composite_text(position) for position in positions])
+            packed.append(encode_positions(positions))
+            if decode_positions(packed[-1]) != positions:
+                raise SystemExit("The packed positions don't decode to the original ones.")
+    count = sum(len(texts) for texts in composites)
+    composite_bytes = sum(len(text) for texts in composites for text in texts)
+    packed_bytes = sum(len(data) for data in packed)
+    print(f"Corpus: {articles} articles, {len(packed)} (word, article) pairs, {count} positions.")
+    print(f"  composites (text format): {composite_bytes:12,} bytes ({composite_bytes / count:5.1f} per position)")
+    print(f"  packed:                   {packed_bytes:12,} bytes ({packed_bytes / count:5.1f} per position)")
+    for name, function, argument in (("composites (psycopg2 parsing)", parse_all_composites, composites),
+                                     ("packed, into tuples", decode_all, packed),
+                                     ("packed, into arrays", decode_all_arrays, packed)):
+        seconds = best_time(function, argument, repeat)
+        print(f"  decode {name + ':':30} {seconds * 1000:8.1f} ms ({count / seconds:12,.0f} positions/sec)")
+
+
+def run_database(repeat):
+    """
+    Pack the loaded articles, and compare the stored sizes and reading times of the layouts, and print them.
+
+    Args:
+        repeat (int): The number of runs of each read.
+    """
+    db_handler = DBHandler()
+    start = time.perf_counter()
+    packed_articles = db_handler.pack_positions()
+    print(f"Packed {packed_articles} articles in {time.perf_counter() - start:.1f}s.")
+    db_handler.cursor.execute(" SELECT (SELECT COUNT(*) FROM text_handle.postings), "
+                              " (SELECT COALESCE(SUM(pg_column_size(occurrences)), 0) FROM text_handle.words), "
+                              " pg_total_relation_size('text_handle.postings'), "
+                              " (SELECT COALESCE(SUM(pg_column_size(positions)), 0) "
+                              "  FROM text_handle.packed_positions), "
+                              " pg_total_relation_size('text_handle.packed_positions') ")
+    count, array_bytes, postings_bytes, packed_bytes, packed_total_bytes = db_handler.cursor.fetchone()
+    if not count:
+        raise SystemExit("The database has no positions. Load a corpus first (see benchmarks.ingest_bench).")
+    print(f"Database: {count} positions.")
+    print(f"  occurrences arrays:              {array_bytes:14,} bytes ({array_bytes / count:5.1f} per position)")
+    print(f"  postings, with indexes:          {postings_bytes:14,} bytes ({postings_bytes / count:5.1f} per position)")
+    print(f"  packed values:                   {packed_bytes:14,} bytes ({packed_bytes / count:5.1f} per position)")
+    print(f"  packed_positions, with indexes:  {packed_total_bytes:14,} bytes "
+          f"({packed_total_bytes / count:5.1f} per position)")
+
+    db_handler.cursor.execute(" SELECT word_id FROM text_handle.postings "
+                              " GROUP BY word_id ORDER BY COUNT(*) DESC LIMIT %s ",
+                              (FREQUENT_WORDS,))
+    word_ids = [row[0] for row in db_handler.cursor.fetchall()]
+
+    def read_postings(word_ids):
+        for word_id in word_ids:
+            db_handler.cursor.execute(" SELECT article_id, paragraph_number, line_number, position_in_line, "
+                                      " starting_chars, finishing_chars "
+                                      " FROM text_handle.postings WHERE word_id = %s ",
+                                      (word_id,))
+            db_handler.cursor.fetchall()
+
+    def read_packed(word_ids):
+        for word_id in word_ids:
+            db_handler.get_packed_positions(word_id)
+
+    for name, function in (("postings rows", read_postings), ("packed values", read_packed)):
+        seconds = best_time(function, word_ids, repeat)
+        print(f"  read the {len(word_ids)} most frequent words from {name + ':':14} {seconds * 1000:8.1f} ms")
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description="Compare the packed position encoding with position_type composites.")
+    parser.add_argument('--articles', type=int, default=200, help="Number of articles in the synthetic corpus.")
+    parser.add_argument('--words', type=int, default=600, help="Mean number of tokens in an article.")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of runs of each decoder.")
+    parser.add_argument('--database', action='store_true',
+                        help="Also pack the articles loaded in the database and compare the stored layouts.")
+    args = parser.parse_args()
+
+    run_offline(args.articles, args.words, args.repeat)
+    if args.database:
+        run_database(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Article reconstruction benchmark: loads a synthetic corpus (see benchmarks.corpus) in growing stages, and
+after each stage times the rebuilding of the same sample of articles, to show whether the cost of
+TextBuilder.build_entire_text follows the size of the article or the size of the corpus.
+
+Every article of the sample is rebuilt:
+    - "stored":   by TextBuilder.build_entire_text, from the text stored at ingest in article_texts;
+    - "postings": by joining the words of the article read from the words_positions view;
+    - "arrays":   by unnesting the occurrences arrays of the whole words table and keeping the words of
+                  the article, as build_entire_text did before the postings table (only on PostgreSQL,
+                  in the "arrays" storage layout).
+The three texts of every article are checked to be the same.
+
+The results are written as JSON, with reconstruction latency percentiles in milliseconds for each stage.
+
+Usage:
+    python -m benchmarks.reconstruction_bench [--sizes 100 1000 10000] [--sample N] [--repeat N]
+                                              [--words N] [--output FILE]
+                                              [--backend {postgresql,sqlite}] [--sqlite-path FILE]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from article import parse_article_text
+from benchmarks.backend import add_backend_arguments, select_backend
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.ingest_bench import git_commit, percentiles
+from db_handler import ARRAY_POSITIONS_QUERY
+from text_builder import ARTICLE_TEXT_QUERY, TextBuilder, join_words
+from text_loader import TextLoader
+from tokenizer import extract_words
+
+# The words of an article read from the occurrences arrays of every word. Takes the article_id.
+ARRAY_TEXT_QUERY = (" SELECT word, paragraph_number, line_number, position_in_line, starting_chars, finishing_chars "
+                    " FROM (" + ARRAY_POSITIONS_QUERY + ") AS array_positions "
+                    " WHERE article_id = %s "
+                    " ORDER BY paragraph_number, line_number, position_in_line ")
+
+
+def load_articles(tl, articles, count):
+    """
+    Tokenize and load articles.
+
+    Args:
+        tl (TextLoader): The loader.
+        articles (Iterator[str]): The texts of the article files.
+        count (int): The number of articles to load.
+
+    Returns:
+        List[Tuple[str, int]]: The titles and IDs of the loaded articles.
+    """
+    loaded = []
+    for _ in range(count):
+        title, authors, newspaper, date, content = parse_article_text(next(articles))
+        loaded.append((title, tl.ingest_article(title, authors, newspaper, date, extract_words(content))))
+    tl.commit()
+    return loaded
+
+
+def rebuild_from_words(tb, query, article_id):
+    """
+    Rebuild the text of an article by joining its words.
+
+    Args:
+        tb (TextBuilder): The text builder, whose database handler runs the query.
+        query (str): The query reading the words of the article in reading order.
+        article_id (int): The ID of the article.
+
+    Returns:
+        str: The text.
+    """
+    tb.db_handler.cursor.execute(query, (article_id,))
+    return join_words(tb.db_handler.cursor.fetchall())
+
+
+def time_reconstruction(tb, sample, repeat, with_arrays):
+    """
+    Time the rebuilding of a sample of articles, in every way, and check that the texts agree.
+
+    Args:
+        tb (TextBuilder): The text builder.
+        sample (List[Tuple[str, int]]): The titles and IDs of the articles.
+        repeat (int): The number of times each article is rebuilt in each way.
+        with_arrays (bool): Whether to also rebuild the articles from the occurrences arrays.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The latency percentiles of each way.
+    """
+    ways = {
+        "stored": lambda title, article_id: tb.build_entire_text(title)[3],
+        "postings": lambda title, article_id: rebuild_from_words(tb, ARTICLE_TEXT_QUERY, article_id),
+    }
+    if with_arrays:
+        ways["arrays"] = lambda title, article_id: rebuild_from_words(tb, ARRAY_TEXT_QUERY, article_id)
+    times = {name: [] for name in ways}
+    for title, article_id in sample:
+        texts = set()
+        for name, rebuild in ways.items():
+            for _ in range(repeat):
+                start = time.perf_counter()
+                text = rebuild(title, article_id)
+                times[name].append(time.perf_counter() - start)
+            texts.add(text)
+        if len(texts) != 1:
+            raise SystemExit(f"The texts of article {article_id} rebuilt in different ways differ.")
+    return {name: percentiles(samples) for name, samples in times.items()}
+
+
+def main():
+    """Run the benchmark and write the results as JSON."""
+    parser = argparse.ArgumentParser(description="Measure article reconstruction as the corpus grows.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="Total numbers of articles loaded by the end of each stage.")
+    parser.add_argument('--sample', type=int, default=20, help="Number of articles rebuilt after each stage.")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of times each article is rebuilt.")
+    parser.add_argument('--words', type=int, default=600, help="Mean number of tokens in an article.")
+    parser.add_argument('--vocabulary', type=int, default=50000, help="Number of distinct words in the vocabulary.")
+    parser.add_argument('--commit-every', type=int, default=100, help="Number of articles loaded in each transaction.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the corpus generator.")
+    parser.add_argument('--output', help="File to write the JSON results to (default: standard output).")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    select_backend(args)
+    tl = TextLoader(commit_every=args.commit_every)
+    tb = TextBuilder()
+    with_arrays = tl.db_handler.backend == "postgresql" and tl.db_handler.storage_layout == "arrays"
+    generator = CorpusGenerator(mean_words=args.words, vocabulary_size=args.vocabulary, seed=args.seed)
+    # The titles are unique to the run, so the benchmark can run again on the same database.
+    articles = generator.articles(max(args.sizes), title_prefix=f"Benchmark {time.time_ns()} article")
+    results = {
+        "benchmark": "reconstruction",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "backend": tl.db_handler.backend,
+        "storage_layout": tl.db_handler.storage_layout,
+        "mean_words": args.words,
+        "vocabulary": args.vocabulary,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "stages": [],
+    }
+    # The same articles are rebuilt after every stage, so only the size of the corpus changes.
+    sample = []
+    loaded = 0
+    for size in sorted(set(args.sizes)):
+        new_articles = load_articles(tl, articles, size - loaded)
+        loaded = size
+        sample.extend(new_articles[:args.sample - len(sample)])
+        stage = {"total_articles": loaded, "sample": len(sample),
+                 "rebuild_ms": time_reconstruction(tb, sample, args.repeat, with_arrays)}
+        results["stages"].append(stage)
+        print(f"{loaded} articles: " + ", ".join(f"{name} p50 {summary['p50']:.2f} ms"
+                                                 for name, summary in stage["rebuild_ms"].items()),
+              flush=True, file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
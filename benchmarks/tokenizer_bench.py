@@ -0,0 +1,207 @@
+"""
+Micro-benchmark of the tokenizer module against the original character-by-character tokenizer.
+
+Both tokenizers run on the same large synthetic article, and their outputs are checked to be identical.
+
+Usage:
+    python -m benchmarks.tokenizer_bench [--words N] [--repeat N]
+"""
+
+import argparse
+import gc
+import random
+import re
+import time
+
+from article import split_word, is_only_none_alnum
+from tokenizer import extract_words, split_token
+
+# Real words with awkward characters, mixed into a large Zipf-distributed vocabulary of made-up words.
+SPECIAL_WORDS = ["élan", "naïve", "2024", "3.5", "U.S.", "co-operate", "e-mail", "snake_case", "O'Brien"]
+PREFIXES = ["", "", "", "", "", "", "", "", "(", '"', "'", "[", "--", "_"]
+SUFFIXES = ["", "", "", "", "", "", "", "", ",", ",", ".", ".", ";", ":", "!", "?", '"', ")", "...", "'s", "_"]
+STANDALONE = ["--", "-", "&", "...", "*", "§"]
+
+
+def legacy_extract_words(content):
+    """
+    The original tokenizer of Article.process_content, which walks every token character by character.
+
+    Args:
+        content (str): The content of the article (without the header lines).
+
+    Returns:
+        Dict[str, List[Tuple[int, int, int, str, str]]]: A dictionary mapping words to their positions.
+    """
+    words = {}
+    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', content) if p.strip()]
+    for p_index, paragraph in enumerate(paragraphs, start=1):
+        lines = paragraph.split('\n')
+        for l_index, line in enumerate(lines, start=1):
+            is_last_line_in_paragraph = (l_index == len(lines))
+            words_in_line = line.split()
+            word_position = 0
+            for w_index, word in enumerate(words_in_line, start=1):
+                if not is_only_none_alnum(word):
+                    word_tuple = split_word(word)
+                else:
+                    word_tuple = ('', word, '')
+                is_last_word_in_line = (w_index == len(words_in_line))
+                word_position += 1
+                if is_last_line_in_paragraph and is_last_word_in_line:
+                    tup = (p_index, l_index, word_position, word_tuple[0], word_tuple[2] + '\n\n')
+                elif is_last_word_in_line:
+                    tup = (p_index, l_index, word_position, word_tuple[0], word_tuple[2] + '\n')
+                else:
+                    tup = (p_index, l_index, word_position, word_tuple[0], word_tuple[2])
+                if word_tuple[1] not in words:
+                    words[word_tuple[1]] = []
+                words[word_tuple[1]].append(tup)
+    return words
+
+
+def synthetic_vocabulary(size, rng):
+    """
+    Generate a vocabulary of made-up words.
+
+    Args:
+        size (int): The number of words.
+        rng (random.Random): The random generator.
+
+    Returns:
+        List[str]: The words, with the special words among the most frequent ones.
+    """
+    letters = "etaoinshrdlcumwfgypbvkjxqz"
+    words = set()
+    while len(words) < size:
+        word = ''.join(rng.choice(letters) for _ in range(rng.randint(1, 10)))
+        words.add(word.capitalize() if rng.random() < 0.1 else word)
+    vocabulary = sorted(words)
+    rng.shuffle(vocabulary)
+    return SPECIAL_WORDS + vocabulary
+
+
+def synthetic_content(word_count, vocabulary_size=20000, seed=0):
+    """
+    Generate the content of a large synthetic article with a Zipfian word distribution.
+
+    Args:
+        word_count (int): The number of tokens in the article.
+        vocabulary_size (int): The number of distinct words.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        str: The content, with lines of 6-14 tokens and paragraphs of 1-6 lines.
+    """
+    rng = random.Random(seed)
+    vocabulary = synthetic_vocabulary(vocabulary_size, rng)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    chosen_words = rng.choices(vocabulary, weights=weights, k=word_count)
+    paragraphs = []
+    lines = []
+    tokens = []
+    for word in chosen_words:
+        if rng.random() < 0.02:
+            tokens.append(rng.choice(STANDALONE))
+        else:
+            tokens.append(rng.choice(PREFIXES) + word + rng.choice(SUFFIXES))
+        if len(tokens) >= rng.randint(6, 14):
+            lines.append(' '.join(tokens))
+            tokens = []
+            if len(lines) >= rng.randint(1, 6):
+                paragraphs.append('\n'.join(lines))
+                lines = []
+    lines.append(' '.join(tokens))
+    paragraphs.append('\n'.join(lines))
+    return '\n\n'.join(paragraphs).strip()
+
+
+def legacy_split_tokens(tokens):
+    """
+    Split tokens into their words and punctuation with the original character loops.
+
+    Args:
+        tokens (List[str]): Whitespace-delimited tokens.
+
+    Returns:
+        List[Tuple[str, str, str]]: The (starting_chars, word, finishing_chars) of each token.
+    """
+    return [split_word(token) if not is_only_none_alnum(token) else ('', token, '') for token in tokens]
+
+
+def split_tokens(tokens):
+    """
+    Split tokens into their words and punctuation with tokenizer.split_token.
+
+    Args:
+        tokens (List[str]): Whitespace-delimited tokens.
+
+    Returns:
+        List[Tuple[str, str, str]]: The (starting_chars, word, finishing_chars) of each token.
+    """
+    return [split_token(token) for token in tokens]
+
+
+def best_time(function, argument, repeat):
+    """
+    Time a function. Like timeit, the garbage collector is disabled while the function runs.
+
+    Args:
+        function (Callable[[Any], Any]): The function to time.
+        argument (Any): The argument passed to the function.
+        repeat (int): The number of runs.
+
+    Returns:
+        float: The fastest run, in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function(argument)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def print_comparison(name, legacy, new, count):
+    """
+    Print the timings of the original and the new implementation of a step.
+
+    Args:
+        name (str): The name of the step.
+        legacy (float): The time of the original implementation, in seconds.
+        new (float): The time of the new implementation, in seconds.
+        count (int): The number of tokens processed.
+    """
+    print(f"{name}:")
+    print(f"  character loops: {legacy * 1000:8.1f} ms ({count / legacy:12,.0f} tokens/sec)")
+    print(f"  tokenizer:       {new * 1000:8.1f} ms ({count / new:12,.0f} tokens/sec)")
+    print(f"  speedup:         {legacy / new:8.2f}x")
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description="Compare the tokenizer module with the original tokenizer.")
+    parser.add_argument('--words', type=int, default=200000, help="Number of tokens in the synthetic article.")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of runs of each tokenizer.")
+    args = parser.parse_args()
+
+    content = synthetic_content(args.words)
+    tokens = content.split()
+    if extract_words(content) != legacy_extract_words(content):
+        raise SystemExit("The tokenizers produce different results.")
+    print(f"Article: {len(tokens)} tokens ({len(set(tokens))} distinct), {len(content)} characters. "
+          f"Outputs are identical.")
+    # Splitting every token on its own shows the cost of the character loops, without the memo.
+    print_comparison("Splitting each token", best_time(legacy_split_tokens, tokens, args.repeat),
+                     best_time(split_tokens, tokens, args.repeat), len(tokens))
+    print_comparison("Whole article (extract_words)", best_time(legacy_extract_words, content, args.repeat),
+                     best_time(extract_words, content, args.repeat), len(tokens))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+This module is a command line tool that checks that the hot getters and searches of the app can be
+served by an index (see DBHandler.create_indexes), by looking at their EXPLAIN plans.
+
+Sequential scans are disabled while planning, so the check also passes on a small database, where
+PostgreSQL would rightly prefer to scan the whole table. It fails if a query can only read its table
+with a sequential scan.
+
+Usage:
+    python check_indexes.py
+"""
+
+import datetime
+
+from db_handler import ARTICLE_ID_QUERY, NP_ID_QUERY, REPORTER_ID_QUERY, WORD_ID_QUERY, DBHandler
+from search_wizard import DATE_ARTICLES_QUERY, LINE_QUERY, NP_ARTICLES_QUERY, REPORTER_ARTICLES_QUERY
+from text_builder import ARTICLE_LINES_QUERY, ARTICLE_QUERY, CONTEXT_LINES_QUERY, GROUP_WORDS_INDEX_QUERY
+
+# The hot queries, as (caller, query, sample parameters, table that must be read through an index). The queries
+# are the constants the callers run, so a change to a query is checked as it is.
+HOT_QUERIES = [
+    ("DBHandler.get_word_id_from_word", WORD_ID_QUERY, ("the",), "words"),
+    ("DBHandler.get_article_id_from_title", ARTICLE_ID_QUERY, ("A title",), "articles"),
+    ("DBHandler.get_reporter_id_from_name", REPORTER_ID_QUERY, ("John", "Smith"), "reporters"),
+    ("DBHandler.get_np_id_from_name", NP_ID_QUERY, ("The Daily Ledger",), "newspapers"),
+    ("SearchWizard.search_articles_date", DATE_ARTICLES_QUERY, (datetime.date(2024, 1, 1),), "articles"),
+    ("SearchWizard.search_np_articles", NP_ARTICLES_QUERY, ("00000000-0000-0000-0000-000000000000",), "articles"),
+    ("SearchWizard.search_reporter_articles", REPORTER_ARTICLES_QUERY, (1,), "articles"),
+    ("SearchWizard.search_word_at_position", LINE_QUERY, (1, 1, 1), "article_lines"),
+    ("TextBuilder.build_entire_text", ARTICLE_QUERY, (1,), "article_texts"),
+    ("TextBuilder.build_context", CONTEXT_LINES_QUERY, (1, 1, 1, 1), "article_lines"),
+    ("TextBuilder.build_context_map", ARTICLE_LINES_QUERY, (1,), "article_lines"),
+    ("TextBuilder.build_group_words_index", GROUP_WORDS_INDEX_QUERY, (1, ["the", "a"]), "postings"),
+]
+
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+def plan_scans(plan):
+    """
+    List the scans of a query plan.
+
+    Args:
+        plan (Dict[str, Any]): A plan node, as returned by EXPLAIN (FORMAT JSON).
+
+    Returns:
+        List[Tuple[str, Optional[str], Optional[str]]]: The (node type, table, index) of every scan of the plan.
+    """
+    scans = []
+    if "Scan" in plan["Node Type"]:
+        scans.append((plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name")))
+    for child in plan.get("Plans", []):
+        scans.extend(plan_scans(child))
+    return scans
+
+
+def uses_index(scans, table):
+    """
+    Check whether a plan reads a table through an index.
+
+    Args:
+        scans (List[Tuple[str, Optional[str], Optional[str]]]): The scans of the plan (see plan_scans).
+        table (str): The table.
+
+    Returns:
+        bool: True if the table is read only through index scans.
+    """
+    # A bitmap index scan has no relation name: the bitmap heap scan it feeds reads the table.
+    table_scans = [node_type for node_type, relation, _ in scans if relation == table]
+    return bool(table_scans) and all(node_type in INDEX_SCANS or node_type == "Bitmap Heap Scan"
+                                     for node_type in table_scans)
+
+
+def main():
+    """Check the plans of the hot queries, print them, and exit with an error if one can't use an index."""
+    db_handler = DBHandler()
+    failed = []
+    for caller, query, params, table in HOT_QUERIES:
+        scans = plan_scans(db_handler.explain(query, params, allow_seqscan=False))
+        ok = uses_index(scans, table)
+        indexes = ', '.join(index for _, _, index in scans if index) or 'no index'
+        print(f"{'OK  ' if ok else 'FAIL'} {caller}: {indexes}")
+        if not ok:
+            failed.append(caller)
+    if failed:
+        raise SystemExit(f"{len(failed)} queries can't use an index. Run DBHandler.create_indexes().")
+
+
+if __name__ == "__main__":
+    main()
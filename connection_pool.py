@@ -0,0 +1,420 @@
+"""
+This module keeps a bounded pool of PostgreSQL connections shared by every DBHandler in the process.
+
+A DBHandler doesn't own a connection. Its connection and cursor (PooledConnection and PooledCursor)
+check a connection out of the pool when a statement is executed, and give it back when the transaction
+ends with commit or rollback. So the number of connections depends on the number of transactions in
+progress, not on the number of handlers, and a Streamlit rerun doesn't open new connections.
+
+In autocommit mode, which the query methods of the app use, every statement is its own transaction
+and the connection goes back to the pool as soon as the statement has run, so reads need no commit.
+Several statements can still share one transaction with PooledConnection.transaction.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from psycopg2.pool import PoolError
+
+import query_stats
+
+# PLEASE MAKE SURE TO change the credentials to the ones on your local server.
+CONNECTION_PARAMS = {"dbname": "db_project", "user": "omri", "password": "omri",
+                     "options": "-c search_path=text_handle"}
+
+# The maximal number of connections open at once. Keep it below the max_connections of the server.
+POOL_MAX_CONNECTIONS = 20
+
+# The number of seconds to wait for a free connection before giving up.
+POOL_TIMEOUT = 30.0
+
+
+def database_of(connect_params):
+    """
+    Identify the database that connection parameters connect to, so that what is cached from
+    one database (see word_cache and article_cache) is never read for another.
+
+    Args:
+        connect_params (Dict[str, Any]): The arguments of psycopg2.connect.
+
+    Returns:
+        Tuple[Any, ...]: The backend, host, port and name of the database.
+    """
+    return ("postgresql", connect_params.get("host"), connect_params.get("port"),
+            connect_params.get("dbname", connect_params.get("database")))
+
+
+class ConnectionPool:
+    """
+    A thread-safe, bounded pool of connections. When all the connections are checked out,
+    getconn waits for one to be returned. Returned connections stay open for the next getconn.
+
+    Attributes:
+        max_connections (int): The maximal number of connections open at once.
+        timeout (float): The number of seconds getconn waits for a free connection.
+        database (Tuple[Any, ...]): The database the connections connect to (see database_of).
+    """
+
+    def __init__(self, max_connections=POOL_MAX_CONNECTIONS, timeout=POOL_TIMEOUT, **connect_params):
+        """
+        Initialize the pool. Connections are opened on first use.
+
+        Args:
+            max_connections (int): The maximal number of connections open at once.
+            timeout (float): The number of seconds getconn waits for a free connection.
+            **connect_params: The arguments of psycopg2.connect. Defaults to CONNECTION_PARAMS.
+        """
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connect_params = connect_params or CONNECTION_PARAMS
+        self.database = database_of(self.connect_params)
+        # The open connections that are not checked out, the most recently returned last.
+        self.idle = []
+        self.available = threading.BoundedSemaphore(max_connections)
+        self.lock = threading.Lock()
+        self.in_use = 0
+
+    def getconn(self):
+        """
+        Check a connection out of the pool.
+
+        Returns:
+            psycopg2.extensions.connection: The connection.
+
+        Raises:
+            PoolError: If no connection was returned to the pool within the timeout.
+        """
+        if not self.available.acquire(timeout=self.timeout):
+            raise PoolError(f"No database connection was available within {self.timeout} seconds.")
+        try:
+            with self.lock:
+                connection = self.idle.pop() if self.idle else None
+            if connection is None or connection.closed:
+                connection = psycopg2.connect(**self.connect_params)
+        except Exception:
+            self.available.release()
+            raise
+        with self.lock:
+            self.in_use += 1
+        return connection
+
+    def putconn(self, connection):
+        """
+        Return a connection to the pool. An open transaction is rolled back, and a broken connection is closed.
+
+        Args:
+            connection (psycopg2.extensions.connection): The connection.
+        """
+        try:
+            if not connection.closed:
+                status = connection.info.transaction_status
+                if status == TRANSACTION_STATUS_UNKNOWN:
+                    # The server connection was lost.
+                    connection.close()
+                elif status != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+        except psycopg2.Error:
+            connection.close()
+        finally:
+            with self.lock:
+                self.in_use -= 1
+                if not connection.closed:
+                    self.idle.append(connection)
+            self.available.release()
+
+    def stats(self):
+        """
+        Get the counters of the pool.
+
+        Returns:
+            Dict[str, int]: The number of checked out connections, and the maximal number of connections.
+        """
+        with self.lock:
+            return {"in_use": self.in_use, "max_connections": self.max_connections}
+
+    def closeall(self):
+        """Close the connections of the pool that are not checked out."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()
+
+
+class PooledConnection:
+    """
+    The connection of a DBHandler. It has the commit and rollback methods of a psycopg2 connection, and
+    checks a connection out of the pool only while a transaction is in progress.
+
+    Attributes:
+        database (Tuple[Any, ...]): The database of the pool (see database_of).
+        autocommit (bool): Whether every statement runs in its own transaction, outside of a transaction block.
+    """
+
+    def __init__(self, pool, autocommit=False):
+        """
+        Initialize the connection, without checking anything out of the pool.
+
+        Args:
+            pool (ConnectionPool): The pool.
+            autocommit (bool): Whether every statement runs in its own transaction, outside of a transaction block.
+        """
+        self.pool = pool
+        self.database = pool.database
+        self.autocommit = autocommit
+        self.raw_connection = None
+        # The (isolation_level, readonly) of the transaction block in progress, or None outside of one.
+        self.transaction_options = None
+
+    def checkout(self):
+        """
+        Get the connection of the current transaction, checking one out of the pool if needed.
+
+        Returns:
+            psycopg2.extensions.connection: The connection.
+        """
+        if self.raw_connection is None:
+            raw_connection = self.pool.getconn()
+            try:
+                if self.transaction_options is None:
+                    configure_session(raw_connection, self.autocommit, None, None)
+                else:
+                    configure_session(raw_connection, False, *self.transaction_options)
+            except Exception:
+                self.pool.putconn(raw_connection)
+                raise
+            self.raw_connection = raw_connection
+        return self.raw_connection
+
+    def statement_done(self):
+        """Return the connection to the pool after a statement, if the statement was its own transaction."""
+        if self.autocommit and self.transaction_options is None:
+            self.release()
+
+    @contextmanager
+    def transaction(self, isolation_level=None, readonly=None):
+        """
+        Run the statements of the with block in one transaction, which is committed at the end of the
+        block, or rolled back if it raises. Inside another transaction, the block just joins it.
+
+        Args:
+            isolation_level (Optional[int]): The isolation level of the transaction (one of the
+                psycopg2.extensions.ISOLATION_LEVEL_* constants). Defaults to the server's default.
+            readonly (Optional[bool]): Whether the transaction is read-only. Defaults to the server's default.
+        """
+        if self.transaction_options is not None or self.raw_connection is not None:
+            yield
+            return
+        self.transaction_options = (isolation_level, readonly)
+        try:
+            yield
+        except BaseException:
+            self.transaction_options = None
+            self.rollback()
+            raise
+        self.transaction_options = None
+        self.commit()
+
+    def cursor(self):
+        """
+        Create a cursor that runs its statements on this connection.
+
+        Returns:
+            PooledCursor: The cursor.
+        """
+        return PooledCursor(self)
+
+    def server_cursor(self, name):
+        """
+        Create a named server-side cursor on the connection of the current transaction, for streaming
+        a large result (see DBHandler.stream).
+
+        Args:
+            name (str): The name of the cursor, unique on the connection.
+
+        Returns:
+            psycopg2.extensions.cursor: The cursor.
+        """
+        return self.checkout().cursor(name=name)
+
+    def commit(self):
+        """
+        Commit the current transaction, and return the connection to the pool.
+
+        Inside a transaction block, it does nothing: the block commits at its end. So methods that commit
+        their own statements (like the DBHandler.create_* methods) can also run as part of a larger transaction.
+        """
+        if self.transaction_options is not None:
+            return
+        if self.raw_connection is not None:
+            try:
+                self.raw_connection.commit()
+            finally:
+                self.release()
+
+    def rollback(self):
+        """Roll the current transaction back, and return the connection to the pool."""
+        if self.raw_connection is not None:
+            try:
+                self.raw_connection.rollback()
+            finally:
+                self.release()
+
+    def release(self):
+        """Return the connection to the pool. An open transaction is rolled back."""
+        if self.raw_connection is not None:
+            raw_connection = self.raw_connection
+            self.raw_connection = None
+            self.pool.putconn(raw_connection)
+
+    def __del__(self):
+        """Return the connection to the pool when the handler is discarded in the middle of a transaction."""
+        try:
+            self.release()
+        except Exception:
+            pass
+
+
+class PooledCursor:
+    """
+    The cursor of a DBHandler. It has the methods of a psycopg2 cursor that the app uses, and runs
+    its statements on the connection the PooledConnection has checked out for the current transaction.
+
+    Results are kept by the psycopg2 cursor, so they can still be fetched after the transaction is committed.
+    Every statement is timed and recorded in the query statistics of the process (see query_stats).
+    """
+
+    def __init__(self, connection):
+        """
+        Initialize the cursor.
+
+        Args:
+            connection (PooledConnection): The connection.
+        """
+        self.connection = connection
+        self.raw_cursor = None
+
+    def checkout(self):
+        """
+        Get a psycopg2 cursor on the connection of the current transaction.
+
+        Returns:
+            psycopg2.extensions.cursor: The cursor.
+        """
+        raw_connection = self.connection.checkout()
+        if self.raw_cursor is None or self.raw_cursor.connection is not raw_connection:
+            self.raw_cursor = raw_connection.cursor()
+        return self.raw_cursor
+
+    def execute(self, query, params=None):
+        """
+        Execute a statement.
+
+        Args:
+            query (str): The statement.
+            params (Optional[Sequence[Any]]): The parameters of the statement.
+        """
+        start = time.perf_counter()
+        try:
+            self.checkout().execute(query, params)
+        finally:
+            self.connection.statement_done()
+            self.record(query, start)
+
+    def copy_expert(self, sql, file):
+        """
+        Execute a COPY statement.
+
+        Args:
+            sql (str): The COPY statement.
+            file (IO): The file to read the data from or write it to.
+        """
+        start = time.perf_counter()
+        try:
+            self.checkout().copy_expert(sql, file)
+        finally:
+            self.connection.statement_done()
+            self.record(sql, start)
+
+    def record(self, query, start):
+        """
+        Record the duration and the row count of a statement in the query statistics.
+
+        Args:
+            query (str): The statement.
+            start (float): The time.perf_counter() value when the statement started.
+        """
+        if query_stats.QUERY_TIMING:
+            query_stats.get_query_stats().record(query, time.perf_counter() - start, self.rowcount)
+
+    def fetchall(self):
+        """
+        Fetch all the rows of the last result.
+
+        Returns:
+            List[Tuple[Any, ...]]: The rows.
+        """
+        return self.raw_cursor.fetchall()
+
+    def fetchone(self):
+        """
+        Fetch the next row of the last result.
+
+        Returns:
+            Optional[Tuple[Any, ...]]: The row, or None if there are no more rows.
+        """
+        return self.raw_cursor.fetchone()
+
+    def __iter__(self):
+        """
+        Iterate over the remaining rows of the last result.
+
+        Returns:
+            Iterator[Tuple[Any, ...]]: The rows.
+        """
+        return iter(self.raw_cursor)
+
+    @property
+    def rowcount(self):
+        """int: The number of rows the last statement returned or affected."""
+        return self.raw_cursor.rowcount if self.raw_cursor is not None else -1
+
+
+def configure_session(raw_connection, autocommit, isolation_level, readonly):
+    """
+    Set the transaction characteristics of a connection checked out of the pool, where a previous
+    user may have changed them. Nothing is sent to the server: psycopg2 applies them to the next BEGIN.
+
+    Args:
+        raw_connection (psycopg2.extensions.connection): The connection.
+        autocommit (bool): Whether every statement runs in its own transaction.
+        isolation_level (Optional[int]): The isolation level of the transactions, or None for the default.
+        readonly (Optional[bool]): Whether the transactions are read-only, or None for the default.
+    """
+    if raw_connection.isolation_level != isolation_level or raw_connection.readonly != readonly:
+        # Outside of autocommit, these are only applied to the BEGIN of the next transaction.
+        raw_connection.autocommit = False
+        raw_connection.isolation_level = isolation_level
+        raw_connection.readonly = readonly
+    if raw_connection.autocommit != autocommit:
+        raw_connection.autocommit = autocommit
+
+
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+
+
+def get_connection_pool():
+    """
+    Get the connection pool of this process, creating it on first use.
+
+    Returns:
+        ConnectionPool: The pool.
+    """
+    global _connection_pool
+    with _connection_pool_lock:
+        if _connection_pool is None:
+            _connection_pool = ConnectionPool()
+        return _connection_pool
@@ -3,7 +3,161 @@ This module handles database operations for the article processing system.
 It provides a DB_handler class for managing connections and operations with a PostgreSQL database.
 """
 
+import io
+import itertools
+import time
+
 import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_REPEATABLE_READ
+
+import query_stats
+from article_cache import invalidate_articles
+from connection_pool import PooledConnection, get_connection_pool
+from position_codec import decode_positions, encode_positions
+from sqlite_backend import SQLITE_PHRASE_TRIGGERS, SQLITE_TABLES, SQLiteConnection
+from tokenizer import join_lines, join_tokens
+from word_cache import get_word_cache
+
+# Where the data is stored:
+#   "postgresql" - the PostgreSQL server of connection_pool.CONNECTION_PARAMS, through the connection pool.
+#   "sqlite"     - an embedded SQLite database file (sqlite_backend.SQLITE_PATH), with no server to set up.
+#                  It always uses the "postings" storage layout and the "constraints" duplicate checks.
+STORAGE_BACKEND = "postgresql"
+
+# How word occurrences are stored:
+#   "arrays"   - one row per word in text_handle.words, with all its occurrences in a nested occurrence_type[] array.
+#                The postings table is kept alongside, as the materialized, indexed positions of the arrays.
+#   "postings" - one row per occurrence in text_handle.postings, indexed by word and by position.
+# In both layouts the words_positions view reads the postings table, so a query on one article only reads
+# the rows of that article. An existing "arrays" database can be converted with migrate_storage.py.
+STORAGE_LAYOUT = "arrays"
+
+# How duplicate articles, newspapers, reporters and phrases are prevented:
+#   "triggers"    - BEFORE INSERT triggers that look for an existing row.
+#   "constraints" - unique indexes, with lookup-or-create done by INSERT ... ON CONFLICT in a single statement.
+#                   The words table gets a unique index too, so several connections can load articles in parallel.
+DUPLICATE_CHECKS = "triggers"
+
+# The number of rows fetched at a time by the streaming (iter_*) variants of the corpus-wide queries.
+STREAM_ITERSIZE = 2000
+
+# The ID of the article with a title. Takes the title.
+ARTICLE_ID_QUERY = (" SELECT article_id "
+                    " FROM art_info.articles "
+                    " WHERE article_title = %s ")
+
+# The ID of a reporter, compared lowercased. Takes the first and the last name.
+REPORTER_ID_QUERY = (" SELECT reporter_id "
+                     " FROM art_info.reporters "
+                     " WHERE LOWER(first_name)=LOWER(%s) AND LOWER(last_name) = lower(%s) ")
+
+# The ID of a newspaper. Takes the name of the newspaper.
+NP_ID_QUERY = (" SELECT np_id "
+               " FROM art_info.Newspapers "
+               " WHERE np_name = %s ")
+
+# The ID of a word. Takes the word.
+WORD_ID_QUERY = (" SELECT word_id "
+                 " FROM text_handle.words "
+                 " WHERE word = %s ")
+
+# The titles of all the articles.
+ALL_TITLES_QUERY = " SELECT article_title FROM art_info.articles "
+
+# The number of articles in the database.
+TOTAL_ARTICLES_QUERY = "SELECT COUNT(*) FROM art_info.articles"
+
+# Every article with its newspaper and date, numbered by title.
+ALL_ARTICLES_QUERY = """
+    SELECT ROW_NUMBER() OVER (ORDER BY a.article_title) AS row_number,
+           n.np_name, a.article_title, a.date
+    FROM art_info.articles a JOIN art_info.newspapers n
+    ON a.np_id = n.np_id
+    ORDER BY row_number, n.np_name, a.date
+"""
+
+# The secondary indexes of the lookup columns the app queries on, as (name, table, columns, covered).
+# covered is True when the unique index created in the "constraints" duplicate-check mode already serves
+# the same lookups, so the index is not created in that mode.
+LOOKUP_INDEXES = [
+    ("words_word_idx", "text_handle.words", "word", True),
+    ("reporters_lower_name_idx", "art_info.reporters", "LOWER(first_name), LOWER(last_name)", True),
+    ("newspapers_np_name_idx", "art_info.newspapers", "np_name", True),
+    ("articles_title_idx", "art_info.articles", "article_title", True),
+    ("articles_date_idx", "art_info.articles", "date", False),
+    ("articles_np_id_idx", "art_info.articles", "np_id", False),
+    ("articles_reporter_id_idx", "art_info.articles", "reporter_id", False),
+]
+
+# The positions of every word occurrence, read from the nested occurrences arrays of text_handle.words.
+ARRAY_POSITIONS_QUERY = """
+    SELECT
+        w.word_id as word_id,
+        w.word as word,
+        o.article_id as article_id,
+        pos.paragraph_number as paragraph_number,
+        pos.line_number as line_number,
+        pos.position_in_line as position_in_line,
+        pos.starting_chars as starting_chars,
+        pos.finishing_chars as finishing_chars
+    FROM
+        text_handle.words w,
+        unnest(w.occurrences) as o(article_id, positions),
+        unnest(o.positions) as pos(paragraph_number, line_number,
+        position_in_line, starting_chars, finishing_chars)
+"""
+
+# The positions of every word occurrence, read from the postings table. This is the words_positions view
+# in both storage layouts: its indexes serve lookups by article and position, and by word and article.
+POSTINGS_POSITIONS_QUERY = """
+    SELECT
+        p.word_id as word_id,
+        w.word as word,
+        p.article_id as article_id,
+        p.paragraph_number as paragraph_number,
+        p.line_number as line_number,
+        p.position_in_line as position_in_line,
+        p.starting_chars as starting_chars,
+        p.finishing_chars as finishing_chars
+    FROM
+        text_handle.postings p JOIN text_handle.words w
+        ON p.word_id = w.word_id
+"""
+
+
+def copy_escape(value):
+    """
+    Escape a value for the text format of PostgreSQL's COPY command.
+
+    Args:
+        value (Any): The value to escape.
+
+    Returns:
+        str: The escaped value.
+    """
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def build_lines_copy_buffer(article_id, word_positions):
+    """
+    Build a COPY input buffer with one article_lines row per line of an article.
+
+    Args:
+        article_id (int): The ID of the article.
+        word_positions (Iterable[Tuple[str, Tuple[int, int, int, str, str]]]): The words and their positions,
+            in reading order, with every line whole (see tokenizer.join_lines).
+
+    Returns:
+        io.StringIO: The buffer, positioned at its beginning.
+    """
+    buffer = io.StringIO()
+    for paragraph_number, line_number, content, word_starts, word_ends in join_lines(word_positions):
+        # An integer array in COPY text format: {1,2,3}.
+        buffer.write(f"{article_id}\t{paragraph_number}\t{line_number}\t{copy_escape(content)}\t"
+                     f"{{{','.join(map(str, word_starts))}}}\t{{{','.join(map(str, word_ends))}}}\n")
+    buffer.seek(0)
+    return buffer
 
 
 def parse_name(full_name):
@@ -24,22 +178,120 @@ def parse_name(full_name):
     return first_name, last_name
 
 
+# Numbers the server-side cursors of the process, whose names must be unique on a connection.
+_stream_ids = itertools.count(1)
+
+
 class DBHandler:
     """
     Handles database operations for the article processing system.
 
     This class manages the connection to a PostgreSQL database and provides methods
     for creating schemas, tables, and performing various database operations.
+
+    The connection is taken from the connection pool of the process (see connection_pool) when a
+    statement is executed, and returned to it when the transaction is committed or rolled back.
+    By default every statement is its own transaction, so the getters don't commit. Several reads
+    share one consistent snapshot inside `with db_handler.snapshot():`.
+
+    Every statement is timed (see query_stats), and the timings of the process are returned by query_timings.
+
+    The word IDs and articles cached in memory are kept per database (see database), so handlers of
+    different databases in one process never read each other's.
     """
 
-    def __init__(self):
+    def __init__(self, storage_layout=None, duplicate_checks=None, pool=None, autocommit=True, backend=None,
+                 sqlite_path=None):
         """
-        Initialize the DB_handler and establish a connection to the database.
+        Initialize the DB_handler. No connection is checked out until a statement is executed.
+
+        Args:
+            storage_layout (Optional[str]): "arrays" or "postings". Defaults to STORAGE_LAYOUT.
+            duplicate_checks (Optional[str]): "triggers" or "constraints". Defaults to DUPLICATE_CHECKS.
+            pool (Optional[ConnectionPool]): The connection pool. Defaults to the pool of the process.
+                The credentials of the database are set in connection_pool.CONNECTION_PARAMS.
+            autocommit (bool): Whether every statement runs in its own transaction. Writers that load
+                several statements in one transaction (like the TextLoader) pass False, and commit.
+            backend (Optional[str]): "postgresql" or "sqlite". Defaults to STORAGE_BACKEND.
+            sqlite_path (Optional[str]): The database file of the "sqlite" backend. Defaults to sqlite_backend.SQLITE_PATH.
         """
-        # Connect to the database. PLEASE MAKE SURE TO change the  credentials to the ones on your local server.
-        self.connection = psycopg2.connect(dbname="db_project", user="omri", password="omri",
-                                           options="-c search_path=text_handle")
+        self.backend = backend or STORAGE_BACKEND
+        if self.backend == "sqlite":
+            self.storage_layout = "postings"
+            self.duplicate_checks = "constraints"
+            self.connection = SQLiteConnection(sqlite_path, autocommit)
+        else:
+            self.storage_layout = storage_layout or STORAGE_LAYOUT
+            self.duplicate_checks = duplicate_checks or DUPLICATE_CHECKS
+            self.connection = PooledConnection(pool or get_connection_pool(), autocommit)
         self.cursor = self.connection.cursor()
+        # The database of the handler, which the caches of the process are keyed by.
+        self.database = self.connection.database
+        self.word_cache = get_word_cache(self.database)
+
+    def snapshot(self):
+        """
+        Run the queries of a with block in one read-only transaction, so they all see the database
+        at the same moment, e.g. the many aggregates of the statistics page.
+
+        Returns:
+            ContextManager[None]: The transaction block.
+        """
+        return self.connection.transaction(isolation_level=ISOLATION_LEVEL_REPEATABLE_READ, readonly=True)
+
+    def transaction(self):
+        """
+        Run the statements of a with block in one transaction, committed at the end of the block.
+
+        Returns:
+            ContextManager[None]: The transaction block.
+        """
+        return self.connection.transaction()
+
+    def stream(self, query, params=None, itersize=None):
+        """
+        Run a query with a named server-side cursor, and yield its rows as they are fetched.
+
+        Only itersize rows are held in memory at a time, and the first rows are available before the
+        whole result is computed. The connection stays checked out, in a read-only transaction (or in
+        the transaction in progress), until the generator is exhausted or closed.
+
+        Args:
+            query (str): The query.
+            params (Optional[Sequence[Any]]): The parameters of the query.
+            itersize (Optional[int]): The number of rows fetched from the server at a time.
+                Defaults to STREAM_ITERSIZE.
+
+        Yields:
+            Tuple[Any, ...]: The rows of the result.
+        """
+        with self.connection.transaction(readonly=True):
+            cursor = self.connection.server_cursor(f"stream_{next(_stream_ids)}")
+            start = time.perf_counter()
+            rows = 0
+            try:
+                cursor.itersize = itersize or STREAM_ITERSIZE
+                cursor.execute(query, params)
+                for row in cursor:
+                    rows += 1
+                    yield row
+            finally:
+                cursor.close()
+                # The time the consumer spends between rows is included: the cursor is open all along.
+                if query_stats.QUERY_TIMING:
+                    query_stats.get_query_stats().record(query, time.perf_counter() - start, rows)
+
+    @staticmethod
+    def query_timings():
+        """
+        Get the timings of the statements run by the process, grouped by their normalized statement.
+
+        Returns:
+            List[Dict[str, Any]]: For each statement: its text, the number of runs, the total and maximal
+            durations, the rolling p50/p95/p99 (in seconds), the number of rows and the methods that ran it.
+            The statement with the largest total duration comes first.
+        """
+        return query_stats.get_query_stats().summary()
 
     def check_connection(self):
         """
@@ -53,10 +305,13 @@ class DBHandler:
             return True
         except psycopg2.Error as e:
             print(f"Connection error: {e}")
+            self.connection.release()
             return False
 
     def create_schemas(self):
         """Create the necessary schemas in the database."""
+        if self.backend == "sqlite":
+            return
         self.cursor.execute(" CREATE SCHEMA IF NOT EXISTS art_info; ")
         self.connection.commit()
         self.cursor.execute(" CREATE SCHEMA IF NOT EXISTS text_handle; ")
@@ -64,6 +319,8 @@ class DBHandler:
 
     def create_types(self):
         """Create custom types used in the database."""
+        if self.backend == "sqlite":
+            return
         self.cursor.execute("""
                         DO $$ BEGIN
                             CREATE TYPE position_type AS ( paragraph_number INTEGER, line_number INTEGER, 
@@ -81,6 +338,10 @@ class DBHandler:
 
     def create_tables(self):
         """Create all required tables in the database."""
+        if self.backend == "sqlite":
+            self.cursor.execute(SQLITE_TABLES)
+            self.connection.commit()
+            return
         self.cursor.execute(" CREATE TABLE IF NOT EXISTS art_info.Newspapers(np_id UUID PRIMARY KEY, np_name TEXT) ")
         self.connection.commit()
         self.cursor.execute("""
@@ -103,9 +364,94 @@ class DBHandler:
         self.cursor.execute(
             " CREATE TABLE IF NOT EXISTS text_handle.phrases(phrase_id SERIAL PRIMARY KEY, phrase TEXT )")
         self.connection.commit()
+        # One row per word occurrence, used by the "postings" storage layout.
+        # The primary key also serves lookups of an article's text in reading order.
+        self.cursor.execute(""" CREATE TABLE IF NOT EXISTS text_handle.postings(
+                                word_id INTEGER NOT NULL REFERENCES text_handle.words (word_id),
+                                article_id INTEGER NOT NULL REFERENCES art_info.articles (article_id),
+                                paragraph_number INTEGER NOT NULL, line_number INTEGER NOT NULL,
+                                position_in_line INTEGER NOT NULL, starting_chars TEXT, finishing_chars TEXT,
+                                PRIMARY KEY (article_id, paragraph_number, line_number, position_in_line));
+                                CREATE INDEX IF NOT EXISTS postings_word_article_idx
+                                ON text_handle.postings (word_id, article_id); """)
+        self.connection.commit()
+        # The positions of each word in each article packed into one value (see position_codec and pack_positions).
+        self.cursor.execute(""" CREATE TABLE IF NOT EXISTS text_handle.packed_positions(
+                                word_id INTEGER NOT NULL REFERENCES text_handle.words (word_id),
+                                article_id INTEGER NOT NULL REFERENCES art_info.articles (article_id),
+                                positions BYTEA NOT NULL,
+                                PRIMARY KEY (word_id, article_id)); """)
+        self.connection.commit()
+        # The text of each article, as written by the TextLoader, so it is rebuilt by reading one article's rows
+        # rather than its postings. A streamed article is stored in several chunks, concatenated in order.
+        self.cursor.execute(""" CREATE TABLE IF NOT EXISTS text_handle.article_texts(
+                                article_id INTEGER NOT NULL REFERENCES art_info.articles (article_id),
+                                chunk_number INTEGER NOT NULL, content TEXT NOT NULL,
+                                PRIMARY KEY (article_id, chunk_number)); """)
+        self.connection.commit()
+        # The lines of each article, as written by the TextLoader, with the offsets of their words (see
+        # tokenizer.join_lines), so a line is read by its key rather than joined from its postings.
+        self.cursor.execute(""" CREATE TABLE IF NOT EXISTS text_handle.article_lines(
+                                article_id INTEGER NOT NULL REFERENCES art_info.articles (article_id),
+                                paragraph_number INTEGER NOT NULL, line_number INTEGER NOT NULL,
+                                content TEXT NOT NULL, word_starts INTEGER[] NOT NULL, word_ends INTEGER[] NOT NULL,
+                                PRIMARY KEY (article_id, paragraph_number, line_number)); """)
+        self.connection.commit()
 
     def create_triggers(self):
-        """Create database triggers for data integrity and validation."""
+        """
+        Create database triggers for data integrity and validation.
+
+        Duplicates are prevented by triggers or by unique indexes, according to duplicate_checks.
+        """
+        if self.duplicate_checks == "constraints":
+            self.create_unique_indexes()
+        else:
+            self.create_duplicate_triggers()
+        if self.backend == "sqlite":
+            self.cursor.execute(SQLITE_PHRASE_TRIGGERS)
+            self.connection.commit()
+            return
+        # Create a trigger that checks if a phrase is ascii or not.
+        # This is also used to check whether the phrase is in English or not.
+        self.cursor.execute("""
+                            CREATE OR REPLACE FUNCTION check_ascii_string() 
+                            RETURNS trigger AS $$
+                            BEGIN
+                                IF NEW.phrase !~ '^[\\x00-\\x7F]*$' THEN
+                                    RAISE EXCEPTION 'The phrase contains non-ASCII characters: %', NEW.phrase;
+                                ELSE
+                                    RETURN NEW;
+                                END IF;
+                            END;
+                            $$ LANGUAGE plpgsql;                         
+                            CREATE OR REPLACE TRIGGER ascii_check_trigger
+                            BEFORE INSERT OR UPDATE ON text_handle.phrases
+                            FOR EACH ROW
+                            EXECUTE FUNCTION check_ascii_string();
+        """)
+        self.connection.commit()
+        # Create a trigger that checks if a phrase is longer than 100 characters or not.
+        self.cursor.execute("""
+                            CREATE OR REPLACE FUNCTION check_string_length() 
+                            RETURNS trigger AS $$
+                            BEGIN
+                                IF LENGTH(NEW.phrase) > 100 THEN
+                                    RAISE EXCEPTION 'The phrase % is too long', NEW.phrase;
+                                ELSE
+                                    RETURN NEW;
+                                END IF;
+                            END;
+                            $$ LANGUAGE plpgsql;                         
+                            CREATE OR REPLACE TRIGGER check_length_trigger
+                            BEFORE INSERT OR UPDATE ON text_handle.phrases
+                            FOR EACH ROW
+                            EXECUTE FUNCTION check_string_length();
+        """)
+        self.connection.commit()
+
+    def create_duplicate_triggers(self):
+        """Create the triggers that prevent duplicate articles, newspapers, reporters and phrases."""
         # Create a trigger that checks whether an article is already in the table or not.
         self.cursor.execute(" CREATE OR REPLACE FUNCTION art_info.check_article_exists() "
                             " RETURNS TRIGGER AS $$ "
@@ -180,67 +526,305 @@ class DBHandler:
                             FOR EACH ROW EXECUTE FUNCTION text_handle.check_phrase_exists();
         """)
         self.connection.commit()
-        # Create a trigger that checks if a phrase is ascii or not.
-        # This is also used to check whether the phrase is in English or not.
-        self.cursor.execute("""
-                            CREATE OR REPLACE FUNCTION check_ascii_string() 
-                            RETURNS trigger AS $$
-                            BEGIN
-                                IF NEW.phrase !~ '^[\\x00-\\x7F]*$' THEN
-                                    RAISE EXCEPTION 'The phrase contains non-ASCII characters: %', NEW.phrase;
-                                ELSE
-                                    RETURN NEW;
-                                END IF;
-                            END;
-                            $$ LANGUAGE plpgsql;                         
-                            CREATE OR REPLACE TRIGGER ascii_check_trigger
-                            BEFORE INSERT OR UPDATE ON text_handle.phrases
-                            FOR EACH ROW
-                            EXECUTE FUNCTION check_ascii_string();
-        """)
+
+    def create_unique_indexes(self):
+        """
+        Create the unique indexes that prevent duplicate articles, newspapers, reporters, phrases and words,
+        and drop the triggers that did it before.
+
+        The reporter index is on the lowercase names, the same way get_reporter_id_from_name compares them.
+        Creating an index fails if the table already holds duplicates.
+        """
+        self.cursor.execute(" DROP TRIGGER IF EXISTS article_insert_update_trigger ON art_info.articles; "
+                            " DROP TRIGGER IF EXISTS np_insert_trigger ON art_info.newspapers; "
+                            " DROP TRIGGER IF EXISTS reporter_insert_trigger ON art_info.reporters; "
+                            " DROP TRIGGER IF EXISTS phrase_insert_trigger ON text_handle.phrases; ")
+        self.cursor.execute(" CREATE UNIQUE INDEX IF NOT EXISTS articles_title_date_key "
+                            " ON art_info.articles (article_title, date); "
+                            " CREATE UNIQUE INDEX IF NOT EXISTS newspapers_np_name_key "
+                            " ON art_info.newspapers (np_name); "
+                            " CREATE UNIQUE INDEX IF NOT EXISTS reporters_name_key "
+                            " ON art_info.reporters (LOWER(first_name), LOWER(last_name)); "
+                            " CREATE UNIQUE INDEX IF NOT EXISTS phrases_phrase_key "
+                            " ON text_handle.phrases (phrase); "
+                            " CREATE UNIQUE INDEX IF NOT EXISTS words_word_key "
+                            " ON text_handle.words (word); ")
         self.connection.commit()
-        # Create a trigger that checks if a phrase is longer than 100 characters or not.
-        self.cursor.execute("""
-                            CREATE OR REPLACE FUNCTION check_string_length() 
-                            RETURNS trigger AS $$
-                            BEGIN
-                                IF LENGTH(NEW.phrase) > 100 THEN
-                                    RAISE EXCEPTION 'The phrase % is too long', NEW.phrase;
-                                ELSE
-                                    RETURN NEW;
-                                END IF;
-                            END;
-                            $$ LANGUAGE plpgsql;                         
-                            CREATE OR REPLACE TRIGGER check_length_trigger
-                            BEFORE INSERT OR UPDATE ON text_handle.phrases
-                            FOR EACH ROW
-                            EXECUTE FUNCTION check_string_length();
-        """)
+
+    def create_indexes(self):
+        """
+        Create the indexes of the lookup columns the getters and searches query on (see LOOKUP_INDEXES).
+
+        The reporter names are indexed lowercased, since get_reporter_id_from_name compares them with LOWER.
+        """
+        for name, table, columns, covered in LOOKUP_INDEXES:
+            if covered and self.duplicate_checks == "constraints":
+                continue
+            self.cursor.execute(f" CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns}) ")
         self.connection.commit()
 
+    def explain(self, query, params=None, allow_seqscan=True):
+        """
+        Get the plan PostgreSQL chooses for a query, without running it.
+
+        Args:
+            query (str): The query.
+            params (Optional[Sequence[Any]]): The parameters of the query.
+            allow_seqscan (bool): Whether the planner may use sequential scans. With False, the plan shows
+                whether an index can serve the query even when the tables are too small for it to pay off.
+
+        Returns:
+            Dict[str, Any]: The root node of the plan, as returned by EXPLAIN (FORMAT JSON).
+
+        Raises:
+            NotImplementedError: On the "sqlite" backend.
+        """
+        if self.backend == "sqlite":
+            raise NotImplementedError("Query plans are only available on the PostgreSQL backend.")
+        with self.transaction():
+            if not allow_seqscan:
+                self.cursor.execute(" SET LOCAL enable_seqscan = off ")
+            self.cursor.execute(" EXPLAIN (FORMAT JSON) " + query, params)
+            plan = self.cursor.fetchone()[0]
+        return plan[0]["Plan"]
+
     def create_view(self):
-        """Create a view for convenient word position querying."""
-        self.cursor.execute("""
-                            CREATE OR REPLACE VIEW text_handle.words_positions AS 
-                                SELECT 
-                                    w.word_id as word_id,
-                                    w.word as word,
-                                    o.article_id as article_id,
-                                    pos.paragraph_number as paragraph_number,
-                                    pos.line_number as line_number,
-                                    pos.position_in_line as position_in_line,
-                                    pos.starting_chars as starting_chars,
-                                    pos.finishing_chars as finishing_chars
-                                FROM 
-                                    text_handle.words w,
-                                    unnest(w.occurrences) as o(article_id, positions),
-                                    unnest(o.positions) as pos(paragraph_number, line_number, 
-                                    position_in_line, starting_chars, finishing_chars);                     
-                                    """)
+        """
+        Create a view for convenient word position querying.
+
+        The view reads from the postings table, which the TextLoader fills in both storage layouts.
+        """
+        # The view is dropped first since its column types used to depend on the storage layout.
+        self.cursor.execute(" DROP VIEW IF EXISTS text_handle.words_positions; "
+                            " CREATE VIEW text_handle.words_positions AS " + POSTINGS_POSITIONS_QUERY)
         self.connection.commit()
 
+    def materialize_positions(self):
+        """
+        Copy the word occurrences from the occurrences arrays into the postings table.
+
+        New articles are added to the postings table as they are loaded. This fills it for the articles
+        loaded into the arrays before the table was kept in both layouts. Occurrences that are already
+        in the postings table are skipped, so it can be run again after an interruption.
+
+        Returns:
+            int: The number of occurrences copied.
+        """
+        if self.backend == "sqlite":
+            # SQLite databases never had occurrences arrays.
+            return 0
+        with self.transaction():
+            self.cursor.execute(" INSERT INTO text_handle.postings (word_id, article_id, paragraph_number, "
+                                " line_number, position_in_line, starting_chars, finishing_chars) "
+                                " SELECT word_id, article_id, paragraph_number, line_number, "
+                                " position_in_line, starting_chars, finishing_chars "
+                                " FROM (" + ARRAY_POSITIONS_QUERY + ") AS array_positions "
+                                " ON CONFLICT DO NOTHING ")
+            return self.cursor.rowcount
+
+    def migrate_to_postings(self, clear_arrays=False):
+        """
+        Copy the word occurrences from the occurrences arrays into the postings table,
+        and stop storing them in the arrays.
+
+        Args:
+            clear_arrays (bool): Whether to empty the occurrences arrays once they are copied.
+
+        Returns:
+            int: The number of occurrences copied.
+        """
+        with self.transaction():
+            copied = self.materialize_positions()
+            if clear_arrays:
+                self.cursor.execute(" UPDATE text_handle.words SET occurrences = NULL "
+                                    " WHERE occurrences IS NOT NULL ")
+        self.storage_layout = "postings"
+        return copied
+
+    def pack_article_positions(self, article_id):
+        """
+        Pack the positions of every word of an article (see position_codec) into the packed_positions table,
+        from its postings. Inside a transaction, e.g. the TextLoader's, the article is packed in it.
+
+        Args:
+            article_id (int): The ID of the article.
+
+        Returns:
+            int: The number of (word, article) rows packed.
+        """
+        with self.transaction():
+            self.cursor.execute(" SELECT word_id, paragraph_number, line_number, position_in_line, "
+                                " starting_chars, finishing_chars "
+                                " FROM text_handle.postings "
+                                " WHERE article_id = %s "
+                                " ORDER BY word_id ",
+                                (article_id,))
+            return self.copy_packed_positions(article_id, ((word_id, [row[1:] for row in rows]) for word_id, rows
+                                                           in itertools.groupby(self.cursor.fetchall(),
+                                                                                key=lambda row: row[0])))
+
+    def copy_packed_positions(self, article_id, word_positions):
+        """
+        Pack the positions of words of an article (see position_codec) into the packed_positions table,
+        with a single COPY.
+
+        Args:
+            article_id (int): The ID of the article.
+            word_positions (Iterable[Tuple[int, Iterable[Tuple[int, int, int, str, str]]]]): Each word_id, with all
+                its positions in the article, as (paragraph_number, line_number, position_in_line, starting_chars,
+                finishing_chars).
+
+        Returns:
+            int: The number of (word, article) rows packed.
+        """
+        buffer = io.StringIO()
+        packed = 0
+        for word_id, positions in word_positions:
+            # A bytea in COPY text format: \x followed by hex digits, with the backslash escaped.
+            buffer.write(f"{word_id}\t{article_id}\t\\\\x{encode_positions(positions).hex()}\n")
+            packed += 1
+        buffer.seek(0)
+        self.cursor.copy_expert(" COPY text_handle.packed_positions (word_id, article_id, positions) FROM STDIN ",
+                                buffer)
+        return packed
+
+    def pack_positions(self):
+        """
+        Pack the positions of the articles that have not been packed yet, one article per transaction,
+        so it can be run again after an interruption. The TextLoader packs the articles it loads.
+
+        Returns:
+            int: The number of articles packed.
+        """
+        self.cursor.execute(" SELECT article_id FROM art_info.articles a "
+                            " WHERE NOT EXISTS (SELECT 1 FROM text_handle.packed_positions pp "
+                            "                   WHERE pp.article_id = a.article_id) "
+                            " ORDER BY article_id ")
+        article_ids = [row[0] for row in self.cursor.fetchall()]
+        for article_id in article_ids:
+            self.pack_article_positions(article_id)
+        return len(article_ids)
+
+    def repack_positions(self):
+        """
+        Pack the positions of the articles that were packed before again, after a change of the encoding
+        of position_codec (e.g. of its INTERNED_CHARS).
+
+        Returns:
+            int: The number of articles packed.
+        """
+        with self.transaction():
+            self.cursor.execute(" SELECT EXISTS (SELECT 1 FROM text_handle.packed_positions) ")
+            if not self.cursor.fetchone()[0]:
+                return 0
+            self.cursor.execute(" DELETE FROM text_handle.packed_positions ")
+        return self.pack_positions()
+
+    def store_article_text(self, article_id):
+        """
+        Store the text of an article in the article_texts table, joined from its postings, and remove
+        the article from the article caches.
+
+        Args:
+            article_id (int): The ID of the article.
+        """
+        with self.transaction():
+            self.cursor.execute(" SELECT w.word, p.paragraph_number, p.line_number, p.position_in_line, "
+                                " p.starting_chars, p.finishing_chars "
+                                " FROM text_handle.postings p JOIN text_handle.words w ON w.word_id = p.word_id "
+                                " WHERE p.article_id = %s "
+                                " ORDER BY p.paragraph_number, p.line_number, p.position_in_line ",
+                                (article_id,))
+            content = join_tokens((row[0], row[1:]) for row in self.cursor.fetchall())
+            self.cursor.execute(" INSERT INTO text_handle.article_texts (article_id, chunk_number, content) "
+                                " VALUES (%s, 1, %s) ",
+                                (article_id, content))
+        invalidate_articles(self.database, (article_id,))
+
+    def store_article_texts(self):
+        """
+        Store the text of the articles loaded before the TextLoader stored it (see store_article_text),
+        one article per transaction, so it can be run again after an interruption.
+
+        Returns:
+            int: The number of articles stored.
+        """
+        self.cursor.execute(" SELECT article_id FROM art_info.articles a "
+                            " WHERE NOT EXISTS (SELECT 1 FROM text_handle.article_texts t "
+                            "                   WHERE t.article_id = a.article_id) "
+                            " ORDER BY article_id ")
+        article_ids = [row[0] for row in self.cursor.fetchall()]
+        for article_id in article_ids:
+            self.store_article_text(article_id)
+        return len(article_ids)
+
+    def store_article_lines(self, article_id):
+        """
+        Store the lines of an article in the article_lines table, joined from its postings, and remove
+        the article from the article caches.
+
+        Args:
+            article_id (int): The ID of the article.
+        """
+        with self.transaction():
+            self.cursor.execute(" SELECT w.word, p.paragraph_number, p.line_number, p.position_in_line, "
+                                " p.starting_chars, p.finishing_chars "
+                                " FROM text_handle.postings p JOIN text_handle.words w ON w.word_id = p.word_id "
+                                " WHERE p.article_id = %s "
+                                " ORDER BY p.paragraph_number, p.line_number, p.position_in_line ",
+                                (article_id,))
+            self.copy_article_lines(article_id, [(row[0], row[1:]) for row in self.cursor.fetchall()])
+        invalidate_articles(self.database, (article_id,))
+
+    def copy_article_lines(self, article_id, word_positions):
+        """
+        Store lines of an article in the article_lines table, with a single COPY.
+
+        Args:
+            article_id (int): The ID of the article.
+            word_positions (Iterable[Tuple[str, Tuple[int, int, int, str, str]]]): The words of the lines and
+                their positions, in reading order, with every line whole.
+        """
+        self.cursor.copy_expert(" COPY text_handle.article_lines (article_id, paragraph_number, "
+                                " line_number, content, word_starts, word_ends) FROM STDIN ",
+                                build_lines_copy_buffer(article_id, word_positions))
+
+    def store_all_article_lines(self):
+        """
+        Store the lines of the articles loaded before the TextLoader stored them (see store_article_lines),
+        one article per transaction, so it can be run again after an interruption.
+
+        Returns:
+            int: The number of articles stored.
+        """
+        self.cursor.execute(" SELECT article_id FROM art_info.articles a "
+                            " WHERE EXISTS (SELECT 1 FROM text_handle.postings p WHERE p.article_id = a.article_id) "
+                            " AND NOT EXISTS (SELECT 1 FROM text_handle.article_lines l "
+                            "                 WHERE l.article_id = a.article_id) "
+                            " ORDER BY article_id ")
+        article_ids = [row[0] for row in self.cursor.fetchall()]
+        for article_id in article_ids:
+            self.store_article_lines(article_id)
+        return len(article_ids)
+
     # Getters:
 
+    def get_packed_positions(self, word_id):
+        """
+        Get the positions of a word in every article, from the packed_positions table. The TextLoader packs
+        every article it loads, and the schema migrations pack the articles loaded before it did.
+
+        Args:
+            word_id (int): The ID of the word.
+
+        Returns:
+            Dict[int, List[Tuple[int, int, int, str, str]]]: The positions of the word in each article,
+            by article ID, as (paragraph_number, line_number, position_in_line, starting_chars, finishing_chars).
+        """
+        self.cursor.execute(" SELECT article_id, positions FROM text_handle.packed_positions WHERE word_id = %s ",
+                            (word_id,))
+        return {article_id: decode_positions(positions) for article_id, positions in self.cursor.fetchall()}
+
     # Get reporter_id from reporter's name:
     def get_reporter_id_from_name(self, reporter_full_name):
         """
@@ -253,11 +837,7 @@ class DBHandler:
             List[Tuple[Any, ...]]: A list of tuples containing reporter ID(s).
         """
         first_name, last_name = parse_name(reporter_full_name)
-        self.cursor.execute(" SELECT reporter_id "
-                            " FROM art_info.reporters "
-                            " WHERE LOWER(first_name)=LOWER(%s) AND LOWER(last_name) = lower(%s) ",
-                            (first_name, last_name))
-        self.connection.commit()
+        self.cursor.execute(REPORTER_ID_QUERY, (first_name, last_name))
         return self.cursor.fetchall()
 
     # Get np_id from np_name
@@ -272,11 +852,7 @@ class DBHandler:
         Returns:
             List[Tuple[Any, ...]]: A list of tuples containing newspaper ID(s).
         """
-        self.cursor.execute(" SELECT np_id "
-                            " FROM art_info.Newspapers "
-                            " WHERE np_name = %s ",
-                            (np_name,))
-        self.connection.commit()
+        self.cursor.execute(NP_ID_QUERY, (np_name,))
         return self.cursor.fetchall()
 
     def get_word_id_from_word(self, word):
@@ -289,17 +865,57 @@ class DBHandler:
         Returns:
             int: The word ID if found, -1 otherwise.
         """
-        self.cursor.execute(" SELECT word_id "
-                            " FROM text_handle.words "
-                            " WHERE word = %s ",
-                            (word,))
-        self.connection.commit()
+        self.prefill_word_cache()
+        word_id = self.word_cache.get(word)
+        if word_id is not None:
+            return word_id
+        self.cursor.execute(WORD_ID_QUERY, (word,))
         res = self.cursor.fetchall()
         if len(res) == 0:
             return -1
         else:
+            self.word_cache.put(word, res[0][0])
             return res[0][0]
 
+    def prefill_word_cache(self):
+        """Fill the word ID cache of the database from the words table, if it wasn't filled yet."""
+        self.word_cache.prefill(self.get_word_ids)
+
+    def get_word_ids(self, limit):
+        """
+        Get the IDs of the oldest words in the database, which are the most common ones.
+
+        Args:
+            limit (int): The maximal number of words returned.
+
+        Returns:
+            List[Tuple[str, int]]: (word, word_id) pairs.
+        """
+        self.cursor.execute(" SELECT word, MIN(word_id) "
+                            " FROM text_handle.words "
+                            " GROUP BY word "
+                            " ORDER BY MIN(word_id) "
+                            " LIMIT %s ",
+                            (limit,))
+        return self.cursor.fetchall()
+
+    def find_word_ids(self, words):
+        """
+        Get the IDs of the given words that are in the database.
+
+        Args:
+            words (List[str]): The words to look up.
+
+        Returns:
+            List[Tuple[str, int]]: (word, word_id) pairs of the words that were found.
+        """
+        self.cursor.execute(" SELECT word, MIN(word_id) "
+                            " FROM text_handle.words "
+                            " WHERE word = ANY(%s) "
+                            " GROUP BY word ",
+                            (words,))
+        return self.cursor.fetchall()
+
     def get_article_id_from_title(self, article_title):
         """
         Get the article ID from the article title.
@@ -310,11 +926,7 @@ class DBHandler:
         Returns:
             List[Tuple[Any, ...]]: A list of tuples containing article ID(s).
         """
-        self.cursor.execute(" SELECT article_id "
-                            " FROM art_info.articles "
-                            " WHERE article_title = %s ",
-                            (article_title,))
-        self.connection.commit()
+        self.cursor.execute(ARTICLE_ID_QUERY, (article_title,))
         return self.cursor.fetchall()
 
     def get_all_article_titles(self):
@@ -324,8 +936,7 @@ class DBHandler:
         Returns:
             List[Tuple[str]]: A list of tuples, each containing an article title.
         """
-        self.cursor.execute(" SELECT article_title FROM art_info.articles ")
-        self.connection.commit()
+        self.cursor.execute(ALL_TITLES_QUERY)
         return self.cursor.fetchall()
 
     def get_total_articles(self):
@@ -335,8 +946,7 @@ class DBHandler:
         Returns:
             int: The total number of articles.
         """
-        self.cursor.execute("SELECT COUNT(*) FROM art_info.articles")
-        self.connection.commit()
+        self.cursor.execute(TOTAL_ARTICLES_QUERY)
         return self.cursor.fetchone()[0]
 
     def get_all_articles(self):
@@ -346,10 +956,27 @@ class DBHandler:
         Returns:
             List[Tuple[Any, ...]]: A list of tuples containing articles.
         """
-        self.cursor.execute(""" SELECT ROW_NUMBER() OVER (ORDER BY a.article_title) AS row_number, 
-                                        n.np_name, a.article_title, a.date 
-                                FROM art_info.articles a JOIN art_info.newspapers n
-                                ON a.np_id = n.np_id
-                                 ORDER BY row_number, n.np_name, a.date""")
-        self.connection.commit()
+        self.cursor.execute(ALL_ARTICLES_QUERY)
         return self.cursor.fetchall()
+
+    def iter_all_articles(self, itersize=None):
+        """
+        Stream all articles from the database with a server-side cursor (see stream).
+
+        Args:
+            itersize (Optional[int]): The number of rows fetched at a time. Defaults to STREAM_ITERSIZE.
+
+        Returns:
+            Iterator[Tuple[Any, ...]]: The articles, as in get_all_articles.
+        """
+        return self.stream(ALL_ARTICLES_QUERY, itersize=itersize)
+
+    def get_loaded_article_keys(self):
+        """
+        Get the (title, date) pairs of all the articles already in the database.
+
+        Returns:
+            Set[Tuple[str, str]]: A set of (article_title, date) pairs, with dates formatted as YYYY-MM-DD.
+        """
+        self.cursor.execute(" SELECT article_title, to_char(date, 'YYYY-MM-DD') FROM art_info.articles ")
+        return set(self.cursor.fetchall())
@@ -0,0 +1,33 @@
+"""
+This module is a command line tool for converting an existing database from the "arrays"
+storage layout to the "postings" storage layout.
+
+Usage:
+    python migrate_storage.py [--clear-arrays]
+
+After the migration, set STORAGE_LAYOUT = "postings" in db_handler.py so new articles are
+loaded into the postings table. (Setting it and starting the app also migrates, without --clear-arrays.)
+"""
+
+import argparse
+
+from db_handler import DBHandler
+from schema_migrations import SCHEMA_VERSION, migrate_schema, record_schema_version
+
+
+def main():
+    """Parse the command line arguments and run the migration."""
+    parser = argparse.ArgumentParser(description="Copy the word occurrences arrays into the postings table.")
+    parser.add_argument('--clear-arrays', action='store_true',
+                        help="Empty the occurrences arrays of the words table once they are copied.")
+    args = parser.parse_args()
+
+    db_handler = DBHandler()
+    migrate_schema(db_handler)
+    copied = db_handler.migrate_to_postings(clear_arrays=args.clear_arrays)
+    record_schema_version(db_handler, SCHEMA_VERSION)
+    print(f"Copied {copied} occurrences into text_handle.postings.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+This module packs the positions of a word in an article into a compact bytea value, and unpacks them.
+
+A position_type row holds three integers and two varchar(10) fields, which PostgreSQL stores with a
+composite header of its own, and psycopg2 returns as a string to parse. Packed, a position mostly takes
+five bytes:
+    - the paragraph, line and position in line are delta-encoded against the previous position (a new
+      paragraph restarts the line and position, and a new line restarts the position, so they are
+      stored as is), and written as varints;
+    - the starting and finishing characters are replaced with their index in INTERNED_CHARS, which
+      includes the line and paragraph breaks the last word of a line finishes with. Other strings are
+      written inline, as a code of INLINE_CODE_BASE + their length in bytes, then their UTF-8 bytes.
+
+A packed value is a sequence of segments, each starting with its number of positions and encoded on its
+own, so the positions of a word loaded in several chunks are packed by concatenating the segments.
+"""
+
+from array import array
+
+# The punctuation interned as a single byte. The index of a string is its code in the stored values,
+# so strings may only be appended to the list, never removed or reordered, and the list is kept shorter
+# than INLINE_CODE_BASE. The last word of a line finishes with its punctuation and a line break, or two at
+# the end of a paragraph (see tokenizer.tokenize_line), so the commonest of those are interned too.
+INTERNED_CHARS = ["", ",", ".", '"', "'", "(", ")", ";", ":", "!", "?", "...", "'s", "-", "--", "[", "]",
+                  '."', ',"', '?"', '!"', '("', ").", "),", "_", "*", "&", "'.", "',", ".)", '"\'', "'\"",
+                  "\n", "\n\n", ".\n", ".\n\n", ",\n", ",\n\n", "?\n", "?\n\n", "!\n", "!\n\n",
+                  ":\n", ":\n\n", ";\n", ";\n\n", "...\n", "...\n\n", ")\n", ")\n\n", '"\n', '"\n\n',
+                  '."\n', '."\n\n', "'\n", "'\n\n"]
+
+# The first code of the strings written inline. The codes below it are those of INTERNED_CHARS. Changing it
+# changes the meaning of the stored values, which then have to be packed again (see DBHandler.pack_positions).
+INLINE_CODE_BASE = 64
+
+INTERNED_CODES = {chars: code for code, chars in enumerate(INTERNED_CHARS)}
+
+
+def write_varint(buffer, value):
+    """
+    Append a non-negative integer to a buffer as a varint: 7 bits per byte, the high bit set on all but the last.
+
+    Args:
+        buffer (bytearray): The buffer.
+        value (int): The integer.
+    """
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def write_chars(buffer, chars):
+    """
+    Append starting or finishing characters to a buffer, as their interned code or inline.
+
+    Args:
+        buffer (bytearray): The buffer.
+        chars (Optional[str]): The characters. None is packed as ''.
+    """
+    code = INTERNED_CODES.get(chars or "")
+    if code is not None:
+        buffer.append(code)
+    else:
+        encoded = chars.encode("utf-8")
+        write_varint(buffer, INLINE_CODE_BASE + len(encoded))
+        buffer.extend(encoded)
+
+
+def encode_positions(positions):
+    """
+    Pack the positions of a word in an article into one segment.
+
+    Args:
+        positions (Iterable[Tuple[int, int, int, str, str]]): The positions, as (paragraph_number,
+            line_number, position_in_line, starting_chars, finishing_chars). They are sorted first.
+
+    Returns:
+        bytes: The packed positions.
+    """
+    positions = sorted(positions)
+    buffer = bytearray()
+    write_varint(buffer, len(positions))
+    paragraph = line = position = 0
+    for paragraph_number, line_number, position_in_line, starting_chars, finishing_chars in positions:
+        if paragraph_number != paragraph:
+            write_varint(buffer, paragraph_number - paragraph)
+            write_varint(buffer, line_number)
+            write_varint(buffer, position_in_line)
+        else:
+            buffer.append(0)
+            if line_number != line:
+                write_varint(buffer, line_number - line)
+                write_varint(buffer, position_in_line)
+            else:
+                buffer.append(0)
+                write_varint(buffer, position_in_line - position)
+        paragraph, line, position = paragraph_number, line_number, position_in_line
+        write_chars(buffer, starting_chars)
+        write_chars(buffer, finishing_chars)
+    return bytes(buffer)
+
+
+def read_varint(data, i):
+    """
+    Read a varint (see write_varint).
+
+    Args:
+        data (memoryview): The packed data.
+        i (int): The offset of the varint.
+
+    Returns:
+        Tuple[int, int]: The integer, and the offset of what follows it.
+    """
+    byte = data[i]
+    if byte < 0x80:
+        return byte, i + 1
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        i += 1
+        byte = data[i]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, i + 1
+        shift += 7
+
+
+def decode_position_arrays(data):
+    """
+    Unpack packed positions into one array per field.
+
+    Args:
+        data (Union[bytes, memoryview]): The packed positions: one or more segments (see encode_positions).
+            psycopg2 returns bytea values as memoryviews.
+
+    Returns:
+        Tuple[array, array, array, List[str], List[str]]: The paragraph numbers, line numbers and positions
+        in line (as arrays of ints), and the starting and finishing characters, in the order of the positions.
+    """
+    data = memoryview(data).cast('B')
+    paragraphs, lines, positions = array('i'), array('i'), array('i')
+    starting, finishing = [], []
+    interned = INTERNED_CHARS
+    end = len(data)
+    i = 0
+    while i < end:
+        count, i = read_varint(data, i)
+        paragraph = line = position = 0
+        for _ in range(count):
+            delta, i = read_varint(data, i)
+            if delta:
+                paragraph += delta
+                line, i = read_varint(data, i)
+                position, i = read_varint(data, i)
+            else:
+                delta, i = read_varint(data, i)
+                if delta:
+                    line += delta
+                    position, i = read_varint(data, i)
+                else:
+                    delta, i = read_varint(data, i)
+                    position += delta
+            paragraphs.append(paragraph)
+            lines.append(line)
+            positions.append(position)
+            for chars_list in (starting, finishing):
+                code = data[i]
+                if code < INLINE_CODE_BASE:
+                    chars_list.append(interned[code])
+                    i += 1
+                else:
+                    code, i = read_varint(data, i)
+                    length = code - INLINE_CODE_BASE
+                    chars_list.append(bytes(data[i:i + length]).decode("utf-8"))
+                    i += length
+    return paragraphs, lines, positions, starting, finishing
+
+
+def decode_positions(data):
+    """
+    Unpack packed positions into position tuples.
+
+    Args:
+        data (Union[bytes, memoryview]): The packed positions (see encode_positions).
+
+    Returns:
+        List[Tuple[int, int, int, str, str]]: The positions, as (paragraph_number, line_number,
+        position_in_line, starting_chars, finishing_chars).
+    """
+    return list(zip(*decode_position_arrays(data)))
@@ -0,0 +1,182 @@
+"""
+This module times the statements the app runs, to find which queries make a page slow.
+
+Every statement executed through a DBHandler is recorded under its fingerprint: the statement with
+its whitespace collapsed and its literals replaced by '?', so the same query with different values is
+counted once. For each fingerprint the module keeps counters, the methods that ran it, and the durations
+of its latest runs, from which rolling percentiles are computed on demand. Statements slower than
+SLOW_QUERY_THRESHOLD are also written to the "query_stats" logger.
+
+The cost per statement is a few dictionary operations and a short walk up the call stack.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+from collections import deque
+from functools import lru_cache
+
+# Whether statements are timed.
+QUERY_TIMING = True
+
+# Statements that take at least this many seconds are written to the slow-query log.
+SLOW_QUERY_THRESHOLD = 0.5
+
+# The number of latest durations kept per fingerprint for the rolling percentiles.
+QUERY_SAMPLE_SIZE = 1000
+
+# Frames of these files are skipped when looking for the method that ran a statement.
+DB_LAYER_FILES = {"async_db.py", "connection_pool.py", "db_handler.py", "query_stats.py", "sqlite_backend.py"}
+
+logger = logging.getLogger("query_stats")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(query):
+    """
+    Normalize a statement, so that runs of the same query with different values share a fingerprint.
+
+    Args:
+        query (str): The statement.
+
+    Returns:
+        str: The statement with its whitespace collapsed and its literals replaced by '?'.
+    """
+    return _WHITESPACE.sub(' ', _LITERALS.sub('?', query)).strip()
+
+
+def find_caller():
+    """
+    Find the method that ran a statement: the innermost frame outside of the database layer.
+
+    Returns:
+        str: The caller as Class.method, or module.function for plain functions.
+    """
+    frame = sys._getframe(2)
+    while frame is not None and os.path.basename(frame.f_code.co_filename) in DB_LAYER_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    code = frame.f_code
+    qualified_name = getattr(code, "co_qualname", None)
+    if qualified_name is None:
+        self_object = frame.f_locals.get("self")
+        qualified_name = (f"{type(self_object).__name__}.{code.co_name}" if self_object is not None
+                          else code.co_name)
+    if '.' not in qualified_name:
+        qualified_name = f"{frame.f_globals.get('__name__', '?')}.{qualified_name}"
+    return qualified_name
+
+
+def percentile(ordered, p):
+    """
+    Get a percentile of sorted samples, by nearest rank.
+
+    Args:
+        ordered (List[float]): The samples, sorted.
+        p (int): The percentile.
+
+    Returns:
+        float: The percentile.
+    """
+    rank = -(-p * len(ordered) // 100)
+    return ordered[max(rank, 1) - 1]
+
+
+class QueryStats:
+    """
+    Thread-safe timing statistics of statements, grouped by fingerprint.
+
+    Attributes:
+        slow_threshold (float): Statements that take at least this many seconds are logged.
+        sample_size (int): The number of latest durations kept per fingerprint.
+    """
+
+    def __init__(self, slow_threshold=SLOW_QUERY_THRESHOLD, sample_size=QUERY_SAMPLE_SIZE):
+        """
+        Initialize empty statistics.
+
+        Args:
+            slow_threshold (float): Statements that take at least this many seconds are logged.
+            sample_size (int): The number of latest durations kept per fingerprint.
+        """
+        self.slow_threshold = slow_threshold
+        self.sample_size = sample_size
+        self.lock = threading.Lock()
+        self.statements = {}
+
+    def record(self, query, seconds, rows, caller=None):
+        """
+        Record a run of a statement.
+
+        Args:
+            query (str): The statement.
+            seconds (float): How long it took.
+            rows (int): The number of rows it returned or affected (-1 if unknown).
+            caller (Optional[str]): The method that ran it. Defaults to the caller found on the stack (see find_caller).
+        """
+        key = fingerprint(query)
+        caller = caller or find_caller()
+        with self.lock:
+            entry = self.statements.get(key)
+            if entry is None:
+                entry = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "rows": 0, "callers": {},
+                         "samples": deque(maxlen=self.sample_size)}
+                self.statements[key] = entry
+            entry["count"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["rows"] += max(rows, 0)
+            entry["callers"][caller] = entry["callers"].get(caller, 0) + 1
+            entry["samples"].append(seconds)
+        if seconds >= self.slow_threshold:
+            logger.warning("Slow query (%.1f ms, %d rows) in %s: %s", seconds * 1000, rows, caller, key)
+
+    def summary(self):
+        """
+        Get the statistics of every fingerprint, the slowest in total first.
+
+        Returns:
+            List[Dict[str, Any]]: For each fingerprint: the statement, the number of runs, the total and
+            maximal durations, the rolling p50/p95/p99 (in seconds), the number of rows and the callers
+            with their number of runs.
+        """
+        with self.lock:
+            entries = [(key, dict(entry, callers=dict(entry["callers"]), samples=sorted(entry["samples"])))
+                       for key, entry in self.statements.items()]
+        summary = []
+        for key, entry in entries:
+            samples = entry.pop("samples")
+            entry.update(statement=key, p50_seconds=percentile(samples, 50), p95_seconds=percentile(samples, 95),
+                         p99_seconds=percentile(samples, 99))
+            summary.append(entry)
+        summary.sort(key=lambda entry: entry["total_seconds"], reverse=True)
+        return summary
+
+    def clear(self):
+        """Forget all the recorded statements."""
+        with self.lock:
+            self.statements.clear()
+
+
+_query_stats = None
+_query_stats_lock = threading.Lock()
+
+
+def get_query_stats():
+    """
+    Get the query statistics of this process, creating them on first use.
+
+    Returns:
+        QueryStats: The statistics.
+    """
+    global _query_stats
+    with _query_stats_lock:
+        if _query_stats is None:
+            _query_stats = QueryStats()
+        return _query_stats
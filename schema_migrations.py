@@ -0,0 +1,190 @@
+"""
+This module brings the database schema up to date when the app starts, running DDL only when needed.
+
+The schema is built by numbered steps (MIGRATIONS). The art_info.schema_version table records the last
+step applied, and the storage layout and duplicate-check mode the schema was built for. When they all
+match the code, migrate_schema runs a single SELECT and no DDL, so starting the app takes no locks.
+
+Otherwise the pending steps are applied in one transaction, under an advisory lock so that two processes
+starting at the same time don't both apply them. A change of the STORAGE_LAYOUT or DUPLICATE_CHECKS
+settings in db_handler.py is applied the same way, recreating the triggers and indexes for the new settings.
+
+The steps are idempotent (IF NOT EXISTS, CREATE OR REPLACE), so a database created before this module
+existed is adopted by applying all of them.
+"""
+
+from psycopg2.errors import UndefinedTable
+
+
+def create_base_schema(db_handler):
+    """
+    Create the schemas, the custom types and the tables.
+
+    Args:
+        db_handler (DBHandler): The database handler.
+    """
+    db_handler.create_schemas()
+    db_handler.create_types()
+    db_handler.create_tables()
+
+
+def materialize_positions(db_handler):
+    """
+    Fill the postings table with the occurrences of the arrays, and read the words_positions view from it.
+
+    Args:
+        db_handler (DBHandler): The database handler.
+    """
+    db_handler.materialize_positions()
+    db_handler.create_view()
+
+
+def store_article_texts(db_handler):
+    """
+    Create the article_texts table, and fill it with the text of the articles already loaded.
+
+    Args:
+        db_handler (DBHandler): The database handler.
+    """
+    db_handler.create_tables()
+    db_handler.store_article_texts()
+
+
+def store_article_lines(db_handler):
+    """
+    Create the article_lines table, and fill it with the lines of the articles already loaded.
+
+    Args:
+        db_handler (DBHandler): The database handler.
+    """
+    db_handler.create_tables()
+    db_handler.store_all_article_lines()
+
+
+# Run by migrate_schema, as (version, description, step). A step gets the DBHandler, and may commit:
+# inside the migration transaction, commits are deferred to its end. Add new steps at the end.
+MIGRATIONS = [
+    (1, "Create the schemas, types and tables", create_base_schema),
+    (2, "Create the duplicate checks and the phrase validation triggers",
+     lambda db_handler: db_handler.create_triggers()),
+    (3, "Create the lookup indexes",
+     lambda db_handler: db_handler.create_indexes()),
+    (4, "Create the words_positions view",
+     lambda db_handler: db_handler.create_view()),
+    (5, "Materialize the occurrences arrays into the postings table, and read words_positions from it",
+     materialize_positions),
+    (6, "Create the packed_positions table",
+     lambda db_handler: db_handler.create_tables()),
+    (7, "Create the article_texts table, and store the text of the loaded articles",
+     store_article_texts),
+    (8, "Create the article_lines table, and store the lines of the loaded articles",
+     store_article_lines),
+    (9, "Pack the packed positions again, with the line breaks interned",
+     lambda db_handler: db_handler.repack_positions()),
+    (10, "Pack the positions of the articles loaded before the TextLoader packed them",
+     lambda db_handler: db_handler.pack_positions()),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Serializes the migrations of processes that start at the same time (see pg_advisory_xact_lock).
+MIGRATION_LOCK_ID = 20240101
+
+
+def read_schema_version(db_handler):
+    """
+    Get the state of the schema, as recorded by the last migration.
+
+    Args:
+        db_handler (DBHandler): The database handler.
+
+    Returns:
+        Tuple[int, Optional[str], Optional[str]]: The last step applied, the storage layout and the
+        duplicate-check mode. (0, None, None) if the database has never been migrated.
+    """
+    try:
+        db_handler.cursor.execute(" SELECT version, storage_layout, duplicate_checks FROM art_info.schema_version ")
+    except UndefinedTable:
+        return 0, None, None
+    row = db_handler.cursor.fetchone()
+    return tuple(row) if row is not None else (0, None, None)
+
+
+def record_schema_version(db_handler, version):
+    """
+    Record the state of the schema.
+
+    Args:
+        db_handler (DBHandler): The database handler, whose settings the schema was built for.
+        version (int): The last step applied.
+    """
+    db_handler.cursor.execute(" INSERT INTO art_info.schema_version (version, storage_layout, duplicate_checks) "
+                              " VALUES (%s, %s, %s) "
+                              " ON CONFLICT (singleton) DO UPDATE SET version = EXCLUDED.version, "
+                              " storage_layout = EXCLUDED.storage_layout, "
+                              " duplicate_checks = EXCLUDED.duplicate_checks, updated_at = now() ",
+                              (version, db_handler.storage_layout, db_handler.duplicate_checks))
+
+
+def pending_migrations(version):
+    """
+    List the steps that come after a version.
+
+    Args:
+        version (int): The last step applied.
+
+    Returns:
+        List[Tuple[int, str, Callable[[DBHandler], Any]]]: The steps to apply, in order.
+    """
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+
+def migrate_schema(db_handler):
+    """
+    Bring the schema up to date with the code and with the settings of the DBHandler.
+
+    Args:
+        db_handler (DBHandler): The database handler.
+
+    Returns:
+        List[str]: The descriptions of the changes made, empty if the schema was already current.
+
+    Raises:
+        ValueError: If the settings ask to go from the "postings" storage layout back to "arrays",
+            which would lose the postings.
+    """
+    current = (SCHEMA_VERSION, db_handler.storage_layout, db_handler.duplicate_checks)
+    if read_schema_version(db_handler) == current:
+        return []
+
+    applied = []
+    with db_handler.transaction():
+        db_handler.cursor.execute(" SELECT pg_advisory_xact_lock(%s) ", (MIGRATION_LOCK_ID,))
+        db_handler.create_schemas()
+        db_handler.cursor.execute(" CREATE TABLE IF NOT EXISTS art_info.schema_version( "
+                                  " singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton), "
+                                  " version INTEGER NOT NULL, storage_layout TEXT NOT NULL, "
+                                  " duplicate_checks TEXT NOT NULL, "
+                                  " updated_at TIMESTAMPTZ NOT NULL DEFAULT now()) ")
+        # Another process may have migrated while this one waited for the lock.
+        version, storage_layout, duplicate_checks = read_schema_version(db_handler)
+        if (version, storage_layout, duplicate_checks) == current:
+            return []
+
+        for step_version, description, step in pending_migrations(version):
+            step(db_handler)
+            applied.append(f"{step_version}: {description}")
+
+        if storage_layout is not None and storage_layout != db_handler.storage_layout:
+            if db_handler.storage_layout != "postings":
+                raise ValueError(f"Can't convert the {storage_layout} storage layout "
+                                 f"to {db_handler.storage_layout}. Set STORAGE_LAYOUT = \"{storage_layout}\".")
+            # The postings table already holds the occurrences of the arrays (see migration 5).
+            applied.append("Stop storing the occurrences in arrays")
+        if duplicate_checks is not None and duplicate_checks != db_handler.duplicate_checks:
+            db_handler.create_triggers()
+            db_handler.create_indexes()
+            applied.append(f"Switch the duplicate checks to {db_handler.duplicate_checks}")
+
+        record_schema_version(db_handler, SCHEMA_VERSION)
+    return applied
@@ -0,0 +1,485 @@
+"""
+This module is the SQLite storage backend of DBHandler: an embedded database in a single file, so the app,
+its tools and the benchmarks can run in-process without a PostgreSQL server.
+
+SQLiteConnection and SQLiteCursor have the methods of PooledConnection and PooledCursor (see connection_pool),
+which are the interface DBHandler and the modules built on it use: execute, copy_expert, fetchall, fetchone,
+iteration, commit, rollback and transaction. Each connection keeps one sqlite3 connection, in WAL mode so
+that readers don't wait for writers.
+
+The statements of the app are written for PostgreSQL, and are translated before they are run (see translate):
+    - the art_info and text_handle schema prefixes are dropped, since all the tables are in one file;
+    - %s placeholders become ?, and casts (::type) are dropped;
+    - array parameters and columns are JSON arrays: "x = ANY(array)" becomes "x IN (SELECT value FROM
+      json_each(array))", unnest becomes json_each, and Python lists are passed as JSON;
+    - the PostgreSQL functions the app calls (gen_random_uuid, char_length, to_char, array_append, now,
+      pg_advisory_xact_lock) are defined on every connection.
+COPY ... FROM STDIN is run as a single executemany. Errors are raised as the psycopg2 exceptions the
+callers catch. The tables are created by DBHandler from SQLITE_TABLES; only the "postings" storage layout
+and the "constraints" duplicate checks are supported.
+"""
+
+import datetime
+import json
+import os
+import re
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+import psycopg2
+from psycopg2.errors import UndefinedTable
+
+import query_stats
+
+# The default database file.
+SQLITE_PATH = "articles.sqlite3"
+
+# The number of seconds a writer waits for another writer to commit.
+SQLITE_TIMEOUT = 30.0
+
+# The tables of the app. Arrays (word_groups.word_ids, and the word offsets of article_lines) are stored as JSON
+# and read back as lists.
+SQLITE_TABLES = """
+    CREATE TABLE IF NOT EXISTS newspapers(np_id TEXT PRIMARY KEY, np_name TEXT);
+    CREATE TABLE IF NOT EXISTS articles(article_id INTEGER PRIMARY KEY, article_title TEXT, date DATE,
+                                        reporter_id INTEGER, np_id TEXT REFERENCES newspapers (np_id));
+    CREATE TABLE IF NOT EXISTS reporters(reporter_id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT);
+    CREATE TABLE IF NOT EXISTS words(word_id INTEGER PRIMARY KEY, word TEXT, occurrences TEXT);
+    CREATE TABLE IF NOT EXISTS word_groups(group_id INTEGER PRIMARY KEY, group_description TEXT,
+                                           word_ids INTEGER_ARRAY);
+    CREATE TABLE IF NOT EXISTS phrases(phrase_id INTEGER PRIMARY KEY, phrase TEXT);
+    CREATE TABLE IF NOT EXISTS postings(
+        word_id INTEGER NOT NULL REFERENCES words (word_id),
+        article_id INTEGER NOT NULL REFERENCES articles (article_id),
+        paragraph_number INTEGER NOT NULL, line_number INTEGER NOT NULL,
+        position_in_line INTEGER NOT NULL, starting_chars TEXT, finishing_chars TEXT,
+        PRIMARY KEY (article_id, paragraph_number, line_number, position_in_line)) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS postings_word_article_idx ON postings (word_id, article_id);
+    CREATE TABLE IF NOT EXISTS packed_positions(
+        word_id INTEGER NOT NULL REFERENCES words (word_id),
+        article_id INTEGER NOT NULL REFERENCES articles (article_id),
+        positions BLOB NOT NULL,
+        PRIMARY KEY (word_id, article_id)) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS article_texts(
+        article_id INTEGER NOT NULL REFERENCES articles (article_id),
+        chunk_number INTEGER NOT NULL, content TEXT NOT NULL,
+        PRIMARY KEY (article_id, chunk_number)) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS article_lines(
+        article_id INTEGER NOT NULL REFERENCES articles (article_id),
+        paragraph_number INTEGER NOT NULL, line_number INTEGER NOT NULL,
+        content TEXT NOT NULL, word_starts INTEGER_ARRAY NOT NULL, word_ends INTEGER_ARRAY NOT NULL,
+        PRIMARY KEY (article_id, paragraph_number, line_number)) WITHOUT ROWID;
+"""
+
+# The phrase validation triggers of DBHandler.create_triggers.
+SQLITE_PHRASE_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS ascii_check_trigger BEFORE INSERT ON phrases
+    WHEN NOT is_ascii(NEW.phrase)
+    BEGIN SELECT RAISE(ABORT, 'The phrase contains non-ASCII characters'); END;
+    CREATE TRIGGER IF NOT EXISTS check_length_trigger BEFORE INSERT ON phrases
+    WHEN length(NEW.phrase) > 100
+    BEGIN SELECT RAISE(ABORT, 'The phrase is too long'); END;
+"""
+
+sqlite3.register_adapter(list, json.dumps)
+sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+sqlite3.register_converter("INTEGER_ARRAY", json.loads)
+sqlite3.register_converter("DATE", lambda value: datetime.date.fromisoformat(value.decode()))
+
+_REWRITES = [
+    (re.compile(r"\b(?:art_info|text_handle)\."), ""),
+    (re.compile(r"::\w+(?:\[\])?"), ""),
+    (re.compile(r"\bunnest\(([^()]*)\)\s+AS\s+(\w+)\((\w+)\)", re.IGNORECASE),
+     r"(SELECT value AS \3 FROM json_each(\1)) AS \2"),
+    (re.compile(r"=\s*ANY\s*\(([^()]*)\)", re.IGNORECASE), r"IN (SELECT value FROM json_each(\1))"),
+    (re.compile(r"\bON COMMIT DELETE ROWS\b", re.IGNORECASE), ""),
+    (re.compile(r"\bTRUNCATE\b", re.IGNORECASE), "DELETE FROM"),
+    (re.compile(r"\bnow\(\)", re.IGNORECASE), "CURRENT_TIMESTAMP"),
+    (re.compile(r"(\bDROP TRIGGER IF EXISTS \w+) ON \w+", re.IGNORECASE), r"\1"),
+]
+# A statement ends at a semicolon outside of quotes and of the BEGIN ... END body of a trigger.
+_STATEMENT = re.compile(r"(?:\bBEGIN\b(?:[^']|'[^']*')*?\bEND\b|'[^']*'|[^;'])+", re.IGNORECASE)
+_COPY = re.compile(r"\s*COPY\s+(\S+)\s*\(([^)]*)\)\s+FROM\s+STDIN\s*$", re.IGNORECASE)
+_COPY_ESCAPE = re.compile(r"\\(.)")
+_COPY_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r'}
+
+
+@lru_cache(maxsize=1024)
+def translate(query):
+    """
+    Translate a PostgreSQL statement of the app into SQLite statements.
+
+    Args:
+        query (str): The statement, possibly several separated by semicolons.
+
+    Returns:
+        Tuple[Tuple[str, int], ...]: The SQLite statements, with their number of parameters.
+    """
+    for pattern, replacement in _REWRITES:
+        query = pattern.sub(replacement, query)
+    statements = []
+    for statement in _STATEMENT.findall(query):
+        if statement.strip() and not statement.strip().upper().startswith("SET LOCAL"):
+            statements.append((statement.replace("%s", "?").replace("%%", "%"), statement.count("%s")))
+    return tuple(statements)
+
+
+def copy_unescape(value):
+    """
+    Read a value in the text format of PostgreSQL's COPY command (see db_handler.copy_escape).
+
+    Args:
+        value (str): The escaped value.
+
+    Returns:
+        Optional[str]: The value, or None for \\N.
+    """
+    if value == '\\N':
+        return None
+    return _COPY_ESCAPE.sub(lambda match: _COPY_ESCAPES.get(match.group(1), match.group(1)), value)
+
+
+def copy_value(value, declared_type):
+    """
+    Convert a value read from the text format of COPY to the type of its column.
+
+    Args:
+        value (Optional[str]): The value (see copy_unescape).
+        declared_type (Optional[str]): The declared type of the column, in upper case.
+
+    Returns:
+        Any: The bytes of a bytea (\\x followed by hex digits) for a BLOB column, the JSON array of an array
+        literal ({1,2,3}) for an INTEGER_ARRAY column, and the value itself otherwise.
+    """
+    if value is None:
+        return None
+    if declared_type == "BLOB":
+        return bytes.fromhex(value[2:])
+    if declared_type == "INTEGER_ARRAY":
+        return '[' + value[1:-1] + ']'
+    return value
+
+
+def database_error(error):
+    """
+    Convert an sqlite3 error into the psycopg2 exception the callers of DBHandler catch.
+
+    Args:
+        error (sqlite3.Error): The error.
+
+    Returns:
+        psycopg2.Error: The exception to raise.
+    """
+    message = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        return psycopg2.IntegrityError(message)
+    if message.startswith("no such table"):
+        return UndefinedTable(message)
+    if isinstance(error, sqlite3.OperationalError):
+        return psycopg2.OperationalError(message)
+    return psycopg2.DatabaseError(message)
+
+
+def to_char(value, format_string):
+    """
+    The to_char of PostgreSQL, for the date format the app uses.
+
+    Args:
+        value (str): A date, as stored (YYYY-MM-DD).
+        format_string (str): The format. Only 'YYYY-MM-DD' is supported.
+
+    Returns:
+        str: The formatted date.
+    """
+    if format_string != 'YYYY-MM-DD':
+        raise ValueError(f"Unsupported date format: {format_string}")
+    return value[:10] if value is not None else None
+
+
+def array_append(array, value):
+    """
+    The array_append of PostgreSQL, on arrays stored as JSON.
+
+    Args:
+        array (Optional[str]): The array, or NULL for an empty one.
+        value (Any): The element to append.
+
+    Returns:
+        str: The new array.
+    """
+    return json.dumps((json.loads(array) if array is not None else []) + [value])
+
+
+def connect(path):
+    """
+    Open an SQLite database in WAL mode, with the functions the statements of the app call.
+
+    Args:
+        path (str): The database file, or a file: URI.
+
+    Returns:
+        sqlite3.Connection: The connection, with transactions controlled by the statements (isolation_level None).
+    """
+    raw_connection = sqlite3.connect(path, timeout=SQLITE_TIMEOUT, isolation_level=None, uri=True,
+                                     detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    raw_connection.execute(" PRAGMA journal_mode = WAL ")
+    raw_connection.execute(" PRAGMA synchronous = NORMAL ")
+    raw_connection.execute(" PRAGMA foreign_keys = ON ")
+    raw_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+    raw_connection.create_function("char_length", 1, lambda text: len(text) if text is not None else None,
+                                   deterministic=True)
+    raw_connection.create_function("is_ascii", 1, lambda text: text is None or text.isascii(), deterministic=True)
+    raw_connection.create_function("to_char", 2, to_char, deterministic=True)
+    raw_connection.create_function("array_append", 2, array_append, deterministic=True)
+    # Writers already exclude each other: a transaction that writes starts with BEGIN IMMEDIATE.
+    raw_connection.create_function("pg_advisory_xact_lock", 1, lambda lock_id: None)
+    return raw_connection
+
+
+class SQLiteConnection:
+    """
+    The connection of a DBHandler on the SQLite backend, with the methods of PooledConnection.
+
+    Attributes:
+        path (str): The database file.
+        database (Tuple[Any, ...]): The backend and the absolute path of the database file, which
+            identify the database like connection_pool.database_of.
+        autocommit (bool): Whether every statement runs in its own transaction, outside of a transaction block.
+    """
+
+    def __init__(self, path=None, autocommit=False):
+        """
+        Initialize the connection. The database is opened on first use.
+
+        Args:
+            path (Optional[str]): The database file. Defaults to SQLITE_PATH.
+            autocommit (bool): Whether every statement runs in its own transaction, outside of a transaction block.
+        """
+        self.path = path or SQLITE_PATH
+        self.database = ("sqlite", os.path.abspath(self.path))
+        self.autocommit = autocommit
+        self.raw_connection = None
+        # The readonly option of the transaction block in progress, or None outside of one.
+        self.transaction_options = None
+
+    def checkout(self):
+        """
+        Get the sqlite3 connection, opening it and beginning a transaction if needed.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        if self.raw_connection is None:
+            self.raw_connection = connect(self.path)
+        if not self.raw_connection.in_transaction:
+            if self.transaction_options is not None:
+                # Reads begin a deferred transaction, which sees one snapshot from its first read.
+                self.raw_connection.execute(" BEGIN " if self.transaction_options else " BEGIN IMMEDIATE ")
+            elif not self.autocommit:
+                self.raw_connection.execute(" BEGIN IMMEDIATE ")
+        return self.raw_connection
+
+    def statement_done(self):
+        """Nothing to do: the sqlite3 connection stays open."""
+
+    @contextmanager
+    def transaction(self, isolation_level=None, readonly=None):
+        """
+        Run the statements of the with block in one transaction (see PooledConnection.transaction).
+
+        Args:
+            isolation_level (Optional[int]): Ignored: SQLite transactions are serializable.
+            readonly (Optional[bool]): Whether the transaction only reads, so it doesn't wait for writers.
+        """
+        if self.transaction_options is not None or (self.raw_connection is not None
+                                                    and self.raw_connection.in_transaction):
+            yield
+            return
+        self.transaction_options = bool(readonly)
+        try:
+            yield
+        except BaseException:
+            self.transaction_options = None
+            self.rollback()
+            raise
+        self.transaction_options = None
+        self.commit()
+
+    def cursor(self):
+        """
+        Create a cursor that runs its statements on this connection.
+
+        Returns:
+            SQLiteCursor: The cursor.
+        """
+        return SQLiteCursor(self)
+
+    def server_cursor(self, name):
+        """
+        Create a cursor for streaming a large result (see PooledConnection.server_cursor).
+        SQLite cursors already fetch their rows as they are iterated.
+
+        Args:
+            name (str): Ignored.
+
+        Returns:
+            SQLiteCursor: The cursor.
+        """
+        return SQLiteCursor(self, timed=False)
+
+    def commit(self):
+        """Commit the current transaction. Inside a transaction block, the block commits at its end."""
+        if self.transaction_options is None and self.raw_connection is not None and self.raw_connection.in_transaction:
+            self.raw_connection.execute(" COMMIT ")
+
+    def rollback(self):
+        """Roll the current transaction back."""
+        if self.raw_connection is not None and self.raw_connection.in_transaction:
+            self.raw_connection.execute(" ROLLBACK ")
+
+    def release(self):
+        """Roll back an open transaction."""
+        self.rollback()
+
+    def __del__(self):
+        """Close the sqlite3 connection when the handler is discarded."""
+        try:
+            if self.raw_connection is not None:
+                self.raw_connection.close()
+        except Exception:
+            pass
+
+
+class SQLiteCursor:
+    """
+    The cursor of a DBHandler on the SQLite backend, with the methods of PooledCursor.
+    Statements are translated (see translate) and timed in the query statistics of the process.
+
+    Attributes:
+        itersize (int): Ignored. Set by DBHandler.stream, like on a server-side cursor.
+    """
+
+    def __init__(self, connection, timed=True):
+        """
+        Initialize the cursor.
+
+        Args:
+            connection (SQLiteConnection): The connection.
+            timed (bool): Whether statements are recorded in the query statistics.
+        """
+        self.connection = connection
+        self.timed = timed
+        self.raw_cursor = None
+        self.itersize = None
+
+    def checkout(self):
+        """
+        Get an sqlite3 cursor on the connection.
+
+        Returns:
+            sqlite3.Cursor: The cursor.
+        """
+        raw_connection = self.connection.checkout()
+        if self.raw_cursor is None or self.raw_cursor.connection is not raw_connection:
+            self.raw_cursor = raw_connection.cursor()
+        return self.raw_cursor
+
+    def execute(self, query, params=None):
+        """
+        Execute a statement.
+
+        Args:
+            query (str): The statement, in the PostgreSQL dialect of the app.
+            params (Optional[Sequence[Any]]): The parameters of the statement.
+        """
+        start = time.perf_counter()
+        params = list(params or ())
+        try:
+            raw_cursor = self.checkout()
+            for statement, param_count in translate(query):
+                raw_cursor.execute(statement, params[:param_count])
+                params = params[param_count:]
+        except sqlite3.Error as e:
+            raise database_error(e) from e
+        finally:
+            self.record(query, start)
+
+    def copy_expert(self, sql, file):
+        """
+        Execute a COPY ... FROM STDIN statement, inserting the rows of the file with one executemany.
+
+        Args:
+            sql (str): The COPY statement.
+            file (IO): The rows, in the text format of COPY.
+        """
+        start = time.perf_counter()
+        match = _COPY.match(translate(sql)[0][0])
+        if match is None:
+            raise ValueError(f"Unsupported COPY statement: {sql}")
+        table, columns = match.group(1), [column.strip() for column in match.group(2).split(',')]
+        try:
+            raw_cursor = self.checkout()
+            declared_types = {row[1]: row[2].upper() for row in raw_cursor.execute(f" PRAGMA table_info({table}) ")}
+            types = [declared_types.get(column) for column in columns]
+            rows = []
+            for line in file:
+                values = [copy_unescape(value) for value in line.rstrip('\n').split('\t')]
+                rows.append([copy_value(value, declared_type) for value, declared_type in zip(values, types)])
+            raw_cursor.executemany(f" INSERT INTO {table} ({', '.join(columns)}) "
+                                   f" VALUES ({', '.join('?' * len(columns))}) ", rows)
+        except sqlite3.Error as e:
+            raise database_error(e) from e
+        finally:
+            self.record(sql, start)
+
+    def record(self, query, start):
+        """
+        Record the duration and the row count of a statement in the query statistics.
+
+        Args:
+            query (str): The statement.
+            start (float): The time.perf_counter() value when the statement started.
+        """
+        if self.timed and query_stats.QUERY_TIMING:
+            query_stats.get_query_stats().record(query, time.perf_counter() - start, self.rowcount)
+
+    def fetchall(self):
+        """
+        Fetch all the rows of the last result.
+
+        Returns:
+            List[Tuple[Any, ...]]: The rows.
+        """
+        return self.raw_cursor.fetchall()
+
+    def fetchone(self):
+        """
+        Fetch the next row of the last result.
+
+        Returns:
+            Optional[Tuple[Any, ...]]: The row, or None if there are no more rows.
+        """
+        return self.raw_cursor.fetchone()
+
+    def __iter__(self):
+        """
+        Iterate over the remaining rows of the last result.
+
+        Returns:
+            Iterator[Tuple[Any, ...]]: The rows.
+        """
+        return iter(self.raw_cursor)
+
+    def close(self):
+        """Close the cursor."""
+        if self.raw_cursor is not None:
+            self.raw_cursor.close()
+            self.raw_cursor = None
+
+    @property
+    def rowcount(self):
+        """int: The number of rows the last statement affected (-1 for queries)."""
+        return self.raw_cursor.rowcount if self.raw_cursor is not None else -1
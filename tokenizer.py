@@ -0,0 +1,280 @@
+"""
+This module breaks the content of an article down into words and their positions.
+
+Each line is split into tokens at once, and every distinct token is separated into its leading
+punctuation, the word itself and its trailing punctuation without walking it character by character
+in Python: with str methods for plain and ASCII tokens, and with a single match of a compiled regular
+expression for the others. The split of a token is remembered, since the same tokens repeat
+throughout an article.
+
+Articles that are too large to hold in memory can be tokenized line by line from a file object
+with tokenize_lines. join_tokens does the reverse, joining words and their positions back into text, and
+join_lines joins them back into lines, with the offsets of their words.
+"""
+
+import itertools
+import re
+from typing import Dict, List, Tuple
+
+# Paragraphs are separated by (at least) one blank line.
+PARAGRAPH_SEPARATOR = re.compile(r'\n\s*\n')
+
+# A whitespace-delimited token, split into the non-alphanumeric characters it starts with, the word
+# (from its first to its last alphanumeric character), and the non-alphanumeric characters it ends with.
+# Underscores are not alphanumeric (str.isalnum). For a token with no alphanumeric characters at all,
+# the first group takes the whole token.
+TOKEN_PATTERN = re.compile(r'((?:[^\w\s]|_)*)((?:[^\W_](?:\S*[^\W_])?)?)(\S*)')
+
+# All the ASCII characters that are not alphanumeric, for stripping the punctuation off ASCII tokens.
+ASCII_NON_ALNUM = ''.join(chr(code) for code in range(128) if not chr(code).isalnum())
+
+# The number of distinct tokens remembered by tokenize_paragraph before the memo is cleared.
+TOKEN_MEMO_SIZE = 100000
+
+
+def split_token(token):
+    """
+    Split a token into its word and the punctuation around it.
+
+    Most tokens are either plain words or ASCII, and are split with str methods. Other tokens are
+    split with a single match of TOKEN_PATTERN.
+
+    Args:
+        token (str): A whitespace-delimited token.
+
+    Returns:
+        Tuple[str, str, str]: The starting characters, the word and the finishing characters. A token
+        with no alphanumeric characters is a word on its own, with no starting or finishing characters.
+    """
+    if token.isalnum():
+        return '', token, ''
+    if token.isascii():
+        stripped_start = token.lstrip(ASCII_NON_ALNUM)
+        if not stripped_start:
+            return '', token, ''
+        word = stripped_start.rstrip(ASCII_NON_ALNUM)
+        return token[:len(token) - len(stripped_start)], word, stripped_start[len(word):]
+    starting_chars, word, finishing_chars = TOKEN_PATTERN.match(token).groups()
+    if not word:
+        return '', token, ''
+    return starting_chars, word, finishing_chars
+
+
+def split_paragraphs(content):
+    """
+    Split the content of an article into its non-empty paragraphs.
+
+    Args:
+        content (str): The content of the article (without the header lines).
+
+    Returns:
+        List[str]: The paragraphs, stripped of surrounding whitespace.
+    """
+    return [p.strip() for p in PARAGRAPH_SEPARATOR.split(content) if p.strip()]
+
+
+def tokenize_line(line, p_index, l_index, is_last_line, token_memo):
+    """
+    Break a line of a paragraph down into words and their positions.
+
+    Args:
+        line (str): The line.
+        p_index (int): The number of the paragraph in the article, starting from 1.
+        l_index (int): The number of the line in the paragraph, starting from 1.
+        is_last_line (bool): Whether this is the last line of the paragraph.
+        token_memo (Dict[str, Tuple[str, str, str]]): Tokens already split by split_token.
+
+    Returns:
+        List[Tuple[str, Tuple[int, int, int, str, str]]]: The words of the line in reading order,
+        each with its (paragraph_number, line_number, position_in_line, starting_chars, finishing_chars).
+    """
+    tokens = []
+    line_tokens = line.split()
+    last_position = len(line_tokens)
+    for position, token in enumerate(line_tokens, start=1):
+        parts = token_memo.get(token)
+        if parts is None:
+            parts = token_memo[token] = split_token(token)
+        starting_chars, word, finishing_chars = parts
+        if position == last_position:
+            finishing_chars += '\n\n' if is_last_line else '\n'
+        tokens.append((word, (p_index, l_index, position, starting_chars, finishing_chars)))
+    return tokens
+
+
+def tokenize_paragraph(paragraph, p_index, token_memo):
+    """
+    Break a paragraph down into words and their positions.
+
+    Args:
+        paragraph (str): The paragraph, stripped of surrounding whitespace.
+        p_index (int): The number of the paragraph in the article, starting from 1.
+        token_memo (Dict[str, Tuple[str, str, str]]): Tokens already split by split_token. News text
+            repeats the same tokens over and over, so most tokens are split only once.
+
+    Returns:
+        List[Tuple[str, Tuple[int, int, int, str, str]]]: The words of the paragraph in reading order,
+        each with its (paragraph_number, line_number, position_in_line, starting_chars, finishing_chars).
+    """
+    if len(token_memo) > TOKEN_MEMO_SIZE:
+        token_memo.clear()
+    tokens = []
+    lines = paragraph.split('\n')
+    last_line = len(lines)
+    for l_index, line in enumerate(lines, start=1):
+        tokens.extend(tokenize_line(line, p_index, l_index, l_index == last_line, token_memo))
+    return tokens
+
+
+def tokenize(content):
+    """
+    Break the content of an article down into words and their positions, in reading order.
+
+    Args:
+        content (str): The content of the article (without the header lines).
+
+    Yields:
+        Tuple[str, Tuple[int, int, int, str, str]]: A word and its (paragraph_number, line_number,
+        position_in_line, starting_chars, finishing_chars).
+    """
+    token_memo = {}
+    for p_index, paragraph in enumerate(split_paragraphs(content), start=1):
+        yield from tokenize_paragraph(paragraph, p_index, token_memo)
+
+
+def tokenize_lines(lines):
+    """
+    Break the content of an article down into words and their positions, reading it line by line.
+
+    This gives the same words and positions as tokenize, but only one line (and the one after it,
+    to know where a paragraph ends) is held in memory at a time, so it can tokenize huge articles
+    straight from a file object. A line with nothing but whitespace ends a paragraph.
+
+    Args:
+        lines (Iterable[str]): The lines of the content of the article (without the header lines),
+            with or without their line breaks.
+
+    Yields:
+        Tuple[str, Tuple[int, int, int, str, str]]: A word and its (paragraph_number, line_number,
+        position_in_line, starting_chars, finishing_chars).
+    """
+    token_memo = {}
+    p_index = 0
+    l_index = 0
+    previous_line = None
+    for line in lines:
+        line = line.rstrip('\n')
+        is_blank = not line.strip()
+        if previous_line is not None:
+            yield from tokenize_line(previous_line, p_index, l_index, is_blank, token_memo)
+            previous_line = None
+        if is_blank:
+            l_index = 0
+            continue
+        if l_index == 0:
+            p_index += 1
+            if len(token_memo) > TOKEN_MEMO_SIZE:
+                token_memo.clear()
+        l_index += 1
+        previous_line = line
+    if previous_line is not None:
+        yield from tokenize_line(previous_line, p_index, l_index, True, token_memo)
+
+
+def extract_words(content):
+    """
+    Break the content of an article down into words and their positions.
+
+    This function splits the content into paragraphs, lines, and words, recording the
+    position of each word along with its surrounding punctuation. It does not touch the
+    database, so it can run in a worker process.
+
+    Args:
+        content (str): The content of the article (without the header lines).
+
+    Returns:
+        Dict[str, List[Tuple[int, int, int, str, str]]]: A dictionary mapping words to their positions
+        and surrounding punctuation.
+    """
+    words: Dict[str, List[Tuple[int, int, int, str, str]]] = {}
+    token_memo = {}
+    for p_index, paragraph in enumerate(split_paragraphs(content), start=1):
+        for word, position in tokenize_paragraph(paragraph, p_index, token_memo):
+            positions = words.get(word)
+            if positions is None:
+                words[word] = [position]
+            else:
+                positions.append(position)
+    return words
+
+
+def join_tokens(word_positions):
+    """
+    Join words back into the text they were tokenized from: a line starts with its first word, the other
+    words follow a space, and the line and paragraph breaks are in the finishing characters of the last
+    word of a line.
+
+    Args:
+        word_positions (Iterable[Tuple[str, Tuple[int, int, int, str, str]]]): Words and their positions,
+            in reading order (see tokenize).
+
+    Returns:
+        str: The text. Texts joined from consecutive runs of words can be concatenated.
+    """
+    parts = []
+    for word, (_, _, position_in_line, starting_chars, finishing_chars) in word_positions:
+        if position_in_line != 1:
+            parts.append(' ')
+        parts.append(starting_chars)
+        parts.append(word)
+        parts.append(finishing_chars)
+    return ''.join(parts)
+
+
+def join_lines(word_positions):
+    """
+    Join words back into the lines they were tokenized from (see join_tokens), and find where each word
+    is in its line.
+
+    Args:
+        word_positions (Iterable[Tuple[str, Tuple[int, int, int, str, str]]]): Words and their positions,
+            in reading order, with every line whole.
+
+    Yields:
+        Tuple[int, int, str, List[int], List[int]]: The paragraph_number and line_number of each line, its
+        text (with the line or paragraph break it ends with), and the offsets in the text where each word of
+        the line starts and ends, by position_in_line. The word at position p is text[starts[p - 1]:ends[p - 1]].
+    """
+    for (paragraph_number, line_number), line in itertools.groupby(word_positions, key=lambda pair: pair[1][:2]):
+        parts = []
+        word_starts = []
+        word_ends = []
+        offset = 0
+        for word, (_, _, position_in_line, starting_chars, finishing_chars) in line:
+            if position_in_line != 1:
+                parts.append(' ')
+                offset += 1
+            offset += len(starting_chars)
+            word_starts.append(offset)
+            offset += len(word)
+            word_ends.append(offset)
+            offset += len(finishing_chars)
+            parts.append(starting_chars)
+            parts.append(word)
+            parts.append(finishing_chars)
+        yield paragraph_number, line_number, ''.join(parts), word_starts, word_ends
+
+
+def reading_order(dict_text):
+    """
+    List the words of an article in reading order.
+
+    Args:
+        dict_text (Dict[str, List[Tuple[int, int, int, str, str]]]): A dictionary mapping words to their
+            positions (see extract_words).
+
+    Returns:
+        List[Tuple[str, Tuple[int, int, int, str, str]]]: The words and their positions, in reading order.
+    """
+    return sorted(((word, position) for word, positions in dict_text.items() for position in positions),
+                  key=lambda pair: pair[1][:3])
@@ -0,0 +1,162 @@
+"""
+This module keeps the IDs of known words in memory, so that loading an article doesn't have to look
+up every one of its words in the database.
+
+There is one cache per database, shared by every TextLoader and DBHandler of the process that uses
+that database (see get_word_cache). Words are never deleted or renamed, so a cached ID stays correct. Only the IDs of committed words may be added:
+the TextLoader keeps the IDs of the words it inserts aside until its transaction commits.
+"""
+
+import threading
+from collections import OrderedDict
+
+# The maximal number of words kept in the cache. The least recently used words are evicted first.
+WORD_CACHE_SIZE = 500000
+
+
+class WordIdCache:
+    """
+    A thread-safe word -> word_id map with LRU eviction and hit/miss counters.
+
+    Attributes:
+        max_size (int): The maximal number of words kept in the cache.
+        hits (int): The number of lookups answered by the cache.
+        misses (int): The number of lookups the cache couldn't answer.
+        prefilled (bool): Whether the cache was already filled from the words table.
+    """
+
+    def __init__(self, max_size=WORD_CACHE_SIZE):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size (int): The maximal number of words kept in the cache.
+        """
+        self.max_size = max_size
+        self.word_ids = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.prefilled = False
+
+    def get(self, word):
+        """
+        Look a word up.
+
+        Args:
+            word (str): The word.
+
+        Returns:
+            Optional[int]: The ID of the word, or None if it isn't cached.
+        """
+        with self.lock:
+            word_id = self.word_ids.get(word)
+            if word_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.word_ids.move_to_end(word)
+            return word_id
+
+    def get_many(self, words):
+        """
+        Look several words up at once.
+
+        Args:
+            words (Iterable[str]): The words.
+
+        Returns:
+            Tuple[Dict[str, int], List[str]]: The IDs of the cached words, and the words that aren't cached.
+        """
+        found = {}
+        missing = []
+        with self.lock:
+            for word in words:
+                word_id = self.word_ids.get(word)
+                if word_id is None:
+                    missing.append(word)
+                else:
+                    found[word] = word_id
+                    self.word_ids.move_to_end(word)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put(self, word, word_id):
+        """
+        Add the ID of a committed word to the cache.
+
+        Args:
+            word (str): The word.
+            word_id (int): The ID of the word.
+        """
+        self.put_many(((word, word_id),))
+
+    def put_many(self, word_ids):
+        """
+        Add the IDs of committed words to the cache, evicting the least recently used words if needed.
+
+        Args:
+            word_ids (Iterable[Tuple[str, int]]): (word, word_id) pairs.
+        """
+        with self.lock:
+            for word, word_id in word_ids:
+                self.word_ids[word] = word_id
+                self.word_ids.move_to_end(word)
+            while len(self.word_ids) > self.max_size:
+                self.word_ids.popitem(last=False)
+
+    def prefill(self, load_word_ids):
+        """
+        Fill the cache from its database, once per process.
+
+        Args:
+            load_word_ids (Callable[[int], Iterable[Tuple[str, int]]]): A function that returns up to
+                the given number of (word, word_id) pairs from the words table.
+        """
+        with self.lock:
+            if self.prefilled:
+                return
+            self.prefilled = True
+        self.put_many(load_word_ids(self.max_size))
+
+    def clear(self):
+        """Empty the cache and reset its counters. The next prefill reads the words table again."""
+        with self.lock:
+            self.word_ids.clear()
+            self.hits = 0
+            self.misses = 0
+            self.prefilled = False
+
+    def stats(self):
+        """
+        Get the counters of the cache.
+
+        Returns:
+            Dict[str, Any]: The number of cached words, the hits, the misses and the hit rate.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self.word_ids), "max_size": self.max_size, "hits": self.hits,
+                    "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+_word_caches = {}
+_word_cache_lock = threading.Lock()
+
+
+def get_word_cache(database):
+    """
+    Get the word ID cache of a database in this process, creating it on first use.
+
+    Args:
+        database (Tuple[Any, ...]): The database, as identified by DBHandler.database.
+
+    Returns:
+        WordIdCache: The cache.
+    """
+    with _word_cache_lock:
+        word_cache = _word_caches.get(database)
+        if word_cache is None:
+            word_cache = _word_caches[database] = WordIdCache()
+        return word_cache